@@ -0,0 +1,78 @@
+"""Measure the import time of cosimtlk with `python -X importtime`.
+
+Every statement is run in a fresh interpreter several times, and the fastest run is reported,
+along with the slowest top-level imports of that run. Results can be appended as JSON lines
+to a file to track the startup cost over time:
+
+    python benchmarks/import_time.py --output import_time.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+STATEMENTS = (
+    "import cosimtlk",
+    "from cosimtlk import FMU",
+    "from cosimtlk import SimulatorClient",
+    "from cosimtlk.simulation import Simulator",
+    "import cosimtlk.app.main",
+)
+
+
+def measure(statement: str) -> dict[str, int]:
+    """Return the cumulative import time in microseconds of every top-level import of a statement."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented below the module importing them
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            imports[name.strip()] = int(cumulative)
+    return imports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("statements", nargs="*", default=STATEMENTS, help="Statements to measure.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs per statement.")
+    parser.add_argument("--top", type=int, default=5, help="Number of slowest top-level imports to show.")
+    parser.add_argument("--output", help="File to append the results to as JSON lines.")
+    args = parser.parse_args()
+
+    results = {}
+    for statement in args.statements:
+        runs = [measure(statement) for _ in range(args.repeat)]
+        fastest = min(runs, key=lambda imports: sum(imports.values()))
+        total = sum(fastest.values())
+        results[statement] = total
+
+        print(f"{statement:<45} {total / 1000:8.1f} ms")
+        for name, cumulative in sorted(fastest.items(), key=lambda item: -item[1])[: args.top]:
+            print(f"    {name:<41} {cumulative / 1000:8.1f} ms")
+
+    if args.output:
+        record = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results_us": results,
+        }
+        with open(args.output, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,114 @@
-from cosimtlk._fmu import FMU, FMUInstance, RemoteFMU, RemoteFMUInstance
-from cosimtlk.client import SimulatorClient
+"""Co-simulation toolkit for FMUs.
+
+Public names are imported lazily on first access (PEP 562), so that for example
+`from cosimtlk import FMU` does not import the HTTP client or the server schemas.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from cosimtlk._cache import (
+        BinaryCache,
+        ExtractionCache,
+        ModelDescriptionCache,
+        binary_cache,
+        extraction_cache,
+        model_description_cache,
+    )
+    from cosimtlk._fmu import (
+        FMU,
+        AsyncRemoteFMUInstance,
+        FMUInstance,
+        FMUSnapshot,
+        ModelExchangeFMUInstance,
+        RemoteFMU,
+        RemoteFMUInstance,
+    )
+    from cosimtlk._parallel import ParallelStepper
+    from cosimtlk._pool import FMUInstancePool
+    from cosimtlk._solvers import EulerSolver, RK45Solver, Solver
+    from cosimtlk._subprocess import SubprocessFMUInstance
+    from cosimtlk._sweep import SweepResult, grid, latin_hypercube, random_design, sweep
+    from cosimtlk._variables import VariableGroup
+    from cosimtlk.client import AsyncSimulatorClient, SimulatorClient, SimulatorSession
+
+# Module defining every public name
+_LAZY_IMPORTS = {
+    "BinaryCache": "cosimtlk._cache",
+    "ExtractionCache": "cosimtlk._cache",
+    "ModelDescriptionCache": "cosimtlk._cache",
+    "binary_cache": "cosimtlk._cache",
+    "extraction_cache": "cosimtlk._cache",
+    "model_description_cache": "cosimtlk._cache",
+    "FMU": "cosimtlk._fmu",
+    "AsyncRemoteFMUInstance": "cosimtlk._fmu",
+    "FMUInstance": "cosimtlk._fmu",
+    "FMUSnapshot": "cosimtlk._fmu",
+    "ModelExchangeFMUInstance": "cosimtlk._fmu",
+    "RemoteFMU": "cosimtlk._fmu",
+    "RemoteFMUInstance": "cosimtlk._fmu",
+    "ParallelStepper": "cosimtlk._parallel",
+    "FMUInstancePool": "cosimtlk._pool",
+    "EulerSolver": "cosimtlk._solvers",
+    "RK45Solver": "cosimtlk._solvers",
+    "Solver": "cosimtlk._solvers",
+    "SubprocessFMUInstance": "cosimtlk._subprocess",
+    "SweepResult": "cosimtlk._sweep",
+    "grid": "cosimtlk._sweep",
+    "latin_hypercube": "cosimtlk._sweep",
+    "random_design": "cosimtlk._sweep",
+    "sweep": "cosimtlk._sweep",
+    "VariableGroup": "cosimtlk._variables",
+    "AsyncSimulatorClient": "cosimtlk.client",
+    "SimulatorClient": "cosimtlk.client",
+    "SimulatorSession": "cosimtlk.client",
+}
 
 __all__ = [
     "FMU",
+    "AsyncRemoteFMUInstance",
+    "AsyncSimulatorClient",
+    "BinaryCache",
+    "EulerSolver",
+    "ExtractionCache",
     "FMUInstance",
+    "FMUInstancePool",
+    "FMUSnapshot",
+    "ModelDescriptionCache",
+    "ModelExchangeFMUInstance",
+    "ParallelStepper",
+    "RK45Solver",
     "RemoteFMU",
     "RemoteFMUInstance",
     "SimulatorClient",
+    "SimulatorSession",
+    "Solver",
+    "SubprocessFMUInstance",
+    "SweepResult",
+    "VariableGroup",
+    "binary_cache",
+    "extraction_cache",
+    "grid",
+    "latin_hypercube",
+    "model_description_cache",
+    "random_design",
+    "sweep",
 ]
+
+
+def __getattr__(name: str):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(module), name)
+    # Cache the attribute, so that __getattr__ is only called on first access
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
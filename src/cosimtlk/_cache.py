@@ -0,0 +1,586 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+
+import fmpy
+from fmpy.model_description import ModelDescription, ScalarVariable
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 1 << 20
+
+_digests: dict[tuple[str, int, int], str] = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path: str | Path) -> str:
+    """Return the SHA-256 hex digest of a file.
+
+    The digest is memoized on the path, size and modification time of the file,
+    so repeated calls for an unchanged file do not read it again.
+
+    Args:
+        path: Path to the file.
+
+    Returns:
+        The hex digest of the file contents.
+    """
+    stat = os.stat(path)
+    key = (str(path), stat.st_size, stat.st_mtime_ns)
+    with _digests_lock:
+        digest = _digests.get(key)
+    if digest is None:
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+        with _digests_lock:
+            _digests[key] = digest
+    return digest
+
+
+def default_cache_dir() -> Path:
+    """Return the directory for persistent caches of cosimtlk.
+
+    This is `COSIMTLK_CACHE_DIR` if set, otherwise `cosimtlk` in the user cache directory.
+    Persistent caches are opt-in, pass a subdirectory of it to their `configure` method.
+    """
+    cache_dir = os.environ.get("COSIMTLK_CACHE_DIR")
+    if cache_dir:
+        return Path(cache_dir)
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "cosimtlk"
+
+
+def _environment_cache_dir(name: str) -> Path | None:
+    """Return a subdirectory of `COSIMTLK_CACHE_DIR` if it is set, None otherwise.
+
+    Persistent caches are only enabled by default when the variable is set.
+    """
+    cache_dir = os.environ.get("COSIMTLK_CACHE_DIR")
+    return Path(cache_dir) / name if cache_dir else None
+
+
+def _is_private(path: Path) -> bool:
+    """Check that a file belongs to the current user and cannot be modified by anyone else."""
+    if sys.platform == "win32":
+        return True
+    status = path.stat()
+    return status.st_uid == os.getuid() and not status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _directory_size(path: str | Path) -> int:
+    size = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                size += os.path.getsize(os.path.join(root, file))
+            except OSError:
+                continue
+    return size
+
+
+@dataclass
+class _Extraction:
+    path: str
+    temporary: bool
+    references: int = 0
+
+
+class ExtractionCache:
+    def __init__(self, cache_dir: str | Path | None = None, max_size: int | None = None):
+        """Process-wide cache of extracted FMU archives.
+
+        Extractions are keyed by the content hash and modification time of the FMU file,
+        so all instances of the same FMU share one unzip directory.
+
+        Without a cache directory, extractions live in temporary directories which are
+        reference counted and removed when the last instance using them is closed.
+        With a cache directory, extractions are kept on disk across processes and the
+        least recently used unreferenced ones are evicted once the total size of the
+        cache exceeds `max_size`.
+
+        Args:
+            cache_dir (optional): Directory to keep extractions in. Defaults to None.
+            max_size (optional): Maximum size of the cache directory in bytes. Defaults to None (unbounded).
+        """
+        self._lock = threading.Lock()
+        self._extractions: dict[str, _Extraction] = {}
+        self._keys: dict[str, str] = {}
+        self._cache_dir: Path | None = None
+        self._max_size: int | None = None
+        self.configure(cache_dir=cache_dir, max_size=max_size)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(cache_dir={self._cache_dir}, max_size={self._max_size})"
+
+    @property
+    def cache_dir(self) -> Path | None:
+        """Directory the extractions are kept in, None when using temporary directories."""
+        return self._cache_dir
+
+    @property
+    def max_size(self) -> int | None:
+        """Maximum size of the cache directory in bytes."""
+        return self._max_size
+
+    def configure(self, *, cache_dir: str | Path | None = None, max_size: int | None = None) -> ExtractionCache:
+        """Change where and how extractions are cached.
+
+        Extractions already in use keep their current location.
+
+        Args:
+            cache_dir (optional): Directory to keep extractions in. Defaults to None.
+            max_size (optional): Maximum size of the cache directory in bytes. Defaults to None (unbounded).
+
+        Returns:
+            The extraction cache.
+        """
+        if max_size is not None and max_size < 0:
+            msg = "The maximum cache size must be non-negative."
+            raise ValueError(msg)
+
+        with self._lock:
+            self._cache_dir = Path(cache_dir).resolve() if cache_dir is not None else None
+            self._max_size = max_size
+            if self._cache_dir is not None:
+                self._cache_dir.mkdir(parents=True, exist_ok=True)
+        return self
+
+    @staticmethod
+    def key(fmu_path: str | Path) -> str:
+        """Return the cache key of an FMU file."""
+        return f"{file_digest(fmu_path)}-{os.stat(fmu_path).st_mtime_ns}"
+
+    def acquire(self, fmu_path: str | Path) -> str:
+        """Return the unzip directory of an FMU, extracting it if needed.
+
+        Every call must be paired with a call to `release` once the directory is no longer used.
+
+        Args:
+            fmu_path: Path to the FMU file.
+
+        Returns:
+            Path to the directory containing the extracted FMU.
+        """
+        key = self.key(fmu_path)
+        with self._lock:
+            extraction = self._extractions.get(key)
+            if extraction is None:
+                extraction = _Extraction(path=self._extract(fmu_path, key), temporary=self._cache_dir is None)
+                self._extractions[key] = extraction
+                self._keys[extraction.path] = key
+            extraction.references += 1
+            if self._cache_dir is not None:
+                # Record the use for least recently used eviction
+                os.utime(extraction.path)
+            return extraction.path
+
+    def release(self, unzipdir: str) -> None:
+        """Release an unzip directory obtained from `acquire`.
+
+        Args:
+            unzipdir: Path returned by `acquire`.
+        """
+        with self._lock:
+            key = self._keys.get(unzipdir)
+            if key is None:
+                return
+            extraction = self._extractions[key]
+            extraction.references -= 1
+            if extraction.references > 0:
+                return
+
+            del self._extractions[key]
+            del self._keys[unzipdir]
+            if extraction.temporary:
+                shutil.rmtree(unzipdir, ignore_errors=True)
+            elif self._cache_dir is not None and self._max_size is not None:
+                self._evict()
+
+    def clear(self) -> None:
+        """Remove all unreferenced extractions from the cache directory."""
+        with self._lock:
+            if self._cache_dir is None:
+                return
+            in_use = set(self._keys)
+            for path in self._cache_dir.iterdir():
+                if str(path) not in in_use:
+                    shutil.rmtree(path, ignore_errors=True)
+
+    def _extract(self, fmu_path: str | Path, key: str) -> str:
+        if self._cache_dir is None:
+            return str(fmpy.extract(fmu_path))
+
+        unzipdir = self._cache_dir / key
+        if not unzipdir.exists():
+            # Extract next to the final location and move it in place atomically,
+            # so that concurrent processes never see a partially extracted FMU.
+            tmpdir = tempfile.mkdtemp(prefix=f".{key}-", dir=self._cache_dir)
+            fmpy.extract(fmu_path, unzipdir=tmpdir)
+            try:
+                os.rename(tmpdir, unzipdir)
+            except OSError:
+                # Another process extracted the same FMU in the meantime
+                shutil.rmtree(tmpdir, ignore_errors=True)
+            logger.debug(f"Extracted {fmu_path} to {unzipdir}.")
+        return str(unzipdir)
+
+    def _evict(self) -> None:
+        entries = []
+        total_size = 0
+        for path in self._cache_dir.iterdir():
+            if path.name.startswith("."):
+                continue
+            try:
+                last_used = path.stat().st_mtime
+            except OSError:
+                continue
+            size = _directory_size(path)
+            total_size += size
+            entries.append((last_used, str(path), size))
+
+        in_use = set(self._keys)
+        for _, path, size in sorted(entries):
+            if total_size <= self._max_size:
+                break
+            if path in in_use:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total_size -= size
+            logger.debug(f"Evicted {path} from the extraction cache.")
+
+
+@dataclass(frozen=True)
+class ParsedModelDescription:
+    model_description: ModelDescription
+    inputs: list[ScalarVariable]
+    outputs: list[ScalarVariable]
+    parameters: list[ScalarVariable]
+
+    @classmethod
+    def parse(cls, fmu_path: str | Path) -> ParsedModelDescription:
+        """Parse the model description of an FMU and derive its inputs, outputs and parameters."""
+        model_description = fmpy.read_model_description(str(fmu_path))
+        variables = model_description.modelVariables
+        return cls(
+            model_description=model_description,
+            inputs=[variable for variable in variables if variable.causality == "input"],
+            outputs=[variable for variable in variables if variable.causality == "output"],
+            parameters=[variable for variable in variables if variable.causality == "parameter"],
+        )
+
+
+class ModelDescriptionCache:
+    # Bumped whenever the layout of the cached entries changes
+    _FORMAT_VERSION = 1
+
+    def __init__(self, cache_dir: str | Path | None = None):
+        """Process-wide cache of parsed model descriptions.
+
+        Model descriptions are keyed by the content hash of the FMU file and kept in memory,
+        so FMU objects of the same file share one parsed model description. With a cache
+        directory, they are also pickled to disk, so that a new process loads a known FMU
+        without parsing its XML again. Loading a pickle can run arbitrary code, so only use a
+        directory that no other user can write to. Entries that belong to another user or that
+        other users can modify are ignored.
+
+        Args:
+            cache_dir (optional): Directory to keep parsed model descriptions in. Defaults to None (memory only).
+        """
+        self._lock = threading.Lock()
+        self._entries: dict[str, ParsedModelDescription] = {}
+        self._cache_dir: Path | None = None
+        self.configure(cache_dir=cache_dir)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(cache_dir={self._cache_dir})"
+
+    @property
+    def cache_dir(self) -> Path | None:
+        """Directory the parsed model descriptions are kept in, None when only cached in memory."""
+        return self._cache_dir
+
+    def configure(self, *, cache_dir: str | Path | None = None) -> ModelDescriptionCache:
+        """Change where parsed model descriptions are cached.
+
+        Args:
+            cache_dir (optional): Directory to keep parsed model descriptions in. Defaults to None (memory only).
+
+        Returns:
+            The model description cache.
+        """
+        with self._lock:
+            self._cache_dir = Path(cache_dir).resolve() if cache_dir is not None else None
+        return self
+
+    def get(self, fmu_path: str | Path) -> ParsedModelDescription:
+        """Return the parsed model description of an FMU, parsing it only if it is not cached.
+
+        The returned model description is shared and must not be modified.
+
+        Args:
+            fmu_path: Path to the FMU file.
+
+        Returns:
+            The model description with the inputs, outputs and parameters of the FMU.
+        """
+        digest = file_digest(fmu_path)
+        with self._lock:
+            entry = self._entries.get(digest)
+        if entry is not None:
+            return entry
+
+        entry = self._load(digest)
+        if entry is None:
+            entry = ParsedModelDescription.parse(fmu_path)
+            self._store(digest, entry)
+        with self._lock:
+            return self._entries.setdefault(digest, entry)
+
+    def clear(self) -> None:
+        """Remove all parsed model descriptions from memory and from the cache directory."""
+        with self._lock:
+            self._entries.clear()
+            if self._cache_dir is None or not self._cache_dir.exists():
+                return
+            for path in self._cache_dir.glob("*.pickle"):
+                path.unlink(missing_ok=True)
+
+    def _path(self, digest: str) -> Path | None:
+        if self._cache_dir is None:
+            return None
+        # Entries are only valid for the fmpy version that created them
+        return self._cache_dir / f"{digest}-v{self._FORMAT_VERSION}-fmpy{fmpy.__version__}.pickle"
+
+    def _load(self, digest: str) -> ParsedModelDescription | None:
+        path = self._path(digest)
+        if path is None or not path.exists():
+            return None
+        try:
+            if not _is_private(path):
+                logger.warning(f"Ignoring cached model description {path}, it can be modified by other users.")
+                return None
+            with open(path, "rb") as f:
+                entry = pickle.load(f)  # noqa: S301
+        except Exception as e:
+            logger.debug(f"Could not load cached model description {path}: {e}")
+            return None
+        return entry if isinstance(entry, ParsedModelDescription) else None
+
+    def _store(self, digest: str, entry: ParsedModelDescription) -> None:
+        path = self._path(digest)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write next to the final location and move it in place atomically,
+            # so that concurrent processes never read a partially written entry.
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{digest}-", dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"Could not cache model description in {path}: {e}")
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on a file, shared between processes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        if sys.platform == "win32":
+            import msvcrt  # noqa: PLC0415
+
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl  # noqa: PLC0415
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@cache
+def _compiler_id() -> str:
+    """Return the compiler fmpy uses for the current platform, including its version if available."""
+    compiler = "vc" if sys.platform == "win32" else "clang" if sys.platform == "darwin" else "gcc"
+    if compiler == "vc":
+        return compiler
+    try:
+        result = subprocess.run([compiler, "--version"], capture_output=True, text=True, check=True)  # noqa: S603
+    except (OSError, subprocess.CalledProcessError):
+        return compiler
+    lines = result.stdout.splitlines()
+    return f"{compiler} {lines[0]}" if lines else compiler
+
+
+def _compile_platform_binary() -> Callable[..., None]:
+    """Return the function of fmpy that compiles the binary of an FMU from its sources."""
+    import fmpy.util  # noqa: PLC0415
+
+    compile_platform_binary = getattr(fmpy.util, "compile_platform_binary", None)
+    if compile_platform_binary is None:
+        msg = (
+            "Recompiling FMUs requires fmpy.util.compile_platform_binary, which is available in "
+            f"fmpy 0.3.6 to 0.3.25, but fmpy {fmpy.__version__} is installed."
+        )
+        raise RuntimeError(msg)
+    return compile_platform_binary
+
+
+class BinaryCache:
+    def __init__(self, cache_dir: str | Path | None = None):
+        """Cache of FMUs recompiled for the current platform.
+
+        Compiled FMUs are keyed by the content hash of the source FMU, the platform, the compiler
+        and the compiler options.
+
+        Without a cache directory, FMUs are compiled into a private temporary directory that is
+        removed when the process exits. With a cache directory, compiled FMUs are shared between
+        processes, and a lock file per key makes sure that concurrent processes compile an FMU
+        only once. Compiled FMUs contain native code, so only use a directory that no other user
+        can write to. Compiled FMUs that belong to another user or that other users can modify
+        are compiled again.
+
+        Args:
+            cache_dir (optional): Directory to keep the compiled FMUs in. Defaults to None (temporary directory).
+        """
+        self._lock = threading.Lock()
+        self._cache_dir: Path | None = None
+        self._temporary_dir: tempfile.TemporaryDirectory | None = None
+        self.configure(cache_dir=cache_dir)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(cache_dir={self._cache_dir})"
+
+    @property
+    def cache_dir(self) -> Path | None:
+        """Directory the compiled FMUs are kept in, None when using a temporary directory."""
+        return self._cache_dir
+
+    def configure(self, *, cache_dir: str | Path | None = None) -> BinaryCache:
+        """Change where compiled FMUs are cached.
+
+        Args:
+            cache_dir (optional): Directory to keep the compiled FMUs in. Defaults to None (temporary directory).
+
+        Returns:
+            The binary cache.
+        """
+        with self._lock:
+            self._cache_dir = Path(cache_dir).resolve() if cache_dir is not None else None
+        return self
+
+    def _directory(self) -> Path:
+        if self._cache_dir is not None:
+            return self._cache_dir
+        if self._temporary_dir is None:
+            self._temporary_dir = tempfile.TemporaryDirectory(prefix="cosimtlk-binaries-")
+        return Path(self._temporary_dir.name)
+
+    def key(self, fmu_path: str | Path, compiler_options: str | None = None) -> str:
+        """Return the cache key of an FMU compiled on the current platform."""
+        toolchain = hashlib.sha256(f"{_compiler_id()}\0{compiler_options or ''}".encode()).hexdigest()[:16]
+        return f"{file_digest(fmu_path)}-{fmpy.platform}-{toolchain}"
+
+    def lookup(self, fmu_path: str | Path, compiler_options: str | None = None) -> Path | None:
+        """Return the compiled FMU if it is in the cache.
+
+        Args:
+            fmu_path: Path to the source FMU.
+            compiler_options (optional): Custom compiler options. Defaults to None.
+
+        Returns:
+            Path to the compiled FMU, or None if it has not been compiled yet.
+        """
+        with self._lock:
+            path = self._directory() / f"{self.key(fmu_path, compiler_options)}.fmu"
+        return path if self._is_usable(path) else None
+
+    def get(self, fmu_path: str | Path, compiler_options: str | None = None) -> Path:
+        """Return the FMU compiled for the current platform, compiling it if it is not cached.
+
+        Args:
+            fmu_path: Path to the source FMU.
+            compiler_options (optional): Custom compiler options. Defaults to None.
+
+        Returns:
+            Path to the compiled FMU.
+
+        Raises:
+            RuntimeError: If the installed fmpy cannot compile FMUs.
+        """
+        key = self.key(fmu_path, compiler_options)
+        with self._lock:
+            directory = self._directory()
+            path = directory / f"{key}.fmu"
+            if self._is_usable(path):
+                return path
+            compile_platform_binary = _compile_platform_binary()
+
+            with _file_lock(directory / f".{key}.lock"):
+                # Another process may have compiled the FMU while waiting for the lock
+                if self._is_usable(path):
+                    return path
+                fd, tmp_path = tempfile.mkstemp(prefix=f".{key}-", suffix=".fmu", dir=directory)
+                os.close(fd)
+                try:
+                    compile_platform_binary(
+                        str(fmu_path),
+                        output_filename=tmp_path,
+                        compiler_options=compiler_options,
+                    )
+                    os.replace(tmp_path, path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+        logger.info(f"Compiled {fmu_path} for platform {fmpy.platform} into {path}.")
+        return path
+
+    @staticmethod
+    def _is_usable(path: Path) -> bool:
+        if not path.exists():
+            return False
+        if not _is_private(path):
+            logger.warning(f"Ignoring compiled FMU {path}, it can be modified by other users.")
+            return False
+        return True
+
+    def clear(self) -> None:
+        """Remove all compiled FMUs from the cache directory."""
+        with self._lock:
+            directory = self._directory()
+            if not directory.exists():
+                return
+            for path in directory.glob("*.fmu"):
+                path.unlink(missing_ok=True)
+
+
+extraction_cache = ExtractionCache()
+# Parsed model descriptions are only kept on disk when COSIMTLK_CACHE_DIR is set
+model_description_cache = ModelDescriptionCache(cache_dir=_environment_cache_dir("model_descriptions"))
+# Compiled FMUs are only shared between processes when COSIMTLK_CACHE_DIR is set
+binary_cache = BinaryCache(cache_dir=_environment_cache_dir("binaries"))
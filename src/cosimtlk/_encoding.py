@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import Any
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# Media types used for MessagePack by other clients
+_MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+
+
+def msgpack_available() -> bool:
+    """Check if MessagePack can be used as wire format."""
+    try:
+        import msgpack  # noqa: F401, PLC0415
+    except ImportError:
+        return False
+    return True
+
+
+def is_msgpack(media_type: str | None) -> bool:
+    """Check if a Content-Type or Accept header asks for MessagePack.
+
+    Args:
+        media_type: Value of the header.
+
+    Returns:
+        True if any of the listed media types is MessagePack.
+    """
+    if not media_type:
+        return False
+    return any(part.split(";")[0].strip().lower() in _MSGPACK_MEDIA_TYPES for part in media_type.split(","))
+
+
+def pack(content: Any) -> bytes:
+    """Encode content as MessagePack."""
+    # msgpack is imported on first use, so that importing the client stays cheap
+    import msgpack  # noqa: PLC0415
+
+    return msgpack.packb(content, use_bin_type=True)
+
+
+def unpack(data: bytes) -> Any:
+    """Decode MessagePack content."""
+    import msgpack  # noqa: PLC0415
+
+    return msgpack.unpackb(data, raw=False)
@@ -1,23 +1,106 @@
 from __future__ import annotations
 
+import copy
 import logging
+import math
+import numbers
 import shutil
+import struct
+import threading
+import weakref
 from abc import ABCMeta, abstractmethod
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from ctypes import POINTER, c_double
 from functools import cached_property
 from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING, Any
 from uuid import uuid4
 
 import fmpy
-from fmpy.fmi2 import FMU2Slave
+import numpy as np
+from fmpy.fmi2 import _FMU2, FMU2Model, FMU2Slave, fmi2FMUstate
 from fmpy.model_description import ModelDescription, ScalarVariable
 
-from cosimtlk.client import SimulatorClient
+from cosimtlk._cache import ParsedModelDescription, binary_cache, extraction_cache, model_description_cache
+from cosimtlk._solvers import Solver, get_solver
+from cosimtlk._stats import InstanceStats, timed
+from cosimtlk._variables import VariableBatch, VariableGroup
 from cosimtlk.models import FMUCausaltyType, FMUInputType
 
+if TYPE_CHECKING:
+    from cosimtlk.client import AsyncSimulatorClient, SimulatorClient, SimulatorSession
+
 logger = logging.getLogger(__name__)
 
+# Number of write plans kept per instance for different sets of input names
+_MAX_INPUT_BATCHES = 16
+
+# FMI class and model description attribute of every supported interface
+_INTERFACES: dict[str, tuple[type[_FMU2], str]] = {
+    "CoSimulation": (FMU2Slave, "coSimulation"),
+    "ModelExchange": (FMU2Model, "modelExchange"),
+}
+
+
+# Lock of every loaded library, by unzip directory. Loading the same directory again returns the same library,
+# whose process-wide state, e.g. OpenModelica's memory pool, is shared by all its instances.
+_library_locks: weakref.WeakValueDictionary[str, threading.RLock] = weakref.WeakValueDictionary()
+_library_locks_lock = threading.Lock()
+
+
+def _library_lock(unzipdir: str) -> threading.RLock:
+    with _library_locks_lock:
+        lock = _library_locks.get(unzipdir)
+        if lock is None:
+            lock = _library_locks[unzipdir] = threading.RLock()
+        return lock
+
+
+# fmpy changes the working directory of the process while it loads a library, concurrent loads could leave
+# the process in the directory of a library
+_load_lock = threading.Lock()
+
+
+def _load_library(fmi_class: type[_FMU2], **kwargs) -> _FMU2:
+    with _load_lock:
+        return fmi_class(**kwargs)
+
+
+def _is_runtime_file(name: str) -> bool:
+    return not name.startswith(("sources/", "documentation/"))
+
+
+class _LockedFunction:
+    def __init__(self, function: Callable, lock: threading.RLock):
+        """FMI function which holds the lock of its library during every call."""
+        self._function = function
+        self._lock = lock
+
+    def __call__(self, *args):
+        with self._lock:
+            return self._function(*args)
+
+    def __getattr__(self, name: str) -> Any:
+        # fmpy reads the argument names and types of the functions to log and check the calls
+        return getattr(self._function, name)
+
+
+def _lock_functions(fmi: _FMU2, lock: threading.RLock) -> None:
+    functions = getattr(fmi, "_functions", None)
+    if functions is not None:
+        # fmpy 0.3.26 and newer call the FMI functions through a table
+        fmi._functions = {name: _LockedFunction(function, lock) for name, function in functions.items()}
+        return
+    for name, function in list(vars(fmi).items()):
+        if name.startswith("fmi2") and callable(function):
+            setattr(fmi, name, _LockedFunction(function, lock))
+
 
 class FMUInstanceBase(metaclass=ABCMeta):
+    # Call timings, only recorded once enabled
+    _stats: InstanceStats | None = None
+
     def __enter__(self):
         return self
 
@@ -47,6 +130,34 @@ class FMUInstanceBase(metaclass=ABCMeta):
     def step_size(self) -> int | float:
         raise NotImplementedError
 
+    @property
+    def stats_enabled(self) -> bool:
+        """Return whether call timings are recorded."""
+        return self._stats is not None
+
+    def enable_stats(self) -> None:
+        """Start recording the number and duration of the calls made on the instance."""
+        if self._stats is None:
+            self._stats = InstanceStats()
+
+    def disable_stats(self) -> None:
+        """Stop recording call timings and discard the recorded ones."""
+        self._stats = None
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Return the recorded call timings.
+
+        Returns:
+            For every operation, the number of calls, the total, mean, min and max duration in seconds
+            and a histogram of the durations per decade. Empty if recording is not enabled.
+        """
+        return self._stats.as_dict() if self._stats is not None else {}
+
+    def reset_stats(self) -> None:
+        """Discard the recorded call timings, recording continues if enabled."""
+        if self._stats is not None:
+            self._stats.clear()
+
     @property
     @abstractmethod
     def current_time(self) -> int | float:
@@ -86,35 +197,280 @@ class FMUInstanceBase(metaclass=ABCMeta):
     def change_parameters(self, parameters: dict[str, FMUInputType]) -> FMUInstanceBase:
         raise NotImplementedError
 
+    @abstractmethod
+    def simulate_trajectory(
+        self,
+        times: Sequence[int | float],
+        inputs: Mapping[str, Sequence[FMUInputType]] | None = None,
+    ) -> dict[str, np.ndarray]:
+        raise NotImplementedError
+
+
+class _SharedLibrary:
+    def __init__(self, fmu: FMU, interface: str = "CoSimulation"):
+        """Shared library of an FMU that is loaded once and shared by all its instances.
+
+        The library and the extracted FMU are released once the library is closed and
+        every slave created from it has been freed. Libraries may keep process-wide state,
+        so the FMI calls of all slaves of the same library, including instantiation and
+        freeing, hold `lock` and never run at the same time.
+
+        Args:
+            fmu: The FMU to load the shared library of.
+            interface (optional): FMI interface to load, "CoSimulation" or "ModelExchange".
+                Defaults to "CoSimulation".
+        """
+        self._lock = threading.Lock()
+        self._slaves = 0
+        self._closed = False
+
+        fmi_class, attribute = _INTERFACES[interface]
+        self.unzipdir = extraction_cache.acquire(fmu._fmu_path)
+        try:
+            self._template = _load_library(
+                fmi_class,
+                unzipDirectory=self.unzipdir,
+                guid=fmu.model_description.guid,
+                modelIdentifier=getattr(fmu.model_description, attribute).modelIdentifier,
+            )
+        except Exception:
+            extraction_cache.release(self.unzipdir)
+            raise
+        # Shared with the libraries of other FMU objects and interfaces loaded from the same directory
+        self.lock = _library_lock(self.unzipdir)
+        _lock_functions(self._template, self.lock)
+
+    def create_slave(self, instance_name: str) -> _FMU2:
+        """Create a new slave that uses the already loaded library."""
+        with self._lock:
+            if self._closed:
+                msg = "Cannot create a slave from a closed library."
+                raise RuntimeError(msg)
+            self._slaves += 1
+
+        # The copy shares the loaded library and its resolved FMI functions
+        slave = copy.copy(self._template)
+        slave.instanceName = instance_name
+        slave.component = None
+        slave.callbacks = None
+        return slave
+
+    def free_slave(self, slave: _FMU2) -> None:
+        """Free the FMI instance of a slave without unloading the shared library."""
+        try:
+            if slave.component is not None:
+                slave.fmi2FreeInstance(slave.component)
+                slave.component = None
+        finally:
+            with self._lock:
+                self._slaves -= 1
+                unload = self._closed and self._slaves == 0
+            if unload:
+                self._unload()
+
+    def close(self) -> None:
+        """Unload the library once all slaves created from it are freed."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            unload = self._slaves == 0
+        if unload:
+            self._unload()
+
+    def _unload(self) -> None:
+        try:
+            self._template.freeLibrary()
+        finally:
+            extraction_cache.release(self.unzipdir)
+
+
+# Serialized snapshots start with a magic, the format version and the length of the GUID
+_SNAPSHOT_MAGIC = b"CSTKSNAP"
+_SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<8sBH")
+# Times are stored with their type, "q" for integers and "d" for floats
+_SNAPSHOT_NUMBER_SIZE = 9
+_SNAPSHOT_STATE_LENGTH = struct.Struct("<Q")
+
+
+def _pack_number(value: int | float) -> bytes:
+    if isinstance(value, numbers.Integral):
+        return struct.pack("<cq", b"q", int(value))
+    return struct.pack("<cd", b"d", float(value))
+
+
+def _unpack_number(data: bytes, offset: int) -> int | float:
+    kind = data[offset : offset + 1]
+    if kind not in (b"q", b"d"):
+        msg = f"Invalid number type: {kind!r}."
+        raise ValueError(msg)
+    return struct.unpack_from(f"<{kind.decode()}", data, offset + 1)[0]
+
+
+class FMUSnapshot:
+    def __init__(
+        self,
+        *,
+        guid: str,
+        current_time: int | float,
+        step_size: int | float,
+        state: fmi2FMUstate | None = None,
+        owner: FMUInstance | None = None,
+        data: bytes | None = None,
+    ):
+        """Saved internal state of an FMU instance.
+
+        Snapshots taken with `FMUInstance.snapshot` hold a handle to the state inside the
+        FMU instance that created them. Snapshots created from bytes hold the serialized
+        state instead, and can be restored into any instance of the same model.
+
+        Args:
+            guid: GUID of the model the state belongs to.
+            current_time: Simulation time of the state.
+            step_size: Step size of the instance at the time of the snapshot.
+            state (optional): Handle to the state inside the owner instance. Defaults to None.
+            owner (optional): Instance that holds the state. Defaults to None.
+            data (optional): Serialized state. Defaults to None.
+        """
+        self.guid = guid
+        self.current_time = current_time
+        self.step_size = step_size
+        self._state = state
+        self._owner = owner
+        self._data = data
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(current_time={self.current_time}, step_size={self.step_size})"
+
+    def __reduce__(self):
+        return self.__class__.from_bytes, (self.to_bytes(),)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the snapshot so that it can be restored in another process.
+
+        Returns:
+            The serialized snapshot.
+        """
+        if self._data is None:
+            if self._owner is None or self._state is None:
+                msg = "Cannot serialize a released snapshot."
+                raise RuntimeError(msg)
+            self._data = self._owner._serialize_state(self._state)
+        guid = self.guid.encode("utf-8")
+        return b"".join(
+            (
+                _SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, len(guid)),
+                guid,
+                _pack_number(self.current_time),
+                _pack_number(self.step_size),
+                _SNAPSHOT_STATE_LENGTH.pack(len(self._data)),
+                self._data,
+            )
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> FMUSnapshot:
+        """Create a snapshot from the result of `to_bytes`.
+
+        Args:
+            data: The serialized snapshot.
+
+        Returns:
+            The snapshot.
+
+        Raises:
+            ValueError: If the data is not a serialized snapshot.
+        """
+        data = bytes(data)
+        try:
+            magic, version, guid_length = _SNAPSHOT_HEADER.unpack_from(data)
+            if magic != _SNAPSHOT_MAGIC or version != _SNAPSHOT_VERSION:
+                msg = "Unknown snapshot format."
+                raise ValueError(msg)
+            offset = _SNAPSHOT_HEADER.size
+            guid = data[offset : offset + guid_length].decode("utf-8")
+            offset += guid_length
+            current_time = _unpack_number(data, offset)
+            step_size = _unpack_number(data, offset + _SNAPSHOT_NUMBER_SIZE)
+            offset += 2 * _SNAPSHOT_NUMBER_SIZE
+            (state_length,) = _SNAPSHOT_STATE_LENGTH.unpack_from(data, offset)
+            offset += _SNAPSHOT_STATE_LENGTH.size
+            if len(guid.encode("utf-8")) != guid_length or len(data) != offset + state_length:
+                msg = "Truncated or oversized snapshot."
+                raise ValueError(msg)
+        except (struct.error, UnicodeDecodeError, ValueError) as e:
+            msg = f"Invalid snapshot data: {e}"
+            raise ValueError(msg) from None
+        return cls(guid=guid, current_time=current_time, step_size=step_size, data=data[offset:])
+
 
 class FMUInstance(FMUInstanceBase):
+    # FMI interface the instance simulates through
+    _interface = "CoSimulation"
+    # Closing an instance that failed to instantiate is a no-op
+    _initialized = False
+    _terminated = True
+
     def __init__(
         self,
         fmu: FMU,
         start_time: int | float,
         step_size: int | float,
         start_values: dict[str, FMUInputType],
+        *,
+        advance_step_size: int | float | None = None,
+        outputs: Sequence[str] | None = None,
+        stats: bool = False,
     ):
+        if stats:
+            self.enable_stats()
+        created_at = perf_counter()
         self._fmu = fmu
         self._current_time = start_time
         self._step_size = step_size
-
-        self._unzipdir = fmpy.extract(self._fmu._fmu_path)
-        self._instance = FMU2Slave(
-            unzipDirectory=self._unzipdir,
-            guid=self._fmu.model_description.guid,
-            instanceName=str(uuid4()),
-            modelIdentifier=self._fmu.model_description.coSimulation.modelIdentifier,
-        )
+        fmi_class, attribute = _INTERFACES[self._interface]
+        self._capabilities = getattr(self._fmu.model_description, attribute)
+        if self._capabilities is None:
+            msg = f"The FMU does not support {self._interface}."
+            raise ValueError(msg)
+        # Only models that can handle variable communication step sizes take coarser steps in advance()
+        if not getattr(self._capabilities, "canHandleVariableCommunicationStepSize", True):
+            advance_step_size = None
+        self._advance_step_size = advance_step_size
+
+        self._library = self._fmu._shared_library(self._interface)
+        if self._library is not None:
+            self._unzipdir = self._library.unzipdir
+            self._instance = self._library.create_slave(instance_name=str(uuid4()))
+        else:
+            # Load a private copy of the library, whose state is not shared with any other instance. The
+            # sources and documentation are left out of its extraction, they are not needed to run the model.
+            self._unzipdir = str(fmpy.extract(self._fmu._fmu_path, include=_is_runtime_file))
+            self._instance = _load_library(
+                fmi_class,
+                unzipDirectory=self._unzipdir,
+                guid=self._fmu.model_description.guid,
+                instanceName=str(uuid4()),
+                modelIdentifier=self._capabilities.modelIdentifier,
+            )
         # Instantiate FMU
         self._initialized = True
         self._terminated = False
+        self._snapshots: set[FMUSnapshot] = set()
 
         self._instance.instantiate(visible=False, callbacks=None, loggingOn=False)
         self._initialize(start_values=start_values)
 
         # Input dict
         self._input_map: dict[str, ScalarVariable] = {input_.name: input_ for input_ in self._fmu.inputs}
+        # Write plans of recently used sets of input names
+        self._input_batches: dict[tuple[str, ...], VariableBatch] = {}
+        # Read plan of all model variables, compiled on the first parameter change
+        self._variable_batch: VariableBatch | None = None
+
+        # Outputs read after every step, all outputs of the model unless a subset was selected
+        self._outputs = self._fmu._select_outputs(outputs)
 
         # Create maps for faster read of outputs
         self._output_names: dict[str, list[str]] = {
@@ -129,15 +485,25 @@ class FMUInstance(FMUInstanceBase):
             "Boolean": [],
             "String": [],
         }
-        for output in self._fmu.outputs:
+        for output in self._outputs:
             self._output_names[output.type].append(output.name)
             self._output_refs[output.type].append(output.valueReference)
 
+        # Precompiled numeric outputs for reading into arrays
+        self._output_batch = VariableBatch([output for output in self._outputs if output.type != "String"])
+        self._output_columns = {name: column for column, name in enumerate(self._output_batch.names)}
+        self._string_output_batch = VariableBatch([output for output in self._outputs if output.type == "String"])
+        if self._stats is not None:
+            self._stats.record("instantiate", perf_counter() - created_at)
+
+    @timed("initialize")
     def _initialize(self, start_values: dict[str, FMUInputType]) -> None:
         self._instance.setupExperiment(startTime=self._current_time)
         self._instance.enterInitializationMode()
         fmpy.simulation.apply_start_values(self._instance, self._fmu.model_description, start_values=start_values or {})
         self._instance.exitInitializationMode()
+        # Last written value of every input, writes of unchanged values are skipped
+        self._input_shadow: dict[str, FMUInputType] = {}
         self._initialized = True
         self._terminated = False
 
@@ -158,6 +524,16 @@ class FMUInstance(FMUInstanceBase):
         """Return the current time of the FMU."""
         return self._current_time
 
+    @property
+    def output_names(self) -> tuple[str, ...]:
+        """Return the names of the outputs read after every step."""
+        return tuple(output.name for output in self._outputs)
+
+    @property
+    def advance_step_size(self) -> int | float | None:
+        """Return the largest communication step used by advance(), None when stepping with the step size."""
+        return self._advance_step_size
+
     def _terminate(self):
         if not self._terminated:
             self._instance.terminate()
@@ -168,14 +544,20 @@ class FMUInstance(FMUInstanceBase):
         """Closes the FMU."""
         self._terminate()
         if self.is_initialized:
+            self.release_snapshots()
             try:
-                self._instance.freeInstance()
+                if self._library is not None:
+                    self._library.free_slave(self._instance)
+                else:
+                    self._instance.freeInstance()
             except Exception as e:
                 logger.error("Could not free FMU instance.")
                 logger.exception(e)
-            shutil.rmtree(self._unzipdir, ignore_errors=True)
+            if self._library is None:
+                shutil.rmtree(self._unzipdir, ignore_errors=True)
         self._initialized = False
 
+    @timed("reset")
     def reset(
         self,
         *,
@@ -199,6 +581,7 @@ class FMUInstance(FMUInstanceBase):
         self._initialize(start_values=start_values)
         return self
 
+    @timed("step")
     def step(self, *, input_values: dict[str, FMUInputType] | None = None) -> dict[str, FMUInputType]:
         """Do a single step of the FMU.
 
@@ -215,6 +598,7 @@ class FMUInstance(FMUInstanceBase):
         outputs = self.read_outputs()
         return outputs
 
+    @timed("advance")
     def advance(self, until: int, *, input_values: dict[str, FMUInputType] | None = None) -> dict[str, FMUInputType]:
         """Advance the FMU until a given time.
 
@@ -227,72 +611,190 @@ class FMUInstance(FMUInstanceBase):
         """
         self.check_is_initialized(msg="Cannot call advance() on an uninitialized fmu.")
 
+        self._advance(until, input_values=input_values)
+        outputs = self.read_outputs()
+        return outputs
+
+    @timed("step")
+    def step_array(
+        self,
+        *,
+        input_values: dict[str, FMUInputType] | None = None,
+        out: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Do a single step of the FMU and read its numeric outputs into an array.
+
+        Args:
+            input_values (optional): Input values for the step. Defaults to None.
+            out (optional): Preallocated array to read the outputs into. Defaults to None.
+
+        Returns:
+            The numeric outputs of the FMU, see `output_columns`.
+        """
+        self.check_is_initialized(msg="Cannot call step_array() on an uninitialized fmu.")
+
+        self.set_inputs(input_values or {})
+        self._do_step()
+        return self.read_outputs_array(out)
+
+    @timed("advance")
+    def advance_array(
+        self,
+        until: int,
+        *,
+        input_values: dict[str, FMUInputType] | None = None,
+        out: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Advance the FMU until a given time and read its numeric outputs into an array.
+
+        Args:
+            until: Time to advance to.
+            input_values (optional): Input values for the advance. Defaults to None.
+            out (optional): Preallocated array to read the outputs into. Defaults to None.
+
+        Returns:
+            The numeric outputs of the FMU, see `output_columns`.
+        """
+        self.check_is_initialized(msg="Cannot call advance_array() on an uninitialized fmu.")
+
+        self._advance(until, input_values=input_values)
+        return self.read_outputs_array(out)
+
+    @timed("simulate_trajectory")
+    def simulate_trajectory(
+        self,
+        times: Sequence[int | float],
+        inputs: Mapping[str, Sequence[FMUInputType]] | None = None,
+    ) -> dict[str, np.ndarray]:
+        """Simulate the FMU along a sequence of communication points.
+
+        For every communication point the inputs of that row are set, the FMU is advanced to
+        the point and its outputs are recorded, as repeated calls to `advance` would do.
+
+        Args:
+            times: Increasing times to advance to.
+            inputs (optional): Input time series with one value per time, keyed by input name.
+                A DataFrame with one column per input can be used as well. Defaults to None.
+
+        Returns:
+            The outputs at every time, keyed by output name, including the `current_time`.
+        """
+        self.check_is_initialized(msg="Cannot call simulate_trajectory() on an uninitialized fmu.")
+
+        times = np.asarray(times)
+        inputs = inputs if inputs is not None else {}
+        input_names = list(inputs.keys())
+        input_columns = [np.asarray(inputs[name]).tolist() for name in input_names]
+        for name, column in zip(input_names, input_columns, strict=True):
+            if len(column) != len(times):
+                msg = f"Input '{name}' has {len(column)} values but {len(times)} times were given."
+                raise ValueError(msg)
+
+        input_batch = VariableBatch([self._input_map[name] for name in input_names])
+        input_rows = list(zip(*input_columns, strict=True))
+
+        current_times = np.empty(len(times), dtype=np.result_type(times, type(self._step_size)))
+        numeric_outputs = np.empty((len(times), len(self._output_batch)), dtype=np.float64)
+        string_outputs = []
+        self._invalidate_inputs(input_names)
+        for k, until in enumerate(times.tolist()):
+            if input_rows:
+                self._write_variables(input_batch, input_rows[k])
+            self._advance(until, input_values=None)
+            current_times[k] = self._current_time
+            self._output_batch.read_into(self._instance, numeric_outputs[k])
+            if len(self._string_output_batch):
+                string_outputs.append(self._string_output_batch.read(self._instance))
+
+        trajectory = {"current_time": current_times}
+        for name, column in self._output_columns.items():
+            trajectory[name] = numeric_outputs[:, column]
+        for name, column in zip(self._string_output_batch.names, zip(*string_outputs, strict=True), strict=False):
+            trajectory[name] = np.asarray(column, dtype=object)
+        return trajectory
+
+    def _write_variables(self, batch: VariableBatch, values: Sequence[FMUInputType]) -> None:
+        batch.write(self._instance, values)
+
+    def _advance(self, until: int, input_values: dict[str, FMUInputType] | None) -> None:
         if until < self._current_time:
             msg = "Cannot advance time to a time in the past."
             raise ValueError(msg)
 
         self.set_inputs(input_values or {})
 
-        while self._current_time < until:
-            self._do_step()
+        if self._advance_step_size is None:
+            while self._current_time < until:
+                self._do_step()
+            return
 
-        outputs = self.read_outputs()
-        return outputs
+        # Take the same number of steps as fixed stepping would, but with fewer doStep calls
+        end_time, steps = self._current_time, 0
+        while end_time < until:
+            end_time += self._step_size
+            steps += 1
+
+        if math.isinf(self._advance_step_size):
+            steps_per_call = steps
+        else:
+            steps_per_call = max(1, int(self._advance_step_size // self._step_size))
+
+        while steps > 0:
+            call_steps = min(steps, steps_per_call)
+            self._do_step(call_steps * self._step_size)
+            steps -= call_steps
+        self._current_time = end_time
 
-    def _do_step(self):
+    @timed("do_step")
+    def _do_step(self, step_size: int | float | None = None):
+        step_size = self._step_size if step_size is None else step_size
         self._instance.doStep(
             currentCommunicationPoint=self._current_time,
-            communicationStepSize=self._step_size,
+            communicationStepSize=step_size,
         )
-        self._current_time += self._step_size
+        self._current_time += step_size
 
+    @timed("set_inputs")
     def set_inputs(self, values: dict[str, FMUInputType]) -> None:
         """Sets the inputs of the FMU.
 
+        Only the inputs whose value changed since they were last written are passed to the FMU.
+
         Args:
             values: Input values to set. Keys are the names of the FMU inputs.
         """
         self.check_is_initialized(msg="Cannot set inputs on an uninitialized FMU.")
+        if not values:
+            return
+
+        shadow = self._input_shadow
+        changed = [name not in shadow or shadow[name] != value for name, value in values.items()]
+        if not any(changed):
+            return
+
+        # The plan covers every given input, so changing a different subset of them reuses it
+        names = tuple(values)
+        batch = self._input_batches.get(names)
+        if batch is None:
+            if len(self._input_batches) >= _MAX_INPUT_BATCHES:
+                self._input_batches.clear()
+            batch = self._input_batches[names] = VariableBatch([self._input_map[name] for name in names])
+        batch.write(self._instance, tuple(values.values()), changed=None if all(changed) else changed)
+        shadow.update(values)
+
+    def _invalidate_inputs(self, names: Iterable[str] | None = None) -> None:
+        """Forget the last written values of inputs written by other means than `set_inputs`.
 
-        for input_name, input_value in values.items():
-            input_ = self._input_map[input_name]
-            self._write_variable(input_, input_value)
-
-    def _write_variable(self, variable: ScalarVariable, value: FMUInputType) -> None:
-        variable_type = variable.type
-        variable_reference = variable.valueReference
-
-        if variable_type == "Real":
-            self._instance.setReal([variable_reference], [float(value)])
-        elif variable_type == "Integer":
-            self._instance.setInteger([variable_reference], [int(value)])
-        elif variable_type == "Boolean":
-            self._instance.setBoolean([variable_reference], [bool(value)])
-        elif variable_type == "String":
-            self._instance.setString([variable_reference], [str(value)])
-        elif variable_type == "Enumeration":
-            self._instance.setInteger([variable_reference], [int(value)])
-        else:
-            msg = f"Unknown variable type '{variable_type}' for variable '{variable.name}'."
-            raise ValueError(msg)
-
-    def _read_variable(self, variable: ScalarVariable) -> FMUInputType:
-        variable_type = variable.type
-        variable_reference = variable.valueReference
-
-        if variable_type == "Real":
-            return self._instance.getReal([variable_reference])[0]
-        elif variable_type == "Integer":
-            return self._instance.getInteger([variable_reference])[0]
-        elif variable_type == "Boolean":
-            return self._instance.getBoolean([variable_reference])[0]
-        elif variable_type == "String":
-            return self._instance.getString([variable_reference])[0]
-        elif variable_type == "Enumeration":
-            return self._instance.getInteger([variable_reference])[0]
-        msg = f"Unknown variable type '{variable_type}' for variable '{variable.name}'."
-        raise ValueError(msg)
+        Args:
+            names (optional): Names of the variables that were written. Defaults to None (all inputs).
+        """
+        if names is None:
+            self._input_shadow.clear()
+            return
+        for name in names:
+            self._input_shadow.pop(name, None)
 
+    @timed("read_outputs")
     def read_outputs(self) -> dict[str, FMUInputType]:
         """Read the outputs of the FMU.
 
@@ -320,44 +822,478 @@ class FMUInstance(FMUInstanceBase):
             outputs.update(dict(zip(self._output_names["String"], string_outputs, strict=True)))
         return outputs
 
+    @property
+    def output_columns(self) -> dict[str, int]:
+        """Return the column of each numeric output in the arrays returned by `read_outputs_array`."""
+        return dict(self._output_columns)
+
+    @timed("read_outputs")
+    def read_outputs_array(self, out: np.ndarray | None = None) -> np.ndarray:
+        """Read the numeric outputs of the FMU into an array.
+
+        String outputs are not included, and the current time is available as `current_time`.
+        Passing the same preallocated array on every call avoids any allocation per output.
+
+        Args:
+            out (optional): Float array with one element per numeric output to read the outputs into.
+                Defaults to None, which allocates a new array.
+
+        Returns:
+            The numeric outputs of the FMU, see `output_columns`.
+        """
+        self.check_is_initialized(msg="Cannot read outputs on an uninitialized FMU.")
+
+        if out is None:
+            out = np.empty(len(self._output_batch), dtype=np.float64)
+        return self._output_batch.read_into(self._instance, out)
+
+    @timed("read_outputs")
+    def read_string_outputs(self) -> tuple[str, ...]:
+        """Read the string outputs of the FMU, which `read_outputs_array` leaves out.
+
+        Returns:
+            The string outputs of the FMU, in the order of `output_names`.
+        """
+        self.check_is_initialized(msg="Cannot read outputs on an uninitialized FMU.")
+
+        if not len(self._string_output_batch):
+            return ()
+        return tuple(self._string_output_batch.read(self._instance))
+
+    def bind(self, names: Sequence[str]) -> VariableGroup:
+        """Bind a group of variables for batched reads and writes.
+
+        Any variable of the model can be bound, e.g. local variables to monitor or parameters to tune.
+
+        Args:
+            names: Names of the variables.
+
+        Returns:
+            A handle reading and writing the variables with one FMI call per variable type.
+        """
+        variables = self._fmu.variables
+        unknown = [name for name in names if name not in variables]
+        if unknown:
+            msg = f"Unknown variables: {', '.join(unknown)}."
+            raise KeyError(msg)
+        return VariableGroup(self, [variables[name] for name in names])
+
+    def _check_capability(self, capability: str, msg: str) -> None:
+        if not getattr(self._capabilities, capability):
+            raise RuntimeError(msg)
+
+    def snapshot(self) -> FMUSnapshot:
+        """Save the internal state of the FMU.
+
+        The snapshot stays valid until it is released or the instance is closed.
+
+        Returns:
+            The snapshot of the current state.
+        """
+        self.check_is_initialized(msg="Cannot take a snapshot of an uninitialized FMU.")
+        self._check_capability("canGetAndSetFMUstate", msg="The FMU does not support getting and setting its state.")
+
+        snapshot = FMUSnapshot(
+            guid=self._fmu.model_description.guid,
+            current_time=self._current_time,
+            step_size=self._step_size,
+            state=self._instance.getFMUstate(),
+            owner=self,
+        )
+        self._snapshots.add(snapshot)
+        return snapshot
+
+    def restore(self, snapshot: FMUSnapshot) -> FMUInstance:
+        """Restore the internal state of the FMU from a snapshot.
+
+        The same snapshot can be restored any number of times.
+
+        Args:
+            snapshot: Snapshot taken from this instance, or created from bytes of the same model.
+
+        Returns:
+            The FMU instance.
+        """
+        self.check_is_initialized(msg="Cannot restore a snapshot into an uninitialized FMU.")
+        self._check_capability("canGetAndSetFMUstate", msg="The FMU does not support getting and setting its state.")
+        if snapshot.guid != self._fmu.model_description.guid:
+            msg = "Cannot restore a snapshot of a different model."
+            raise ValueError(msg)
+
+        if snapshot._owner is self and snapshot._state is not None:
+            self._instance.setFMUstate(snapshot._state)
+        elif snapshot._data is not None:
+            self._check_capability("canSerializeFMUstate", msg="The FMU does not support serializing its state.")
+            state = self._instance.deSerializeFMUstate(snapshot._data)
+            try:
+                self._instance.setFMUstate(state)
+            finally:
+                self._instance.freeFMUstate(state)
+        else:
+            msg = "Cannot restore a snapshot that was released or taken from another instance."
+            raise ValueError(msg)
+
+        self._current_time = snapshot.current_time
+        self._step_size = snapshot.step_size
+        self._terminated = False
+        self._invalidate_inputs()
+        return self
+
+    def release(self, snapshot: FMUSnapshot) -> None:
+        """Free the state held by a snapshot of this instance.
+
+        Serialized data of the snapshot remains usable.
+
+        Args:
+            snapshot: Snapshot taken from this instance.
+        """
+        if snapshot._owner is not self or snapshot._state is None:
+            return
+        try:
+            self._instance.freeFMUstate(snapshot._state)
+        finally:
+            snapshot._state = None
+            snapshot._owner = None
+            self._snapshots.discard(snapshot)
+
+    def release_snapshots(self) -> None:
+        """Free the states held by all snapshots of this instance."""
+        for snapshot in list(self._snapshots):
+            self.release(snapshot)
+
+    def fork(self) -> FMUInstance:
+        """Create a new instance of the FMU in the same state as this one.
+
+        Returns:
+            The new FMU instance.
+        """
+        self._check_capability("canSerializeFMUstate", msg="The FMU does not support serializing its state.")
+        snapshot = self.snapshot()
+        try:
+            snapshot.to_bytes()
+        finally:
+            self.release(snapshot)
+
+        fork = self._fmu.instantiate(
+            start_time=self._current_time,
+            step_size=self._step_size,
+            start_values={},
+            advance_step_size=self._advance_step_size,
+            outputs=self.output_names,
+            stats=self.stats_enabled,
+            **self._fork_options(),
+        )
+        return fork.restore(snapshot)
+
+    def _fork_options(self) -> dict[str, Any]:
+        return {"interface": self._interface}
+
+    def _serialize_state(self, state: fmi2FMUstate) -> bytes:
+        self.check_is_initialized(msg="Cannot serialize the state of an uninitialized FMU.")
+        self._check_capability("canSerializeFMUstate", msg="The FMU does not support serializing its state.")
+        return self._instance.serializeFMUstate(state)
+
+    @timed("change_parameters")
     def change_parameters(self, parameters: dict[str, FMUInputType]) -> FMUInstance:
         """Change the parameters of the FMU.
 
+        Tunable parameters are written directly into the running simulation. Changing any other
+        parameter re-initializes the FMU, carrying over the values of all variables.
+
         Args:
             parameters: Parameters to change. Keys are the names of the FMU parameters.
 
         Returns:
             The FMU instance.
         """
-        start_values = {
-            variable.name: self._read_variable(variable) for variable in self._fmu.model_description.modelVariables
-        }
+        variables = self._fmu.variables
+        if all(name in variables and variables[name].variability == "tunable" for name in parameters):
+            if parameters:
+                batch = VariableBatch([variables[name] for name in parameters])
+                batch.write(self._instance, tuple(parameters.values()))
+            return self
+
+        if self._variable_batch is None:
+            self._variable_batch = VariableBatch(self._fmu.model_description.modelVariables)
+        start_values = dict(zip(self._variable_batch.names, self._variable_batch.read(self._instance), strict=True))
         start_values.update(parameters)
         self.reset(start_values=start_values, start_time=self._current_time, step_size=self._step_size)
         return self
 
 
+class ModelExchangeFMUInstance(FMUInstance):
+    _interface = "ModelExchange"
+
+    def __init__(
+        self,
+        fmu: FMU,
+        start_time: int | float,
+        step_size: int | float,
+        start_values: dict[str, FMUInputType],
+        *,
+        solver: str | Solver = "rk45",
+        advance_step_size: int | float | None = None,
+        outputs: Sequence[str] | None = None,
+        stats: bool = False,
+    ):
+        """Instance of a Model Exchange FMU, integrated by a solver of this package.
+
+        The continuous states are exchanged with the model as NumPy arrays. Time events, state
+        events located from sign changes of the event indicators, and step events are handled
+        between the solver steps. Adaptive solvers can cover a long `advance` with few steps
+        while the dynamics are slow, e.g. with `advance_step_size=math.inf`.
+
+        Args:
+            fmu: The FMU to instantiate.
+            start_time: Start time of the simulation.
+            step_size: Step size of the simulation.
+            start_values: Start values of the simulation.
+            solver (optional): Solver of the continuous states, "euler", "rk45" or a `Solver`.
+                Defaults to "rk45".
+            advance_step_size (optional): Largest interval integrated at once by advance().
+                Defaults to None, which integrates one step size at a time.
+            outputs (optional): Names of the outputs to read after every step. Defaults to None (all outputs).
+            stats (optional): Record the number and duration of the calls made on the instance. Defaults to False.
+        """
+        self._solver = get_solver(solver)
+        self._nx = fmu.model_description.numberOfContinuousStates
+        self._nz = fmu.model_description.numberOfEventIndicators
+        # Buffers exchanged with the model, and the states and event indicators at the current time
+        self._x_buffer = np.zeros(self._nx, dtype=np.float64)
+        self._x_pointer = self._x_buffer.ctypes.data_as(POINTER(c_double))
+        self._x = np.zeros(self._nx, dtype=np.float64)
+        self._z = np.zeros(self._nz, dtype=np.float64)
+        self._h: float | None = None
+        self._next_event_time: float | None = None
+        super().__init__(
+            fmu,
+            start_time=start_time,
+            step_size=step_size,
+            start_values=start_values,
+            advance_step_size=advance_step_size,
+            outputs=outputs,
+            stats=stats,
+        )
+
+    @property
+    def solver(self) -> Solver:
+        """Return the solver of the continuous states."""
+        return self._solver
+
+    def _initialize(self, start_values: dict[str, FMUInputType]) -> None:
+        super()._initialize(start_values)
+        # The model leaves initialization in event mode
+        self._update_discrete_states()
+        self._instance.enterContinuousTimeMode()
+        self._read_continuous_states()
+
+    def _read_continuous_states(self) -> None:
+        if self._nx:
+            self._instance.getContinuousStates(self._x_pointer, self._nx)
+            self._x = self._x_buffer.copy()
+        self._z = self._event_indicators()
+        self._h = None
+
+    def _event_indicators(self) -> np.ndarray:
+        z = np.empty(self._nz, dtype=np.float64)
+        if self._nz:
+            self._instance.getEventIndicators(z.ctypes.data_as(POINTER(c_double)), self._nz)
+        return z
+
+    def _rhs(self, t: float, x: np.ndarray) -> np.ndarray:
+        self._set_continuous_states(t, x)
+        dx = np.empty(self._nx, dtype=np.float64)
+        self._instance.getDerivatives(dx.ctypes.data_as(POINTER(c_double)), self._nx)
+        return dx
+
+    def _set_continuous_states(self, t: float, x: np.ndarray) -> None:
+        self._instance.setTime(t)
+        if self._nx:
+            self._x_buffer[:] = x
+            self._instance.setContinuousStates(self._x_pointer, self._nx)
+
+    def _update_discrete_states(self) -> None:
+        while True:
+            new_discrete_states_needed, terminate, _, _, next_event_time_defined, next_event_time = (
+                self._instance.newDiscreteStates()
+            )
+            if terminate:
+                msg = "The FMU requested to terminate the simulation."
+                raise RuntimeError(msg)
+            if not new_discrete_states_needed:
+                break
+        self._next_event_time = next_event_time if next_event_time_defined else None
+
+    def _handle_event(self) -> None:
+        self._instance.enterEventMode()
+        self._update_discrete_states()
+        self._instance.enterContinuousTimeMode()
+        self._read_continuous_states()
+
+    def _integrate(self, t: float, x: np.ndarray, h: float | None, t_end: float) -> tuple[float, np.ndarray, float]:
+        if not self._nx:
+            return t_end, x, t_end - t
+        return self._solver.step(self._rhs, t, x, h, t_end)
+
+    @timed("do_step")
+    def _do_step(self, step_size: int | float | None = None):
+        step_size = self._step_size if step_size is None else step_size
+        t, t_end = float(self._current_time), float(self._current_time + step_size)
+        # Inputs may have changed since the last step
+        self._z = self._event_indicators()
+        while t < t_end:
+            t_stop = t_end
+            if self._next_event_time is not None and t < self._next_event_time < t_end:
+                t_stop = self._next_event_time
+
+            t_new, x_new, h = self._integrate(t, self._x, self._h, t_stop)
+            self._set_continuous_states(t_new, x_new)
+
+            z_new = self._event_indicators()
+            crossed = (self._z > 0) != (z_new > 0)
+            state_event = bool(crossed.any())
+            if state_event:
+                # Locate the first crossing by linear interpolation and integrate up to it instead
+                fractions = self._z[crossed] / (self._z[crossed] - z_new[crossed])
+                # A crossing located at the start of the step still takes the smallest step possible
+                t_event = max(t + float(fractions.min()) * (t_new - t), math.nextafter(t, t_new))
+                t_new, x_new, h = t, self._x, self._h
+                while t_new < t_event:
+                    t_new, x_new, h = self._integrate(t_new, x_new, h, t_event)
+                self._set_continuous_states(t_new, x_new)
+                z_new = self._event_indicators()
+
+            step_event, terminate = self._instance.completedIntegratorStep()
+            if terminate:
+                msg = "The FMU requested to terminate the simulation."
+                raise RuntimeError(msg)
+            t, self._x, self._z, self._h = t_new, x_new, z_new, h
+
+            time_event = self._next_event_time is not None and t >= self._next_event_time
+            if state_event or step_event or time_event:
+                self._handle_event()
+        self._current_time += step_size
+
+    def set_inputs(self, values: dict[str, FMUInputType]) -> None:
+        """Sets the inputs of the FMU.
+
+        Discrete inputs can only change in event mode, so changing them triggers an event.
+
+        Args:
+            values: Input values to set. Keys are the names of the FMU inputs.
+        """
+        self.check_is_initialized(msg="Cannot set inputs on an uninitialized FMU.")
+        shadow = self._input_shadow
+        discrete = any(
+            self._input_map[name].variability != "continuous" and (name not in shadow or shadow[name] != value)
+            for name, value in values.items()
+        )
+        if not discrete:
+            super().set_inputs(values)
+            return
+
+        self._instance.enterEventMode()
+        super().set_inputs(values)
+        self._update_discrete_states()
+        self._instance.enterContinuousTimeMode()
+        self._read_continuous_states()
+
+    def _write_variables(self, batch: VariableBatch, values: Sequence[FMUInputType]) -> None:
+        # Discrete variables can only change in event mode
+        if all(variable.variability == "continuous" for variable in batch.variables):
+            super()._write_variables(batch, values)
+            return
+
+        self._instance.enterEventMode()
+        super()._write_variables(batch, values)
+        self._update_discrete_states()
+        self._instance.enterContinuousTimeMode()
+        self._read_continuous_states()
+
+    def change_parameters(self, parameters: dict[str, FMUInputType]) -> ModelExchangeFMUInstance:
+        """Change the parameters of the FMU.
+
+        Tunable parameters can only change in event mode, so changing them triggers an event. Changing any
+        other parameter re-initializes the FMU, carrying over the values of all variables.
+
+        Args:
+            parameters: Parameters to change. Keys are the names of the FMU parameters.
+
+        Returns:
+            The FMU instance.
+        """
+        variables = self._fmu.variables
+        tunable = all(name in variables and variables[name].variability == "tunable" for name in parameters)
+        if not parameters or not tunable:
+            super().change_parameters(parameters)
+            return self
+
+        self._instance.enterEventMode()
+        super().change_parameters(parameters)
+        self._update_discrete_states()
+        self._instance.enterContinuousTimeMode()
+        self._read_continuous_states()
+        return self
+
+    def restore(self, snapshot: FMUSnapshot) -> ModelExchangeFMUInstance:
+        """Restore the internal state of the FMU from a snapshot.
+
+        Args:
+            snapshot: Snapshot taken from this instance, or created from bytes of the same model.
+
+        Returns:
+            The FMU instance.
+        """
+        super().restore(snapshot)
+        # The time of the next event belongs to the restored state, so it is queried again in event mode
+        self._handle_event()
+        return self
+
+    def _fork_options(self) -> dict[str, Any]:
+        return {"interface": self._interface, "solver": self._solver}
+
+
 class RemoteFMUInstance(FMUInstanceBase):
+    # Closing an instance whose simulator could not be created is a no-op
+    _initialized = False
+    _session: SimulatorSession | None = None
+
     def __init__(
         self,
         fmu: RemoteFMU,
         start_time: int | float,
         step_size: int | float,
         start_values: dict[str, FMUInputType] | None = None,
+        *,
+        outputs: Sequence[str] | None = None,
+        stats: bool = False,
+        websocket: bool = False,
     ):
+        if stats:
+            self.enable_stats()
+        created_at = perf_counter()
         self._fmu = fmu
         self._client = fmu._client
+        self._session: SimulatorSession | None = None
 
         self._current_time = start_time
         self._step_size = step_size
+        # Last sent value of every input, unchanged values are not sent again
+        self._input_shadow: dict[str, FMUInputType] = {}
 
         self._id = self._client.create_simulator(
             path=self._fmu._path,
             start_time=start_time,
             step_size=step_size,
             start_values=start_values,
+            outputs=outputs,
         ).id
         self._initialized = True
+        # Step over a WebSocket session instead of one HTTP request per call
+        if websocket:
+            self._session = self._client.open_session(self._id)
+        if self._stats is not None:
+            self._stats.record("instantiate", perf_counter() - created_at)
 
     def __repr__(self):
         return f"{self.__class__.__name__}(id={self._id}, model_name={self._fmu.model_description.modelName})"
@@ -367,6 +1303,11 @@ class RemoteFMUInstance(FMUInstanceBase):
         """Return the id of the FMU instance."""
         return self._id
 
+    @property
+    def session(self) -> SimulatorSession | None:
+        """Return the WebSocket session of the instance, None if it communicates over HTTP."""
+        return self._session
+
     @property
     def is_initialized(self) -> bool:
         return self._initialized
@@ -383,11 +1324,15 @@ class RemoteFMUInstance(FMUInstanceBase):
 
     def close(self) -> None:
         """Closes the FMU."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
         if self._initialized:
             self._client.delete_simulator(self._id)
             self._id = None
         self._initialized = False
 
+    @timed("reset")
     def reset(
         self,
         *,
@@ -407,9 +1352,11 @@ class RemoteFMUInstance(FMUInstanceBase):
         """
         self._step_size = step_size
         self._current_time = start_time
+        self._input_shadow.clear()
         self._client.reset(self._id, start_values=start_values, start_time=start_time, step_size=step_size)
         return self
 
+    @timed("step")
     def step(self, *, input_values: dict[str, FMUInputType] | None = None) -> dict[str, FMUInputType]:
         """Do a single step of the FMU.
 
@@ -419,10 +1366,16 @@ class RemoteFMUInstance(FMUInstanceBase):
         Returns:
             The outputs of the FMU.
         """
-        outputs = self._client.step(self._id, input_values=input_values)
+        changed = self._changed_inputs(input_values)
+        if self._session is not None:
+            outputs = self._session.step(input_values=changed)
+        else:
+            outputs = self._client.step(self._id, input_values=changed)
+        self._input_shadow.update(changed)
         self._current_time = outputs["current_time"]
         return outputs
 
+    @timed("advance")
     def advance(self, until: int, *, input_values: dict[str, FMUInputType] | None = None) -> dict[str, FMUInputType]:
         """Advance the FMU until a given time.
 
@@ -433,26 +1386,125 @@ class RemoteFMUInstance(FMUInstanceBase):
         Returns:
             The outputs of the FMU.
         """
-        outputs = self._client.advance(self._id, until=until, input_values=input_values)
+        changed = self._changed_inputs(input_values)
+        if self._session is not None:
+            outputs = self._session.advance(until, input_values=changed)
+        else:
+            outputs = self._client.advance(self._id, until=until, input_values=changed)
+        self._input_shadow.update(changed)
         self._current_time = outputs["current_time"]
         return outputs
 
+    @staticmethod
+    def step_many(
+        instances: Sequence[RemoteFMUInstance],
+        *,
+        input_values: Sequence[dict[str, FMUInputType] | None] | None = None,
+    ) -> list[dict[str, FMUInputType]]:
+        """Step many instances on the same server in a single request.
+
+        The server is free to step the instances concurrently.
+
+        Args:
+            instances: The instances to step.
+            input_values (optional): Input values of every instance, in the order of the instances.
+                Defaults to None.
+
+        Returns:
+            The outputs of every instance, in the order of the instances.
+        """
+        return RemoteFMUInstance._batch(
+            instances,
+            input_values,
+            lambda client, ids, changed: client.step_many(ids, input_values=changed),
+        )
+
+    @staticmethod
+    def advance_many(
+        instances: Sequence[RemoteFMUInstance],
+        until: int,
+        *,
+        input_values: Sequence[dict[str, FMUInputType] | None] | None = None,
+    ) -> list[dict[str, FMUInputType]]:
+        """Advance many instances on the same server to the same time in a single request.
+
+        The server is free to advance the instances concurrently.
+
+        Args:
+            instances: The instances to advance.
+            until: Time to advance the instances to.
+            input_values (optional): Input values of every instance, in the order of the instances.
+                Defaults to None.
+
+        Returns:
+            The outputs of every instance, in the order of the instances.
+        """
+        return RemoteFMUInstance._batch(
+            instances,
+            input_values,
+            lambda client, ids, changed: client.advance_many(ids, until, input_values=changed),
+        )
+
+    @staticmethod
+    def _batch(
+        instances: Sequence[RemoteFMUInstance],
+        input_values: Sequence[dict[str, FMUInputType] | None] | None,
+        send: Callable[[SimulatorClient, list[str], list[dict[str, FMUInputType]]], list[dict[str, FMUInputType]]],
+    ) -> list[dict[str, FMUInputType]]:
+        if not instances:
+            return []
+        if input_values is None:
+            input_values = [None] * len(instances)
+        elif len(input_values) != len(instances):
+            msg = "The number of input values must match the number of instances."
+            raise ValueError(msg)
+        client = instances[0]._client
+        if any(instance._client is not client for instance in instances):
+            msg = "All instances must be served by the same client."
+            raise ValueError(msg)
+        for instance in instances:
+            instance.check_is_initialized(msg="Cannot step an uninitialized fmu.")
+
+        changed = [instance._changed_inputs(values) for instance, values in zip(instances, input_values, strict=True)]
+        results = send(client, [instance._id for instance in instances], changed)
+        for instance, inputs, outputs in zip(instances, changed, results, strict=True):
+            instance._input_shadow.update(inputs)
+            instance._current_time = outputs["current_time"]
+        return results
+
+    @timed("set_inputs")
     def set_inputs(self, values: dict[str, FMUInputType]) -> None:
         """Sets the inputs of the FMU.
 
+        Only the inputs whose value changed since they were last sent are sent to the server.
+
         Args:
             values: Input values to set. Keys are the names of the FMU inputs.
         """
-        self._client.set_inputs(self._id, input_values=values)
+        changed = self._changed_inputs(values)
+        if not changed:
+            return
+        if self._session is not None:
+            self._session.set_inputs(changed)
+        else:
+            self._client.set_inputs(self._id, input_values=changed)
+        self._input_shadow.update(changed)
+
+    def _changed_inputs(self, values: dict[str, FMUInputType] | None) -> dict[str, FMUInputType]:
+        return _changed_inputs(self._input_shadow, values)
 
+    @timed("read_outputs")
     def read_outputs(self) -> dict[str, FMUInputType]:
         """Read the outputs of the FMU.
 
         Returns:
             The outputs of the FMU.
         """
+        if self._session is not None:
+            return self._session.read_outputs()
         return self._client.get_outputs(self._id)
 
+    @timed("change_parameters")
     def change_parameters(self, parameters: dict[str, FMUInputType]) -> RemoteFMUInstance:
         """Change the parameters of the FMU.
 
@@ -463,8 +1515,271 @@ class RemoteFMUInstance(FMUInstanceBase):
             The FMU instance.
         """
         self._client.change_parameters(self._id, parameters=parameters)
+        # Changing parameters may re-initialize the FMU on the server
+        self._input_shadow.clear()
+        return self
+
+    @timed("simulate_trajectory")
+    def simulate_trajectory(
+        self,
+        times: Sequence[int | float],
+        inputs: Mapping[str, Sequence[FMUInputType]] | None = None,
+    ) -> dict[str, np.ndarray]:
+        """Simulate the FMU along a sequence of communication points in a single request.
+
+        Args:
+            times: Increasing times to advance to.
+            inputs (optional): Input time series with one value per time, keyed by input name.
+                A DataFrame with one column per input can be used as well. Defaults to None.
+
+        Returns:
+            The outputs at every time, keyed by output name, including the `current_time`.
+        """
+        inputs = inputs if inputs is not None else {}
+        for name in inputs:
+            self._input_shadow.pop(name, None)
+        trajectory = self._client.simulate_trajectory(
+            self._id,
+            times=np.asarray(times).tolist(),
+            inputs={name: np.asarray(values).tolist() for name, values in inputs.items()},
+        )
+        if trajectory["current_time"]:
+            self._current_time = trajectory["current_time"][-1]
+        return {name: np.asarray(values) for name, values in trajectory.items()}
+
+
+class AsyncRemoteFMUInstance:
+    def __init__(
+        self,
+        client: AsyncSimulatorClient,
+        path: str,
+        id: str,  # noqa: A002
+        *,
+        start_time: int | float,
+        step_size: int | float,
+    ):
+        """FMU instance on a simulator server, driven from an asyncio event loop.
+
+        Instances are created with `AsyncRemoteFMUInstance.create`, which creates the simulator on the server.
+        Many instances can share a client and be stepped concurrently, e.g. with `asyncio.gather`.
+
+        Args:
+            client: Client of the server.
+            path: Path of the FMU on the server.
+            id: Id of the simulator on the server.
+            start_time: Start time of the simulation.
+            step_size: Step size of the simulation.
+        """
+        self._client = client
+        self._path = path
+        self._id = id
+        self._current_time = start_time
+        self._step_size = step_size
+        # Last sent value of every input, unchanged values are not sent again
+        self._input_shadow: dict[str, FMUInputType] = {}
+        self._initialized = True
+
+    @classmethod
+    async def create(
+        cls,
+        client: AsyncSimulatorClient,
+        path: str,
+        *,
+        start_time: int | float,
+        step_size: int | float,
+        start_values: dict[str, FMUInputType] | None = None,
+        outputs: Sequence[str] | None = None,
+    ) -> AsyncRemoteFMUInstance:
+        """Create a simulator on the server.
+
+        Args:
+            client: Client of the server.
+            path: Path of the FMU on the server.
+            start_time: Start time of the simulation.
+            step_size: Step size of the simulation.
+            start_values (optional): Start values of the simulation. Defaults to None.
+            outputs (optional): Names of the outputs to read after every step. Defaults to None (all outputs).
+
+        Returns:
+            The FMU instance.
+        """
+        simulator = await client.create_simulator(
+            path=path,
+            start_time=start_time,
+            step_size=step_size,
+            start_values=start_values,
+            outputs=outputs,
+        )
+        return cls(client, path, simulator.id, start_time=start_time, step_size=step_size)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(id={self._id}, path={self._path})"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def id(self) -> str:
+        """Return the id of the FMU instance."""
+        return self._id
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._initialized
+
+    @property
+    def step_size(self) -> int | float:
+        """Return the step size of the FMU."""
+        return self._step_size
+
+    @property
+    def current_time(self) -> int | float:
+        """Return the current time of the FMU."""
+        return self._current_time
+
+    async def close(self) -> None:
+        """Closes the FMU."""
+        if self._initialized:
+            # Mark the instance closed first, so that concurrent closes delete the simulator once
+            self._initialized = False
+            await self._client.delete_simulator(self._id)
+            self._id = None
+
+    async def reset(
+        self,
+        *,
+        start_time: int | float,
+        step_size: int | float,
+        start_values: dict[str, FMUInputType],
+    ) -> AsyncRemoteFMUInstance:
+        """Reset the FMU.
+
+        Args:
+            start_time: Start time of the simulation.
+            step_size: Step size of the simulation.
+            start_values: Start values of the simulation.
+
+        Returns:
+            The FMU instance.
+        """
+        self._step_size = step_size
+        self._current_time = start_time
+        self._input_shadow.clear()
+        await self._client.reset(self._id, start_values=start_values, start_time=start_time, step_size=step_size)
         return self
 
+    async def step(self, *, input_values: dict[str, FMUInputType] | None = None) -> dict[str, FMUInputType]:
+        """Do a single step of the FMU.
+
+        Args:
+            input_values (optional): Input values for the step. Defaults to None.
+
+        Returns:
+            The outputs of the FMU.
+        """
+        changed = _changed_inputs(self._input_shadow, input_values)
+        outputs = await self._client.step(self._id, input_values=changed)
+        self._input_shadow.update(changed)
+        self._current_time = outputs["current_time"]
+        return outputs
+
+    async def advance(
+        self,
+        until: int,
+        *,
+        input_values: dict[str, FMUInputType] | None = None,
+    ) -> dict[str, FMUInputType]:
+        """Advance the FMU until a given time.
+
+        Args:
+            until: Time to advance to.
+            input_values (optional): Input values for the advance. Defaults to None.
+
+        Returns:
+            The outputs of the FMU.
+        """
+        changed = _changed_inputs(self._input_shadow, input_values)
+        outputs = await self._client.advance(self._id, until=until, input_values=changed)
+        self._input_shadow.update(changed)
+        self._current_time = outputs["current_time"]
+        return outputs
+
+    async def set_inputs(self, values: dict[str, FMUInputType]) -> None:
+        """Sets the inputs of the FMU.
+
+        Only the inputs whose value changed since they were last sent are sent to the server.
+
+        Args:
+            values: Input values to set. Keys are the names of the FMU inputs.
+        """
+        changed = _changed_inputs(self._input_shadow, values)
+        if not changed:
+            return
+        await self._client.set_inputs(self._id, input_values=changed)
+        self._input_shadow.update(changed)
+
+    async def read_outputs(self) -> dict[str, FMUInputType]:
+        """Read the outputs of the FMU.
+
+        Returns:
+            The outputs of the FMU.
+        """
+        return await self._client.get_outputs(self._id)
+
+    async def change_parameters(self, parameters: dict[str, FMUInputType]) -> AsyncRemoteFMUInstance:
+        """Change the parameters of the FMU.
+
+        Args:
+            parameters: Parameters to change. Keys are the names of the FMU parameters.
+
+        Returns:
+            The FMU instance.
+        """
+        await self._client.change_parameters(self._id, parameters=parameters)
+        # Changing parameters may re-initialize the FMU on the server
+        self._input_shadow.clear()
+        return self
+
+    async def simulate_trajectory(
+        self,
+        times: Sequence[int | float],
+        inputs: Mapping[str, Sequence[FMUInputType]] | None = None,
+    ) -> dict[str, np.ndarray]:
+        """Simulate the FMU along a sequence of communication points in a single request.
+
+        Args:
+            times: Increasing times to advance to.
+            inputs (optional): Input time series with one value per time, keyed by input name.
+                A DataFrame with one column per input can be used as well. Defaults to None.
+
+        Returns:
+            The outputs at every time, keyed by output name, including the `current_time`.
+        """
+        inputs = inputs if inputs is not None else {}
+        for name in inputs:
+            self._input_shadow.pop(name, None)
+        trajectory = await self._client.simulate_trajectory(
+            self._id,
+            times=np.asarray(times).tolist(),
+            inputs={name: np.asarray(values).tolist() for name, values in inputs.items()},
+        )
+        if trajectory["current_time"]:
+            self._current_time = trajectory["current_time"][-1]
+        return {name: np.asarray(values) for name, values in trajectory.items()}
+
+
+def _changed_inputs(
+    shadow: dict[str, FMUInputType],
+    values: dict[str, FMUInputType] | None,
+) -> dict[str, FMUInputType]:
+    """Return the input values that differ from the last sent values."""
+    if not values:
+        return {}
+    return {name: value for name, value in values.items() if name not in shadow or shadow[name] != value}
+
 
 class FMUBase(metaclass=ABCMeta):
     @cached_property
@@ -483,6 +1798,25 @@ class FMUBase(metaclass=ABCMeta):
     ) -> FMUInstanceBase:
         raise NotImplementedError
 
+    def _select_outputs(self, names: Sequence[str] | None) -> list[ScalarVariable]:
+        if names is None:
+            return self.outputs
+        outputs = {output.name: output for output in self.outputs}
+        unknown = [name for name in names if name not in outputs]
+        if unknown:
+            msg = f"Unknown outputs: {', '.join(unknown)}."
+            raise KeyError(msg)
+        return [outputs[name] for name in names]
+
+    @cached_property
+    def variables(self) -> dict[str, ScalarVariable]:
+        """Return the variables of the FMU by name.
+
+        Returns:
+            Mapping of variable names to FMU variables.
+        """
+        return {variable.name: variable for variable in self.model_description.modelVariables}
+
     @cached_property
     def inputs(self) -> list[ScalarVariable]:
         """Return the inputs of the FMU.
@@ -524,7 +1858,17 @@ class FMUBase(metaclass=ABCMeta):
 
 
 class FMU(FMUBase):
-    def __init__(self, path: str | Path):
+    def __init__(self, path: str | Path, *, share_library: bool = True):
+        """FMU file on the local file system.
+
+        By default, all instances of the FMU share one extraction and one loaded library. Libraries may
+        keep process-wide state, so the FMI calls of instances sharing a library take turns. Instances
+        with a private copy of the library run in parallel, at the cost of an extraction per instance.
+
+        Args:
+            path: Path to the FMU file.
+            share_library (optional): Share the loaded library between the instances. Defaults to True.
+        """
         fmu_path = Path(path).resolve()
         if not fmu_path.exists():
             msg = f"FMU file not found: {fmu_path}"
@@ -534,19 +1878,110 @@ class FMU(FMUBase):
             raise ValueError(msg)
 
         self._fmu_path = str(fmu_path)
+        self._share_library = share_library
+        self._libraries: dict[str, _SharedLibrary] = {}
+        self._library_lock = threading.Lock()
 
     def __repr__(self):
         return f"{self.__class__.__name__}(path={self._fmu_path})"
 
+    def __del__(self):
+        self.close()
+
+    def close(self) -> None:
+        """Release the shared libraries of the FMU.
+
+        A library is unloaded once every instance using it has been closed.
+        """
+        libraries = getattr(self, "_libraries", None)
+        if libraries:
+            for library in libraries.values():
+                library.close()
+            libraries.clear()
+
+    def _shared_library(self, interface: str = "CoSimulation") -> _SharedLibrary | None:
+        """Return the shared library used by the instances of the FMU.
+
+        Args:
+            interface (optional): FMI interface of the instances, "CoSimulation" or "ModelExchange".
+                Defaults to "CoSimulation".
+
+        Returns:
+            The shared library, or None if every instance loads a private copy of the library, either
+            because sharing was disabled or because the model can only be instantiated once per process.
+        """
+        _, attribute = _INTERFACES[interface]
+        if not self._share_library or getattr(self.model_description, attribute).canBeInstantiatedOnlyOncePerProcess:
+            return None
+        with self._library_lock:
+            library = self._libraries.get(interface)
+            if library is None:
+                library = self._libraries[interface] = _SharedLibrary(self, interface)
+            return library
+
+    @cached_property
+    def _parsed_model_description(self) -> ParsedModelDescription:
+        return model_description_cache.get(self._fmu_path)
+
     @cached_property
     def model_description(self) -> ModelDescription:
-        """Return the model description of the FMU."""
-        return fmpy.read_model_description(self._fmu_path)
+        """Return the model description of the FMU.
 
-    def recompile(self) -> None:
-        """Recompile the FMU for the current platform."""
-        fmpy.util.compile_platform_binary(self._fmu_path)
-        logger.info(f"Recompiled FMU for platform {fmpy.platform}.")
+        The model description and its interface capabilities are copies owned by this FMU,
+        the variables are shared with all FMUs of the same file and must not be modified.
+        """
+        model_description = copy.copy(self._parsed_model_description.model_description)
+        for attribute in ("coSimulation", "modelExchange"):
+            capabilities = getattr(model_description, attribute)
+            if capabilities is not None:
+                setattr(model_description, attribute, copy.copy(capabilities))
+        return model_description
+
+    @cached_property
+    def inputs(self) -> list[ScalarVariable]:
+        """Return the inputs of the FMU.
+
+        Returns:
+            List of FMU inputs.
+        """
+        return list(self._parsed_model_description.inputs)
+
+    @cached_property
+    def outputs(self) -> list[ScalarVariable]:
+        """Return the outputs of the FMU.
+
+        Returns:
+            List of FMU outputs.
+        """
+        return list(self._parsed_model_description.outputs)
+
+    @cached_property
+    def parameters(self) -> list[ScalarVariable]:
+        """Return the parameters of the FMU.
+
+        Returns:
+            List of FMU parameters.
+        """
+        return list(self._parsed_model_description.parameters)
+
+    def recompile(self, *, compiler_options: str | None = None) -> None:
+        """Recompile the FMU for the current platform.
+
+        The FMU is compiled into the shared binary cache, or taken from it if it was compiled
+        before, and the instances created afterwards use the compiled FMU. The FMU file itself
+        is left unchanged.
+
+        Args:
+            compiler_options (optional): Custom compiler options. Defaults to None.
+
+        Raises:
+            RuntimeError: If the installed fmpy cannot compile FMUs.
+        """
+        # Compile first, so that the FMU stays usable if the compilation fails
+        fmu_path = str(binary_cache.get(self._fmu_path, compiler_options=compiler_options))
+        self.close()
+        self._fmu_path = fmu_path
+        logger.info(f"Using FMU recompiled for platform {fmpy.platform} from {self._fmu_path}.")
 
     def current_platform_is_supported(self) -> bool:
         """Check if the current platform is supported by the FMU."""
@@ -569,6 +2004,16 @@ class FMU(FMUBase):
             step_size: Step size of the simulation.
             start_values (optional): Start values of the simulation. Defaults to None.
             recompile (optional): Recompile the FMU for the current platform if not supported. Defaults to False.
+            advance_step_size (optional): Largest communication step taken by advance() if the FMU can handle
+                variable communication step sizes, use math.inf for a single doStep per advance().
+                Defaults to None, which steps with the step size.
+            outputs (optional): Names of the outputs to read after every step. Defaults to None (all outputs).
+            stats (optional): Record the number and duration of the calls made on the instance, see
+                `FMUInstanceBase.stats`. Defaults to False.
+            interface (optional): FMI interface to simulate through, "CoSimulation" or "ModelExchange".
+                Defaults to None, which uses Co-Simulation if the FMU supports it.
+            solver (optional): Solver integrating Model Exchange FMUs, "euler", "rk45" or a `Solver`.
+                Defaults to "rk45".
 
         Returns:
             FMUInstance: The instantiated FMU.
@@ -578,7 +2023,24 @@ class FMU(FMUBase):
             logger.warning(f"{fmpy.platform} is not supported by this FMU, recompiling...")
             self.recompile()
 
-        return FMUInstance(self, start_time=start_time, step_size=step_size, start_values=start_values)
+        interface = kwargs.get("interface")
+        if interface is None:
+            interface = "CoSimulation" if self.model_description.coSimulation is not None else "ModelExchange"
+        if interface not in _INTERFACES:
+            msg = f"Unknown interface '{interface}', expected one of: {', '.join(_INTERFACES)}."
+            raise ValueError(msg)
+
+        options = {
+            "start_time": start_time,
+            "step_size": step_size,
+            "start_values": start_values,
+            "advance_step_size": kwargs.get("advance_step_size"),
+            "outputs": kwargs.get("outputs"),
+            "stats": kwargs.get("stats", False),
+        }
+        if interface == "ModelExchange":
+            return ModelExchangeFMUInstance(self, solver=kwargs.get("solver", "rk45"), **options)
+        return FMUInstance(self, **options)
 
 
 class RemoteFMU(FMUBase):
@@ -607,7 +2069,7 @@ class RemoteFMU(FMUBase):
         start_time: int | float,
         step_size: int | float,
         start_values: dict,
-        **kwargs,  # noqa
+        **kwargs,
     ) -> FMUInstanceBase:
         """Instantiate the FMU.
 
@@ -615,6 +2077,10 @@ class RemoteFMU(FMUBase):
             start_time: Start time of the simulation.
             step_size: Step size of the simulation.
             start_values: Start values of the simulation.
+            outputs (optional): Names of the outputs to read after every step. Defaults to None (all outputs).
+            stats (optional): Record the number and duration of the calls made on the instance. Defaults to False.
+            websocket (optional): Step, advance, set inputs and read outputs over a WebSocket session bound
+                to the simulator instead of one HTTP request per call. Defaults to False.
 
         Returns:
             Instantiated RemoteFMUInstance.
@@ -624,4 +2090,7 @@ class RemoteFMU(FMUBase):
             start_time=start_time,
             step_size=step_size,
             start_values=start_values,
+            outputs=kwargs.get("outputs"),
+            stats=kwargs.get("stats", False),
+            websocket=kwargs.get("websocket", False),
         )
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import os
+import threading
+import weakref
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from cosimtlk._fmu import FMUInstance, FMUInstanceBase
+from cosimtlk.models import FMUInputType
+
+
+class ParallelStepper:
+    def __init__(self, max_workers: int | None = None):
+        """Step independent FMU instances concurrently on a pool of threads.
+
+        The FMU functions are called through ctypes, which releases the GIL for the duration of
+        every call, so instances with private copies of their library simulate in parallel. Every
+        instance is pinned to one worker thread the first time it is stepped, and all later calls on
+        the instance are made from that thread. The FMI calls of instances sharing a library take
+        turns, so these instances are all pinned to the same worker. Create the FMU with
+        `share_library=False` to step its instances in parallel.
+
+        Args:
+            max_workers (optional): Number of worker threads. Defaults to None (number of processors).
+        """
+        self._max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        if self._max_workers < 1:
+            msg = "The number of workers must be positive."
+            raise ValueError(msg)
+
+        self._lock = threading.Lock()
+        self._workers: list[ThreadPoolExecutor] = []
+        self._load: list[int] = []
+        self._assignments: weakref.WeakKeyDictionary[FMUInstanceBase, int] = weakref.WeakKeyDictionary()
+        # Worker of the instances of every shared library, keyed by the lock of the library
+        self._serialized: weakref.WeakKeyDictionary[threading.RLock, int] = weakref.WeakKeyDictionary()
+        self._closed = False
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(max_workers={self._max_workers})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def step_many(
+        self,
+        instances: Sequence[FMUInstanceBase],
+        *,
+        input_values: Sequence[dict[str, FMUInputType] | None] | None = None,
+    ) -> list[dict[str, FMUInputType]]:
+        """Step many instances concurrently.
+
+        Args:
+            instances: The instances to step.
+            input_values (optional): Input values of every instance, in the order of the instances.
+                Defaults to None.
+
+        Returns:
+            The outputs of every instance, in the order of the instances.
+        """
+        return self._map(lambda instance, inputs: instance.step(input_values=inputs), instances, input_values)
+
+    def advance_many(
+        self,
+        instances: Sequence[FMUInstanceBase],
+        until: int,
+        *,
+        input_values: Sequence[dict[str, FMUInputType] | None] | None = None,
+    ) -> list[dict[str, FMUInputType]]:
+        """Advance many instances concurrently to the same time.
+
+        Args:
+            instances: The instances to advance.
+            until: Time to advance the instances to.
+            input_values (optional): Input values of every instance, in the order of the instances.
+                Defaults to None.
+
+        Returns:
+            The outputs of every instance, in the order of the instances.
+        """
+        return self._map(lambda instance, inputs: instance.advance(until, input_values=inputs), instances, input_values)
+
+    def close(self) -> None:
+        """Stop the worker threads after the pending calls have finished."""
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.shutdown(wait=True)
+
+    def _map(
+        self,
+        func: Callable[[FMUInstanceBase, dict[str, FMUInputType] | None], dict[str, FMUInputType]],
+        instances: Sequence[FMUInstanceBase],
+        input_values: Sequence[dict[str, FMUInputType] | None] | None,
+    ) -> list[dict[str, FMUInputType]]:
+        if self._closed:
+            msg = "Cannot step instances on a closed stepper."
+            raise RuntimeError(msg)
+        if input_values is None:
+            input_values = [None] * len(instances)
+        elif len(input_values) != len(instances):
+            msg = "The number of input values must match the number of instances."
+            raise ValueError(msg)
+
+        # Submit a single task per worker, which steps its instances one after the other
+        batches: dict[int, list[int]] = {}
+        for position, instance in enumerate(instances):
+            batches.setdefault(self._worker_of(instance), []).append(position)
+
+        results: list[dict[str, FMUInputType]] = [None] * len(instances)  # type: ignore[list-item]
+
+        def run(positions: list[int]) -> None:
+            for position in positions:
+                results[position] = func(instances[position], input_values[position])
+
+        with self._lock:
+            if self._closed:
+                msg = "Cannot step instances on a closed stepper."
+                raise RuntimeError(msg)
+            futures: list[Future] = [
+                self._workers[worker].submit(run, positions) for worker, positions in batches.items()
+            ]
+
+        errors = [future.exception() for future in futures]
+        for error in errors:
+            if error is not None:
+                raise error
+        return results
+
+    def _worker_of(self, instance: FMUInstanceBase) -> int:
+        with self._lock:
+            worker = self._assignments.get(instance)
+            if worker is not None:
+                return worker
+
+            key = None
+            if isinstance(instance, FMUInstance) and instance._library is not None:
+                key = instance._library.lock
+            if key is not None and key in self._serialized:
+                worker = self._serialized[key]
+            else:
+                worker = self._least_loaded()
+                if key is not None:
+                    self._serialized[key] = worker
+
+            self._assignments[instance] = worker
+            self._load[worker] += 1
+            weakref.finalize(instance, self._unassign, worker)
+            return worker
+
+    def _least_loaded(self) -> int:
+        if len(self._workers) < self._max_workers:
+            self._workers.append(
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"cosimtlk-stepper-{len(self._workers)}")
+            )
+            self._load.append(0)
+            return len(self._workers) - 1
+        return min(range(len(self._workers)), key=self._load.__getitem__)
+
+    def _unassign(self, worker: int) -> None:
+        with self._lock:
+            if worker < len(self._load):
+                self._load[worker] -= 1
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from cosimtlk._fmu import FMU, FMUInstance
+from cosimtlk.models import FMUInputType
+
+logger = logging.getLogger(__name__)
+
+
+class FMUInstancePool:
+    def __init__(
+        self,
+        fmu: FMU,
+        *,
+        min_size: int = 0,
+        max_size: int | None = None,
+        idle_timeout: int | float | None = None,
+    ):
+        """Pool of reusable instances of an FMU.
+
+        Instead of instantiating and freeing an FMU for every simulation, instances are
+        returned to the pool after use and recycled with `FMUInstance.reset`. Instances can be
+        borrowed from many threads. Their FMI calls take turns on the library they share,
+        unless the FMU was created with `share_library=False`.
+
+        Args:
+            fmu: The FMU to create instances of.
+            min_size (optional): Number of instances created up front and kept alive. Defaults to 0.
+            max_size (optional): Maximum number of instances, idle and in use. Defaults to None (unbounded).
+            idle_timeout (optional): Seconds after which idle instances above `min_size` are closed, by a
+                background timer if the pool is not used in the meantime. Defaults to None, which keeps idle
+                instances until the pool is closed.
+        """
+        if min_size < 0:
+            msg = "The minimum pool size must be non-negative."
+            raise ValueError(msg)
+        if max_size is not None and max_size < max(min_size, 1):
+            msg = "The maximum pool size must be positive and at least the minimum size."
+            raise ValueError(msg)
+
+        self._fmu = fmu
+        self._min_size = min_size
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+
+        self._condition = threading.Condition()
+        self._idle: deque[tuple[FMUInstance, float]] = deque()
+        self._in_use: set[FMUInstance] = set()
+        self._creating = 0
+        self._closed = False
+        self._reaper: threading.Timer | None = None
+
+        for _ in range(min_size):
+            self._idle.append((self._create(start_time=0, step_size=1, start_values={}), time.monotonic()))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(fmu={self._fmu}, size={self.size}, idle={self.idle})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def size(self) -> int:
+        """Number of instances owned by the pool, idle and in use."""
+        with self._condition:
+            return len(self._idle) + len(self._in_use) + self._creating
+
+    @property
+    def idle(self) -> int:
+        """Number of idle instances in the pool."""
+        with self._condition:
+            return len(self._idle)
+
+    def acquire(
+        self,
+        *,
+        start_time: int | float,
+        step_size: int | float,
+        start_values: dict[str, FMUInputType] | None = None,
+        timeout: float | None = None,
+    ) -> FMUInstance:
+        """Borrow an instance from the pool, reset to the given experiment.
+
+        Blocks while the pool is at its maximum size and all instances are in use.
+
+        Args:
+            start_time: Start time of the simulation.
+            step_size: Step size of the simulation.
+            start_values (optional): Start values of the simulation. Defaults to None.
+            timeout (optional): Seconds to wait for an instance. Defaults to None (wait forever).
+
+        Returns:
+            An initialized FMU instance, which must be given back with `release`.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                if self._closed:
+                    msg = "Cannot acquire an instance from a closed pool."
+                    raise RuntimeError(msg)
+                self._close_expired()
+                if self._idle:
+                    instance, _ = self._idle.pop()
+                    self._in_use.add(instance)
+                    break
+                if self._max_size is None or len(self._in_use) + self._creating < self._max_size:
+                    instance = None
+                    self._creating += 1
+                    break
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    msg = "Timed out waiting for an FMU instance."
+                    raise TimeoutError(msg)
+                self._condition.wait(remaining)
+
+        if instance is None:
+            try:
+                instance = self._create(start_time=start_time, step_size=step_size, start_values=start_values or {})
+            finally:
+                with self._condition:
+                    self._creating -= 1
+                    if instance is not None:
+                        self._in_use.add(instance)
+                    self._condition.notify()
+            return instance
+
+        try:
+            instance.reset(start_time=start_time, step_size=step_size, start_values=start_values or {})
+        except Exception:
+            self._discard(instance)
+            raise
+        return instance
+
+    def release(self, instance: FMUInstance) -> None:
+        """Give an instance back to the pool.
+
+        Args:
+            instance: Instance obtained from `acquire`.
+        """
+        with self._condition:
+            if instance not in self._in_use:
+                msg = "The instance does not belong to this pool."
+                raise ValueError(msg)
+            self._in_use.remove(instance)
+            recycle = not self._closed and instance.is_initialized
+            if recycle:
+                instance.release_snapshots()
+                self._idle.append((instance, time.monotonic()))
+            self._close_expired()
+            self._schedule_reaper()
+            self._condition.notify()
+        if not recycle:
+            instance.close()
+
+    @contextmanager
+    def borrow(
+        self,
+        *,
+        start_time: int | float,
+        step_size: int | float,
+        start_values: dict[str, FMUInputType] | None = None,
+        timeout: float | None = None,
+    ) -> Iterator[FMUInstance]:
+        """Borrow an instance for the duration of a with block.
+
+        Args:
+            start_time: Start time of the simulation.
+            step_size: Step size of the simulation.
+            start_values (optional): Start values of the simulation. Defaults to None.
+            timeout (optional): Seconds to wait for an instance. Defaults to None (wait forever).
+
+        Yields:
+            An initialized FMU instance.
+        """
+        instance = self.acquire(start_time=start_time, step_size=step_size, start_values=start_values, timeout=timeout)
+        try:
+            yield instance
+        finally:
+            self.release(instance)
+
+    def close(self) -> None:
+        """Close the idle instances of the pool, instances in use are closed when released."""
+        with self._condition:
+            self._closed = True
+            if self._reaper is not None:
+                self._reaper.cancel()
+                self._reaper = None
+            idle = [instance for instance, _ in self._idle]
+            self._idle.clear()
+            self._condition.notify_all()
+        for instance in idle:
+            instance.close()
+
+    def _create(
+        self,
+        *,
+        start_time: int | float,
+        step_size: int | float,
+        start_values: dict[str, FMUInputType],
+    ) -> FMUInstance:
+        return self._fmu.instantiate(start_time=start_time, step_size=step_size, start_values=start_values)
+
+    def _discard(self, instance: FMUInstance) -> None:
+        with self._condition:
+            self._in_use.discard(instance)
+            self._condition.notify()
+        instance.close()
+
+    def _close_expired(self) -> None:
+        if self._idle_timeout is None:
+            return
+        now = time.monotonic()
+        # The oldest idle instances are at the left of the queue
+        while self._idle and len(self._idle) + len(self._in_use) > self._min_size:
+            instance, released_at = self._idle[0]
+            if now - released_at < self._idle_timeout:
+                break
+            self._idle.popleft()
+            logger.debug(f"Closing {instance} after being idle for {now - released_at:.1f}s.")
+            instance.close()
+
+    def _schedule_reaper(self) -> None:
+        # Without further calls on the pool, a timer closes the idle instances once they expire
+        if self._idle_timeout is None or self._reaper is not None or self._closed or not self._idle:
+            return
+        if len(self._idle) + len(self._in_use) <= self._min_size:
+            return
+        _, released_at = self._idle[0]
+        delay = max(released_at + self._idle_timeout - time.monotonic(), 0)
+        self._reaper = threading.Timer(delay, self._reap)
+        self._reaper.daemon = True
+        self._reaper.start()
+
+    def _reap(self) -> None:
+        with self._condition:
+            self._reaper = None
+            if self._closed:
+                return
+            self._close_expired()
+            self._schedule_reaper()
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import math
+from abc import ABCMeta, abstractmethod
+from collections.abc import Callable
+
+import numpy as np
+
+# Right-hand side of the state equations, returns the derivatives of the states at a time
+RHS = Callable[[float, np.ndarray], np.ndarray]
+
+# Coefficients of the Dormand-Prince 5(4) method
+_RK45_C = np.array([0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0])
+_RK45_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+# Difference between the weights of the fifth and fourth order solutions
+_RK45_E = np.array([71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40])
+
+
+class Solver(metaclass=ABCMeta):
+    """Integrator of the continuous states of Model Exchange FMUs.
+
+    Solvers hold only their settings, the state of the integration is passed to every step,
+    so the same solver can be shared by many instances.
+    """
+
+    @abstractmethod
+    def step(self, rhs: RHS, t: float, x: np.ndarray, h: float | None, t_end: float) -> tuple[float, np.ndarray, float]:
+        """Take a single step of at most `t_end - t`.
+
+        Args:
+            rhs: Derivatives of the states.
+            t: Current time.
+            x: Current states.
+            h: Step size suggested by the previous step, None for the first step.
+            t_end: Time not to step past.
+
+        Returns:
+            The time reached, the states at that time and the suggested size of the next step.
+        """
+        raise NotImplementedError
+
+
+class EulerSolver(Solver):
+    def __init__(self, step_size: float | None = None):
+        """Explicit Euler method with a fixed step size.
+
+        Args:
+            step_size (optional): Internal step size. Defaults to None, which takes a single step per
+                communication step.
+        """
+        if step_size is not None and step_size <= 0:
+            msg = "The step size must be positive."
+            raise ValueError(msg)
+        self.step_size = step_size
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(step_size={self.step_size})"
+
+    def step(self, rhs: RHS, t: float, x: np.ndarray, h: float | None, t_end: float) -> tuple[float, np.ndarray, float]:
+        h = t_end - t if self.step_size is None else min(self.step_size, t_end - t)
+        t_new = t_end if t + h >= t_end else t + h
+        return t_new, x + h * rhs(t, x), h
+
+
+class RK45Solver(Solver):
+    def __init__(
+        self,
+        *,
+        rtol: float = 1e-6,
+        atol: float = 1e-8,
+        max_step: float = math.inf,
+        min_step: float = 1e-12,
+    ):
+        """Adaptive Runge-Kutta method of order 5(4) by Dormand and Prince.
+
+        The step size grows while the dynamics are slow, so a single communication step can be
+        covered by few evaluations of the model.
+
+        Args:
+            rtol (optional): Relative tolerance. Defaults to 1e-6.
+            atol (optional): Absolute tolerance. Defaults to 1e-8.
+            max_step (optional): Largest step size. Defaults to math.inf.
+            min_step (optional): Smallest step size before giving up. Defaults to 1e-12.
+        """
+        if rtol <= 0 or atol <= 0:
+            msg = "The tolerances must be positive."
+            raise ValueError(msg)
+        self.rtol = rtol
+        self.atol = atol
+        self.max_step = max_step
+        self.min_step = min_step
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(rtol={self.rtol}, atol={self.atol}, max_step={self.max_step})"
+
+    def step(self, rhs: RHS, t: float, x: np.ndarray, h: float | None, t_end: float) -> tuple[float, np.ndarray, float]:
+        h = min(t_end - t if h is None else h, self.max_step)
+        k = np.empty((len(_RK45_C), x.size), dtype=np.float64)
+        k[0] = rhs(t, x)
+        while True:
+            last = t + h >= t_end
+            if last:
+                h = t_end - t
+            for i in range(1, len(_RK45_C)):
+                k[i] = rhs(t + _RK45_C[i] * h, x + h * np.dot(_RK45_A[i], k[:i]))
+            x_new = x + h * np.dot(_RK45_A[-1], k[:-1])
+
+            scale = self.atol + self.rtol * np.maximum(np.abs(x), np.abs(x_new))
+            error = math.sqrt(np.mean(np.square(h * np.dot(_RK45_E, k) / scale)))
+            factor = 5.0 if error == 0 else min(5.0, max(0.2, 0.9 * error**-0.2))
+            if error <= 1:
+                return (t_end if last else t + h), x_new, min(h * factor, self.max_step)
+            h *= factor
+            if h < self.min_step:
+                msg = f"The step size became smaller than {self.min_step} at time {t}."
+                raise RuntimeError(msg)
+
+
+_SOLVERS: dict[str, Callable[[], Solver]] = {
+    "euler": EulerSolver,
+    "rk45": RK45Solver,
+}
+
+
+def get_solver(solver: str | Solver) -> Solver:
+    """Return a solver by name, or the solver itself.
+
+    Args:
+        solver: Name of the solver, one of "euler" and "rk45", or a solver.
+
+    Returns:
+        The solver.
+    """
+    if isinstance(solver, Solver):
+        return solver
+    try:
+        return _SOLVERS[solver]()
+    except KeyError:
+        msg = f"Unknown solver '{solver}', expected one of: {', '.join(_SOLVERS)}."
+        raise ValueError(msg) from None
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import bisect
+import functools
+import math
+import threading
+from collections.abc import Callable
+from time import perf_counter
+from typing import Any, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Upper bounds of the histogram buckets in seconds, one bucket per decade from 1us to 10s
+_BUCKET_BOUNDS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, 10.0)
+_BUCKET_LABELS = ("<=1us", "<=10us", "<=100us", "<=1ms", "<=10ms", "<=100ms", "<=1s", "<=10s", ">10s")
+
+
+class CallStats:
+    __slots__ = ("count", "histogram", "max", "min", "total")
+
+    def __init__(self):
+        """Timings of the calls of a single operation."""
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.histogram = [0] * len(_BUCKET_LABELS)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(count={self.count}, total={self.total:.6f})"
+
+    def record(self, elapsed: float) -> None:
+        """Record the duration of a call in seconds."""
+        self.count += 1
+        self.total += elapsed
+        self.min = min(self.min, elapsed)
+        self.max = max(self.max, elapsed)
+        self.histogram[bisect.bisect_left(_BUCKET_BOUNDS, elapsed)] += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the timings as a dictionary, durations are in seconds."""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "histogram": dict(zip(_BUCKET_LABELS, self.histogram, strict=True)),
+        }
+
+
+class InstanceStats:
+    def __init__(self):
+        """Call counts and timings of the operations of an FMU instance."""
+        self._lock = threading.Lock()
+        self._calls: dict[str, CallStats] = {}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(operations={list(self._calls)})"
+
+    def record(self, operation: str, elapsed: float) -> None:
+        """Record the duration of a call of an operation in seconds."""
+        with self._lock:
+            calls = self._calls.get(operation)
+            if calls is None:
+                calls = self._calls[operation] = CallStats()
+            calls.record(elapsed)
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """Return the timings of every operation, keyed by operation name."""
+        with self._lock:
+            return {operation: calls.as_dict() for operation, calls in self._calls.items()}
+
+    def clear(self) -> None:
+        """Forget all recorded calls."""
+        with self._lock:
+            self._calls.clear()
+
+
+def timed(operation: str) -> Callable[[F], F]:
+    """Record the duration of every call of a method in the `_stats` of its instance.
+
+    When the instance has no stats enabled, the method is called directly, which costs a
+    single attribute lookup per call.
+
+    Args:
+        operation: Name the calls are recorded under.
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            stats = self._stats
+            if stats is None:
+                return func(self, *args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                stats.record(operation, perf_counter() - start)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
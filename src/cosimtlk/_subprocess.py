@@ -0,0 +1,431 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+from collections.abc import Mapping, Sequence
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+from multiprocessing.context import BaseContext
+from time import perf_counter
+
+import numpy as np
+
+from cosimtlk._fmu import FMU, FMUInstance, FMUInstanceBase
+from cosimtlk._stats import timed
+from cosimtlk.models import FMUInputType
+
+logger = logging.getLogger(__name__)
+
+_OUTPUT_TYPES = {
+    "Real": float,
+    "Integer": int,
+    "Enumeration": int,
+    "Boolean": bool,
+}
+
+
+class _SharedLayout:
+    def __init__(self, fmu: FMU, outputs: Sequence[str] | None = None):
+        """Layout of the shared memory block of a subprocess instance.
+
+        The block is a float array with a slot for every numeric input followed by a slot for
+        every numeric output, in the order of the model description. String variables do not
+        fit in the block and are sent along with the commands instead. Only the selected
+        outputs get a slot, all outputs of the model if none were selected.
+        """
+        selected_outputs = fmu._select_outputs(outputs)
+        self.input_names = tuple(input_.name for input_ in fmu.inputs if input_.type != "String")
+        self.input_slots = {name: slot for slot, name in enumerate(self.input_names)}
+        self.string_input_names = frozenset(input_.name for input_ in fmu.inputs if input_.type == "String")
+
+        numeric_outputs = [output for output in selected_outputs if output.type != "String"]
+        self.output_offset = len(self.input_names)
+        self.output_casts = tuple((output.name, _OUTPUT_TYPES[output.type]) for output in numeric_outputs)
+        self.string_output_names = tuple(output.name for output in selected_outputs if output.type == "String")
+        self.size = max(1, self.output_offset + len(numeric_outputs))
+
+
+class _Worker:
+    def __init__(self, instance: FMUInstance, layout: _SharedLayout, buffer: np.ndarray):
+        self._instance = instance
+        self._layout = layout
+        self._inputs = buffer[: layout.output_offset]
+        self._outputs = buffer[layout.output_offset :]
+        # Input names of every set of input slots seen so far
+        self._slot_names: dict[tuple[int, ...], tuple[str, ...]] = {}
+
+    def _input_values(self, slots: tuple[int, ...], string_values: dict[str, str]) -> dict[str, FMUInputType]:
+        names = self._slot_names.get(slots)
+        if names is None:
+            names = self._slot_names[slots] = tuple(self._layout.input_names[slot] for slot in slots)
+        values = dict(zip(names, self._inputs[list(slots)].tolist(), strict=True))
+        values.update(string_values)
+        return values
+
+    def _result(self) -> tuple[int | float, tuple[str, ...]]:
+        # The numeric outputs are already in the shared buffer
+        return self._instance.current_time, self._instance.read_string_outputs()
+
+    def _read_outputs(self) -> tuple[int | float, tuple[str, ...]]:
+        self._instance.read_outputs_array(out=self._outputs)
+        return self._result()
+
+    def step(self, slots: tuple[int, ...], string_values: dict[str, str]) -> tuple:
+        self._instance.step_array(input_values=self._input_values(slots, string_values), out=self._outputs)
+        return self._result()
+
+    def advance(self, until: int | float, slots: tuple[int, ...], string_values: dict[str, str]) -> tuple:
+        self._instance.advance_array(until, input_values=self._input_values(slots, string_values), out=self._outputs)
+        return self._result()
+
+    def set_inputs(self, slots: tuple[int, ...], string_values: dict[str, str]) -> None:
+        self._instance.set_inputs(self._input_values(slots, string_values))
+
+    def read_outputs(self) -> tuple:
+        return self._read_outputs()
+
+    def reset(self, start_time: int | float, step_size: int | float, start_values: dict[str, FMUInputType]) -> None:
+        self._instance.reset(start_time=start_time, step_size=step_size, start_values=start_values)
+
+    def change_parameters(self, parameters: dict[str, FMUInputType]) -> None:
+        self._instance.change_parameters(parameters)
+
+    def simulate_trajectory(self, times: np.ndarray, inputs: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        return self._instance.simulate_trajectory(times, inputs=inputs)
+
+
+def _send_error(conn: Connection, error: Exception) -> None:
+    try:
+        conn.send(("error", error))
+    except Exception:
+        # The exception cannot be pickled
+        conn.send(("error", RuntimeError(repr(error))))
+
+
+def _serve(
+    conn: Connection,
+    *,
+    fmu_path: str,
+    shm_name: str,
+    start_time: int | float,
+    step_size: int | float,
+    start_values: dict[str, FMUInputType],
+    advance_step_size: int | float | None,
+    outputs: Sequence[str] | None,
+) -> None:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    instance = None
+    worker = None
+    try:
+        fmu = FMU(fmu_path)
+        layout = _SharedLayout(fmu, outputs)
+        instance = FMUInstance(
+            fmu,
+            start_time=start_time,
+            step_size=step_size,
+            start_values=start_values,
+            advance_step_size=advance_step_size,
+            outputs=outputs,
+        )
+        worker = _Worker(instance, layout, np.ndarray((layout.size,), dtype=np.float64, buffer=shm.buf))
+        conn.send(("ok", None))
+    except Exception as e:
+        _send_error(conn, e)
+
+    closing = False
+    while worker is not None and not closing:
+        try:
+            command, args = conn.recv()
+        except EOFError:
+            break
+        if command == "close":
+            closing = True
+            continue
+        try:
+            result = getattr(worker, command)(*args)
+        except Exception as e:
+            _send_error(conn, e)
+        else:
+            conn.send(("ok", result))
+
+    # Drop the views on the shared memory before closing it
+    worker = None
+    if instance is not None:
+        instance.close()
+    shm.close()
+    if closing:
+        conn.send(("ok", None))
+    conn.close()
+
+
+class SubprocessFMUInstance(FMUInstanceBase):
+    def __init__(
+        self,
+        fmu: FMU,
+        start_time: int | float,
+        step_size: int | float,
+        start_values: dict[str, FMUInputType] | None = None,
+        *,
+        advance_step_size: int | float | None = None,
+        outputs: Sequence[str] | None = None,
+        mp_context: BaseContext | None = None,
+        stats: bool = False,
+    ):
+        """FMU instance hosted in a dedicated worker process.
+
+        The numeric inputs and outputs are exchanged through a shared memory block, so only
+        the command and the slots of the written inputs cross the pipe to the worker. Running
+        the model in its own process sidesteps the GIL, keeps a crashing model from taking down
+        the calling process and allows models that can only be instantiated once per process
+        to be instantiated many times.
+
+        Args:
+            fmu: The FMU to instantiate.
+            start_time: Start time of the simulation.
+            step_size: Step size of the simulation.
+            start_values (optional): Start values of the simulation. Defaults to None.
+            advance_step_size (optional): Largest communication step taken by advance(), see `FMU.instantiate`.
+                Defaults to None.
+            outputs (optional): Names of the outputs to read after every step. Defaults to None (all outputs).
+            mp_context (optional): Multiprocessing context of the worker process. Defaults to None (spawn).
+            stats (optional): Record the number and duration of the calls made on the instance. Defaults to False.
+        """
+        if stats:
+            self.enable_stats()
+        created_at = perf_counter()
+        self._initialized = False
+        self._fmu = fmu
+        self._current_time = start_time
+        self._step_size = step_size
+
+        self._layout = _SharedLayout(fmu, outputs)
+        self._shm = shared_memory.SharedMemory(create=True, size=self._layout.size * np.dtype(np.float64).itemsize)
+        buffer = np.ndarray((self._layout.size,), dtype=np.float64, buffer=self._shm.buf)
+        self._input_buffer = buffer[: self._layout.output_offset]
+        self._output_buffer = buffer[self._layout.output_offset :]
+
+        context = mp_context or multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=_serve,
+            args=(child_conn,),
+            kwargs={
+                "fmu_path": fmu._fmu_path,
+                "shm_name": self._shm.name,
+                "start_time": start_time,
+                "step_size": step_size,
+                "start_values": start_values or {},
+                "advance_step_size": advance_step_size,
+                "outputs": list(outputs) if outputs is not None else None,
+            },
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+
+        self._initialized = True
+        try:
+            self._receive()
+        except Exception:
+            self.close()
+            raise
+        if self._stats is not None:
+            self._stats.record("instantiate", perf_counter() - created_at)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(model_name={self._fmu.model_description.modelName})"
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._initialized
+
+    @property
+    def step_size(self) -> int | float:
+        """Return the step size of the FMU."""
+        return self._step_size
+
+    @property
+    def current_time(self) -> int | float:
+        """Return the current time of the FMU."""
+        return self._current_time
+
+    @property
+    def pid(self) -> int | None:
+        """Return the process id of the worker process."""
+        return self._process.pid
+
+    def close(self) -> None:
+        """Closes the FMU and stops the worker process."""
+        if not getattr(self, "_initialized", False):
+            return
+        self._initialized = False
+        try:
+            if self._process.is_alive():
+                self._conn.send(("close", ()))
+                self._conn.recv()
+        except (EOFError, OSError):
+            pass
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            logger.warning(f"Killing unresponsive FMU worker process {self._process.pid}.")
+            self._process.kill()
+            self._process.join()
+        self._conn.close()
+        # Drop the views on the shared memory before releasing it
+        self._input_buffer = self._output_buffer = None
+        self._shm.close()
+        self._shm.unlink()
+
+    @timed("reset")
+    def reset(
+        self,
+        *,
+        start_time: int | float,
+        step_size: int | float,
+        start_values: dict[str, FMUInputType],
+    ) -> SubprocessFMUInstance:
+        """Reset the FMU.
+
+        Args:
+            start_time: Start time of the simulation.
+            step_size: Step size of the simulation.
+            start_values: Start values of the simulation.
+
+        Returns:
+            The FMU instance.
+        """
+        self._call("reset", start_time, step_size, start_values)
+        self._current_time = start_time
+        self._step_size = step_size
+        return self
+
+    @timed("step")
+    def step(self, *, input_values: dict[str, FMUInputType] | None = None) -> dict[str, FMUInputType]:
+        """Do a single step of the FMU.
+
+        Args:
+            input_values (optional): Input values for the step. Defaults to None.
+
+        Returns:
+            The outputs of the FMU.
+        """
+        return self._outputs(*self._call("step", *self._write_inputs(input_values)))
+
+    @timed("advance")
+    def advance(self, until: int, *, input_values: dict[str, FMUInputType] | None = None) -> dict[str, FMUInputType]:
+        """Advance the FMU until a given time.
+
+        Args:
+            until: Time to advance to.
+            input_values (optional): Input values for the advance. Defaults to None.
+
+        Returns:
+            The outputs of the FMU.
+        """
+        return self._outputs(*self._call("advance", until, *self._write_inputs(input_values)))
+
+    @timed("set_inputs")
+    def set_inputs(self, values: dict[str, FMUInputType]) -> None:
+        """Sets the inputs of the FMU.
+
+        Args:
+            values: Input values to set. Keys are the names of the FMU inputs.
+        """
+        if values:
+            self._call("set_inputs", *self._write_inputs(values))
+
+    @timed("read_outputs")
+    def read_outputs(self) -> dict[str, FMUInputType]:
+        """Read the outputs of the FMU.
+
+        Returns:
+            The outputs of the FMU.
+        """
+        return self._outputs(*self._call("read_outputs"))
+
+    @timed("change_parameters")
+    def change_parameters(self, parameters: dict[str, FMUInputType]) -> SubprocessFMUInstance:
+        """Change the parameters of the FMU.
+
+        Args:
+            parameters: Parameters to change. Keys are the names of the FMU parameters.
+
+        Returns:
+            The FMU instance.
+        """
+        self._call("change_parameters", parameters)
+        return self
+
+    @timed("simulate_trajectory")
+    def simulate_trajectory(
+        self,
+        times: Sequence[int | float],
+        inputs: Mapping[str, Sequence[FMUInputType]] | None = None,
+    ) -> dict[str, np.ndarray]:
+        """Simulate the FMU along a sequence of communication points in the worker process.
+
+        Args:
+            times: Increasing times to advance to.
+            inputs (optional): Input time series with one value per time, keyed by input name.
+                A DataFrame with one column per input can be used as well. Defaults to None.
+
+        Returns:
+            The outputs at every time, keyed by output name, including the `current_time`.
+        """
+        inputs = inputs if inputs is not None else {}
+        trajectory = self._call(
+            "simulate_trajectory",
+            np.asarray(times),
+            {name: np.asarray(values) for name, values in inputs.items()},
+        )
+        if len(trajectory["current_time"]):
+            self._current_time = trajectory["current_time"][-1].item()
+        return trajectory
+
+    def _write_inputs(self, values: dict[str, FMUInputType] | None) -> tuple[tuple[int, ...], dict[str, str]]:
+        if not values:
+            return (), {}
+        slots = []
+        string_values = {}
+        for name, value in values.items():
+            slot = self._layout.input_slots.get(name)
+            if slot is not None:
+                self._input_buffer[slot] = value
+                slots.append(slot)
+            elif name in self._layout.string_input_names:
+                string_values[name] = value
+            else:
+                raise KeyError(name)
+        return tuple(slots), string_values
+
+    def _outputs(self, current_time: int | float, strings: tuple[str, ...]) -> dict[str, FMUInputType]:
+        self._current_time = current_time
+        outputs = {"current_time": current_time}
+        for (name, cast), value in zip(self._layout.output_casts, self._output_buffer.tolist(), strict=True):
+            outputs[name] = cast(value)
+        outputs.update(zip(self._layout.string_output_names, strings, strict=True))
+        return outputs
+
+    def _call(self, command: str, *args):
+        self.check_is_initialized(msg=f"Cannot call {command}() on an uninitialized fmu.")
+        try:
+            self._conn.send((command, args))
+        except OSError as e:
+            self._worker_died(e)
+        return self._receive()
+
+    def _receive(self):
+        try:
+            status, payload = self._conn.recv()
+        except (EOFError, OSError) as e:
+            self._worker_died(e)
+        if status == "error":
+            raise payload
+        return payload
+
+    def _worker_died(self, error: Exception) -> None:
+        self._process.join(timeout=5)
+        exitcode = self._process.exitcode
+        self.close()
+        msg = f"The FMU worker process exited unexpectedly with exit code {exitcode}."
+        raise RuntimeError(msg) from error
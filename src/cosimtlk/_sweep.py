@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import itertools
+import math
+import os
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from multiprocessing.context import BaseContext
+from pathlib import Path
+
+import numpy as np
+
+from cosimtlk._fmu import FMU
+from cosimtlk._pool import FMUInstancePool
+from cosimtlk.models import FMUInputType
+
+# Instance pool of the FMU loaded by a sweep worker process
+_worker_pool: FMUInstancePool | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class SweepResult:
+    index: int
+    parameters: dict[str, FMUInputType]
+    outputs: dict[str, np.ndarray]
+
+
+def _initialize_worker(fmu_path: str) -> None:
+    global _worker_pool  # noqa: PLW0603
+    _worker_pool = FMUInstancePool(FMU(fmu_path))
+
+
+def _chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def _run_chunk(
+    chunk: list[tuple[int, dict[str, FMUInputType]]],
+    start_time: int | float,
+    step_size: int | float,
+    times: np.ndarray,
+    inputs: dict[str, np.ndarray],
+) -> list[SweepResult]:
+    results = []
+    for index, parameters in chunk:
+        with _worker_pool.borrow(start_time=start_time, step_size=step_size, start_values=parameters) as instance:
+            outputs = instance.simulate_trajectory(times, inputs=inputs)
+        results.append(SweepResult(index=index, parameters=parameters, outputs=outputs))
+    return results
+
+
+def sweep(
+    fmu: FMU | str | Path,
+    parameter_grid: Iterable[dict[str, FMUInputType]],
+    *,
+    start_time: int | float,
+    stop_time: int | float,
+    step_size: int | float,
+    inputs: Mapping[str, Sequence[FMUInputType]] | None = None,
+    chunk_size: int = 1,
+    max_workers: int | None = None,
+    mp_context: BaseContext | None = None,
+) -> Iterator[SweepResult]:
+    """Simulate an FMU for many sets of start values on a process pool.
+
+    Every worker process loads the FMU once and recycles its instances between simulations.
+    Results are yielded as soon as their chunk finishes, so they are not in the order of the grid.
+
+    Args:
+        fmu: The FMU, or the path to it, to simulate.
+        parameter_grid: Start values of every simulation, for example from `grid`, `random_design`
+            or `latin_hypercube`. The grid is consumed lazily.
+        start_time: Start time of the simulations.
+        stop_time: Stop time of the simulations.
+        step_size: Step size of the simulations, outputs are recorded after every step.
+        inputs (optional): Input time series with one value per step, keyed by input name. Defaults to None.
+        chunk_size (optional): Number of simulations sent to a worker at once. Defaults to 1.
+        max_workers (optional): Number of worker processes. Defaults to None (number of processors).
+        mp_context (optional): Multiprocessing context of the worker processes. Defaults to None.
+
+    Yields:
+        The result of every simulation, with its index in the parameter grid.
+    """
+    if chunk_size < 1:
+        msg = "The chunk size must be positive."
+        raise ValueError(msg)
+    if max_workers is not None and max_workers < 1:
+        msg = "The number of workers must be positive."
+        raise ValueError(msg)
+    if stop_time < start_time:
+        msg = "The stop time must not be before the start time."
+        raise ValueError(msg)
+
+    fmu_path = fmu._fmu_path if isinstance(fmu, FMU) else str(Path(fmu).resolve())
+    steps = math.ceil((stop_time - start_time) / step_size)
+    times = start_time + step_size * np.arange(1, steps + 1)
+    inputs = {name: np.asarray(values) for name, values in (inputs or {}).items()}
+
+    max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+    chunks = _chunked(enumerate(parameter_grid), chunk_size)
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=mp_context,
+        initializer=_initialize_worker,
+        initargs=(fmu_path,),
+    ) as executor:
+        # Keep every worker busy while bounding the number of chunks in memory
+        max_pending = 2 * max_workers
+        pending: set[Future] = set()
+        for chunk in itertools.islice(chunks, max_pending):
+            pending.add(executor.submit(_run_chunk, chunk, start_time, step_size, times, inputs))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for chunk in itertools.islice(chunks, len(done)):
+                pending.add(executor.submit(_run_chunk, chunk, start_time, step_size, times, inputs))
+            for future in done:
+                yield from future.result()
+
+
+def grid(values: Mapping[str, Sequence[FMUInputType]]) -> Iterator[dict[str, FMUInputType]]:
+    """Full factorial design over the given values.
+
+    Args:
+        values: Values to combine, keyed by parameter name.
+
+    Yields:
+        Every combination of the values.
+    """
+    names = list(values)
+    for combination in itertools.product(*(values[name] for name in names)):
+        yield dict(zip(names, combination, strict=True))
+
+
+def random_design(
+    bounds: Mapping[str, tuple[float, float]],
+    n: int,
+    *,
+    seed: int | None = None,
+) -> Iterator[dict[str, float]]:
+    """Uniform random samples within the given bounds.
+
+    Args:
+        bounds: Lower and upper bound, keyed by parameter name.
+        n: Number of samples.
+        seed (optional): Seed of the random number generator. Defaults to None.
+
+    Yields:
+        The sampled parameters.
+    """
+    rng = np.random.default_rng(seed)
+    names = list(bounds)
+    for _ in range(n):
+        yield {name: float(rng.uniform(*bounds[name])) for name in names}
+
+
+def latin_hypercube(
+    bounds: Mapping[str, tuple[float, float]],
+    n: int,
+    *,
+    seed: int | None = None,
+) -> Iterator[dict[str, float]]:
+    """Latin hypercube samples within the given bounds.
+
+    The range of every parameter is divided into `n` equally sized strata, and every
+    stratum is sampled exactly once.
+
+    Args:
+        bounds: Lower and upper bound, keyed by parameter name.
+        n: Number of samples.
+        seed (optional): Seed of the random number generator. Defaults to None.
+
+    Yields:
+        The sampled parameters.
+    """
+    rng = np.random.default_rng(seed)
+    names = list(bounds)
+    samples = {}
+    for name in names:
+        lower, upper = bounds[name]
+        strata = (rng.permutation(n) + rng.uniform(size=n)) / n
+        samples[name] = lower + strata * (upper - lower)
+    for i in range(n):
+        yield {name: float(samples[name][i]) for name in names}
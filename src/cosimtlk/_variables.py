@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from operator import itemgetter
+from typing import TYPE_CHECKING
+
+import numpy as np
+from fmpy.fmi2 import _FMU2, fmi2Boolean, fmi2Integer, fmi2Real, fmi2String, fmi2ValueReference
+from fmpy.model_description import ScalarVariable
+
+from cosimtlk.models import FMUInputType
+
+if TYPE_CHECKING:
+    from cosimtlk._fmu import FMUInstance
+
+# Enumerations are exchanged through the Integer functions of the FMI
+_FMI_TYPES = {
+    "Real": "Real",
+    "Integer": "Integer",
+    "Boolean": "Boolean",
+    "String": "String",
+    "Enumeration": "Integer",
+}
+
+_CTYPES = {
+    "Real": fmi2Real,
+    "Integer": fmi2Integer,
+    "Boolean": fmi2Boolean,
+    "String": fmi2String,
+}
+
+
+def _to_real(value: FMUInputType) -> float:
+    return float(value)
+
+
+def _to_integer(value: FMUInputType) -> int:
+    return int(value)
+
+
+def _to_boolean(value: FMUInputType) -> int:
+    return 1 if value else 0
+
+
+def _to_string(value: FMUInputType) -> bytes:
+    return str(value).encode("utf-8")
+
+
+_CONVERTERS = {
+    "Real": _to_real,
+    "Integer": _to_integer,
+    "Boolean": _to_boolean,
+    "String": _to_string,
+}
+
+
+class _TypeGroup:
+    __slots__ = (
+        "converter",
+        "getter",
+        "index",
+        "partial_refs",
+        "positions",
+        "read",
+        "ref_list",
+        "refs",
+        "setter",
+        "size",
+        "type",
+        "values",
+        "view",
+    )
+
+    def __init__(self, fmi_type: str, refs: list[int], positions: list[int]):
+        self.type = fmi_type
+        self.size = len(refs)
+        self.refs = (fmi2ValueReference * self.size)(*refs)
+        self.ref_list = tuple(refs)
+        # Filled with the references of the changed variables when only part of the group is written
+        self.partial_refs = (fmi2ValueReference * self.size)()
+        self.values = (_CTYPES[fmi_type] * self.size)()
+        self.converter = _CONVERTERS[fmi_type]
+        self.setter = f"fmi2Set{fmi_type}"
+        self.read = f"fmi2Get{fmi_type}"
+        self.positions = tuple(positions)
+        # Numeric values are copied into arrays through a view on the ctypes buffer
+        self.view = np.ctypeslib.as_array(self.values) if fmi_type != "String" else None
+        if positions == list(range(positions[0], positions[0] + self.size)):
+            self.index = slice(positions[0], positions[0] + self.size)
+        else:
+            self.index = np.asarray(positions, dtype=np.intp)
+        # Always return a tuple, even for groups with a single variable
+        self.getter = itemgetter(*positions) if self.size > 1 else lambda values, p=positions[0]: (values[p],)
+
+
+class VariableBatch:
+    def __init__(self, variables: Sequence[ScalarVariable]):
+        """Precompiled value references of a fixed sequence of variables.
+
+        The variables are grouped by their FMI type once, and every write issues a single
+        FMI call per type using reusable ctypes arrays.
+
+        Args:
+            variables: The variables of the batch. Values are passed in the same order.
+        """
+        self.variables = tuple(variables)
+        self.names = tuple(variable.name for variable in self.variables)
+
+        refs: dict[str, list[int]] = {}
+        positions: dict[str, list[int]] = {}
+        for position, variable in enumerate(self.variables):
+            fmi_type = _FMI_TYPES.get(variable.type)
+            if fmi_type is None:
+                msg = f"Unknown variable type '{variable.type}' for variable '{variable.name}'."
+                raise ValueError(msg)
+            refs.setdefault(fmi_type, []).append(variable.valueReference)
+            positions.setdefault(fmi_type, []).append(position)
+
+        self._groups = tuple(
+            _TypeGroup(fmi_type, refs[fmi_type], positions[fmi_type]) for fmi_type in _CTYPES if fmi_type in refs
+        )
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(names={self.names})"
+
+    def __len__(self):
+        return len(self.variables)
+
+    @property
+    def is_numeric(self) -> bool:
+        """Whether the batch can be read into a numeric array, i.e. it contains no String variables."""
+        return all(group.type != "String" for group in self._groups)
+
+    def write(
+        self,
+        instance: _FMU2,
+        values: Sequence[FMUInputType],
+        changed: Sequence[bool] | None = None,
+    ) -> None:
+        """Write the values of the variables to an FMU instance.
+
+        Args:
+            instance: The FMI instance to write to.
+            values: The values of the variables, in the order of the batch.
+            changed (optional): Whether each value has to be written, in the order of the batch. Variables
+                whose value is not written keep their value in the FMU. Defaults to None (write all values).
+        """
+        component = instance.component
+        for group in self._groups:
+            buffer = group.values
+            if changed is None or all(changed[position] for position in group.positions):
+                buffer[:] = list(map(group.converter, group.getter(values)))
+                getattr(instance, group.setter)(component, group.refs, group.size, buffer)
+                continue
+
+            # Pack the changed variables at the front of the reusable arrays and write only those
+            size = 0
+            for position, ref in zip(group.positions, group.ref_list, strict=True):
+                if changed[position]:
+                    group.partial_refs[size] = ref
+                    buffer[size] = group.converter(values[position])
+                    size += 1
+            if size:
+                getattr(instance, group.setter)(component, group.partial_refs, size, buffer)
+
+    def read(self, instance: _FMU2) -> list[FMUInputType]:
+        """Read the values of the variables from an FMU instance.
+
+        Args:
+            instance: The FMI instance to read from.
+
+        Returns:
+            The values of the variables, in the order of the batch.
+        """
+        component = instance.component
+        values: list[FMUInputType] = [None] * len(self.variables)  # type: ignore[list-item]
+        for group in self._groups:
+            getattr(instance, group.read)(component, group.refs, group.size, group.values)
+            group_values = group.values[:]
+            if group.type == "Boolean":
+                group_values = [bool(value) for value in group_values]
+            elif group.type == "String":
+                group_values = [value.decode("utf-8") if value is not None else None for value in group_values]
+            for position, value in zip(group.positions, group_values, strict=True):
+                values[position] = value
+        return values
+
+    def read_into(self, instance: _FMU2, out: np.ndarray) -> np.ndarray:
+        """Read the values of the variables into a preallocated array.
+
+        Args:
+            instance: The FMI instance to read from.
+            out: One dimensional array with one element per variable, in the order of the batch.
+
+        Returns:
+            The array that was written to.
+        """
+        component = instance.component
+        for group in self._groups:
+            if group.view is None:
+                msg = "Cannot read String variables into a numeric array."
+                raise ValueError(msg)
+            getattr(instance, group.read)(component, group.refs, group.size, group.values)
+            out[group.index] = group.view
+        return out
+
+
+class VariableGroup:
+    def __init__(self, instance: FMUInstance, variables: Sequence[ScalarVariable]):
+        """Handle on a fixed group of variables of an FMU instance.
+
+        The names are resolved to their types and value references once, after which every
+        `get` and `set` issues a single FMI call per variable type. Obtain a group with
+        `FMUInstance.bind`.
+
+        Args:
+            instance: The FMU instance the variables belong to.
+            variables: The variables of the group. Values are passed and returned in the same order.
+        """
+        self._instance = instance
+        self._batch = VariableBatch(variables)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(names={self.names})"
+
+    def __len__(self):
+        return len(self._batch)
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        """Return the names of the variables, in the order of the values."""
+        return self._batch.names
+
+    def get(self, out: np.ndarray | None = None) -> np.ndarray:
+        """Read the values of the variables.
+
+        Args:
+            out (optional): Float array with one element per variable to read the values into.
+                Only supported for groups without String variables. Defaults to None, which allocates a new array.
+
+        Returns:
+            The values as a float array, or as an object array if the group contains String variables.
+        """
+        self._instance.check_is_initialized(msg="Cannot read variables of an uninitialized FMU.")
+        if not self._batch.is_numeric:
+            if out is not None:
+                msg = "Cannot read String variables into a numeric array."
+                raise ValueError(msg)
+            return np.asarray(self._batch.read(self._instance._instance), dtype=object)
+        if out is None:
+            out = np.empty(len(self._batch), dtype=np.float64)
+        return self._batch.read_into(self._instance._instance, out)
+
+    def set(self, values: Sequence[FMUInputType] | np.ndarray | Mapping[str, FMUInputType]) -> None:
+        """Write the values of the variables.
+
+        Only variables which may be set in the current state of the FMU can be written,
+        e.g. inputs and tunable parameters during a simulation.
+
+        Args:
+            values: One value per variable in the order of `names`, or the values keyed by name.
+        """
+        self._instance.check_is_initialized(msg="Cannot write variables of an uninitialized FMU.")
+        if isinstance(values, Mapping):
+            values = [values[name] for name in self._batch.names]
+        if len(values) != len(self._batch):
+            msg = f"Expected {len(self._batch)} values but got {len(values)}."
+            raise ValueError(msg)
+        self._instance._write_variables(self._batch, values)
+        self._instance._invalidate_inputs(self._batch.names)
+
+    def as_dict(self) -> dict[str, FMUInputType]:
+        """Read the values of the variables, keyed by name.
+
+        Returns:
+            The values of the variables as Python objects.
+        """
+        self._instance.check_is_initialized(msg="Cannot read variables of an uninitialized FMU.")
+        return dict(zip(self._batch.names, self._batch.read(self._instance._instance), strict=True))
@@ -3,6 +3,10 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     fmu_dir: str = "./fmus"
+    # Calls waiting or running on a simulator before further calls are rejected with 429
+    max_queued_calls: int = 16
+    # Seconds a call may wait for its simulator before it is rejected with 503
+    queue_timeout: float | None = 30.0
 
     class Config:
         env_prefix = "COSIMTLK_"  # defaults to no prefix, i.e. ""
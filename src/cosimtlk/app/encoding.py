@@ -0,0 +1,59 @@
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from cosimtlk._encoding import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, is_msgpack, pack, unpack
+
+
+class MsgPackRequest(Request):
+    """Request with a MessagePack body, which is validated like a JSON body."""
+
+    @property
+    def headers(self) -> Headers:
+        if not hasattr(self, "_msgpack_headers"):
+            # FastAPI only parses bodies with a JSON content type
+            raw = [
+                (key, JSON_MEDIA_TYPE.encode("latin-1") if key == b"content-type" else value)
+                for key, value in self.scope["headers"]
+            ]
+            self._msgpack_headers = Headers(raw=raw)
+        return self._msgpack_headers
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = unpack(await self.body())
+        return self._json
+
+
+class MsgPackRoute(APIRoute):
+    """Route accepting request bodies encoded as JSON or MessagePack."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            if is_msgpack(request.headers.get("content-type")):
+                request = MsgPackRequest(request.scope, request.receive)
+            return await handler(request)
+
+        return route_handler
+
+
+def encoded_response(request: Request, *, content: Any, status_code: int = 200) -> Response:
+    """Encode the content of a response in the format accepted by the client.
+
+    Args:
+        request: The request to respond to.
+        content: Content of the response.
+        status_code (optional): Status code of the response. Defaults to 200.
+
+    Returns:
+        A MessagePack response if the client accepts it, a JSON response otherwise.
+    """
+    if is_msgpack(request.headers.get("accept")):
+        return Response(content=pack(content), status_code=status_code, media_type=MSGPACK_MEDIA_TYPE)
+    return JSONResponse(content=content, status_code=status_code)
@@ -1,7 +1,9 @@
 import logging
+from pathlib import Path
 
 from fastapi import FastAPI
 
+from cosimtlk.app.config import settings
 from cosimtlk.app.routers import fmus, simulators
 
 logger = logging.getLogger(__name__)
@@ -11,6 +13,12 @@ app.include_router(fmus.router)
 app.include_router(simulators.router)
 
 
+@app.on_event("startup")
+def startup_event():
+    # Loading a library changes the working directory for a moment, so FMUs are looked up by absolute path
+    settings.fmu_dir = str(Path(settings.fmu_dir).resolve())
+
+
 @app.on_event("shutdown")
 def shutdown_event():
     from cosimtlk.app.services.simulator import simulator_service
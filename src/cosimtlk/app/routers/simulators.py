@@ -1,17 +1,42 @@
 import logging
+import queue
 from pathlib import Path
 
-from fastapi import APIRouter, Body, Response
+from fastapi import APIRouter, Body, Request, Response, WebSocket, WebSocketDisconnect
 from starlette.responses import JSONResponse
 
 from cosimtlk.app.config import settings
-from cosimtlk.app.schemas import SimulatorCreateModel, SimulatorModel
-from cosimtlk.app.services.simulator import simulator_service
+from cosimtlk.app.encoding import MsgPackRoute, encoded_response
+from cosimtlk.app.schemas import (
+    BatchAdvanceModel,
+    BatchStepModel,
+    SimulatorCreateModel,
+    SimulatorModel,
+    TrajectoryModel,
+)
+from cosimtlk.app.services.session import serve_session
+from cosimtlk.app.services.simulator import UnknownSimulatorError, simulator_service
 from cosimtlk.models import FMUInputType
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/simulators", tags=["Simulators"])
+# Simulator routes exchange JSON by default, and MessagePack with clients asking for it
+router = APIRouter(prefix="/simulators", tags=["Simulators"], route_class=MsgPackRoute)
+
+
+def overloaded_response(request: Request, error: Exception) -> Response:
+    """Respond to a call rejected by the executor of a simulator.
+
+    Args:
+        request: The request to respond to.
+        error: The rejection, `queue.Full` if the simulator has too many calls queued,
+            `TimeoutError` if the call waited too long for the simulator.
+
+    Returns:
+        A 429 response if the queue of the simulator is full, a 503 response otherwise.
+    """
+    status_code = 429 if isinstance(error, queue.Full) else 503
+    return encoded_response(request, status_code=status_code, content={"error": str(error)})
 
 
 @router.get("/", response_model=list[SimulatorModel])
@@ -28,15 +53,61 @@ def create_simulator(
     if not fmu_path.exists():
         return Response(status_code=404)
 
-    simulator = simulator_service.create(
-        path=fmu_path,
-        start_values=data.start_values,
-        start_time=data.start_time,
-        step_size=data.step_size,
-    )
+    try:
+        simulator = simulator_service.create(
+            path=fmu_path,
+            start_values=data.start_values,
+            start_time=data.start_time,
+            step_size=data.step_size,
+            outputs=data.outputs,
+        )
+    except KeyError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     return simulator
 
 
+# Batch routes are registered before the routes of a single simulator, which would match them as well
+@router.post("/batch/step")
+async def step_many(request: Request, entries: list[BatchStepModel]):
+    try:
+        results = await simulator_service.run_many(
+            [
+                (entry.id, lambda simulator, entry=entry: simulator.step(input_values=entry.input_values))
+                for entry in entries
+            ]
+        )
+    except UnknownSimulatorError as e:
+        return encoded_response(request, status_code=404, content={"error": str(e)})
+    except (queue.Full, TimeoutError) as e:
+        return overloaded_response(request, e)
+    except Exception as e:
+        logger.exception(e)
+        return encoded_response(request, status_code=500, content={"error": str(e)})
+    return encoded_response(request, status_code=200, content=results)
+
+
+@router.post("/batch/advance")
+async def advance_many(request: Request, entries: list[BatchAdvanceModel]):
+    try:
+        results = await simulator_service.run_many(
+            [
+                (
+                    entry.id,
+                    lambda simulator, entry=entry: simulator.advance(entry.until, input_values=entry.input_values),
+                )
+                for entry in entries
+            ]
+        )
+    except UnknownSimulatorError as e:
+        return encoded_response(request, status_code=404, content={"error": str(e)})
+    except (queue.Full, TimeoutError) as e:
+        return overloaded_response(request, e)
+    except Exception as e:
+        logger.exception(e)
+        return encoded_response(request, status_code=500, content={"error": str(e)})
+    return encoded_response(request, status_code=200, content=results)
+
+
 @router.get("/{id}", response_model=SimulatorModel)
 def get_simulator(id: str):  # noqa: A002
     try:
@@ -54,55 +125,136 @@ def delete_simulator(id: str):  # noqa: A002
         return Response(status_code=404)
 
 
+@router.websocket("/{id}/session")
+async def session(websocket: WebSocket, id: str):  # noqa: A002
+    try:
+        executor = simulator_service.get_executor(id)
+    except KeyError:
+        await websocket.close(code=4404, reason="Simulator not found.")
+        return
+    await websocket.accept()
+    try:
+        await serve_session(websocket, executor, timeout=simulator_service.queue_timeout)
+    except WebSocketDisconnect:
+        logger.debug(f"Session of simulator {id} disconnected.")
+
+
+# Calls on a simulator run on its executor, so that calls on the same simulator never interleave
 @router.get("/{id}/outputs")
-def read_outputs(id: str):  # noqa: A002
+async def read_outputs(request: Request, id: str):  # noqa: A002
     try:
-        simulator = simulator_service.get_simulator(id)
-        outputs = simulator.read_outputs()
+        executor = simulator_service.get_executor(id)
     except KeyError:
         return Response(status_code=404)
-    return JSONResponse(status_code=200, content=outputs)
+    try:
+        outputs = await simulator_service.run(executor, lambda simulator: simulator.read_outputs())
+    except (queue.Full, TimeoutError) as e:
+        return overloaded_response(request, e)
+    return encoded_response(request, status_code=200, content=outputs)
+
+
+@router.post("/{id}/inputs")
+async def set_inputs(request: Request, id: str, input_values: dict[str, FMUInputType] = Body({})):  # noqa: A002, B008
+    try:
+        executor = simulator_service.get_executor(id)
+    except KeyError:
+        return Response(status_code=404)
+    try:
+        await simulator_service.run(executor, lambda simulator: simulator.set_inputs(input_values))
+    except (queue.Full, TimeoutError) as e:
+        return overloaded_response(request, e)
+    except Exception as e:
+        logger.exception(e)
+        return encoded_response(request, status_code=500, content={"error": str(e)})
+    return encoded_response(request, status_code=200, content={"message": "Success"})
 
 
 @router.post("/{id}/step")
-def step(id: str, input_values: dict[str, FMUInputType] = Body({})):  # noqa: A002, B008
+async def step(request: Request, id: str, input_values: dict[str, FMUInputType] = Body({})):  # noqa: A002, B008
+    try:
+        executor = simulator_service.get_executor(id)
+    except KeyError:
+        return Response(status_code=404)
     try:
-        simulator = simulator_service.get_simulator(id)
-        result = simulator.step(input_values=input_values)
+        result = await simulator_service.run(executor, lambda simulator: simulator.step(input_values=input_values))
+    except (queue.Full, TimeoutError) as e:
+        return overloaded_response(request, e)
     except Exception as e:
         logger.exception(e)
-        return JSONResponse(status_code=500, content={"error": str(e)})
-    return JSONResponse(status_code=200, content=result)
+        return encoded_response(request, status_code=500, content={"error": str(e)})
+    return encoded_response(request, status_code=200, content=result)
 
 
 @router.post("/{id}/advance")
-def advance(id: str, until: int, input_values: dict[str, FMUInputType] = Body({})):  # noqa: A002, B008
+async def advance(request: Request, id: str, until: int, input_values: dict[str, FMUInputType] = Body({})):  # noqa: A002, B008
     try:
-        simulator = simulator_service.get_simulator(id)
-        result = simulator.advance(until, input_values=input_values)
+        executor = simulator_service.get_executor(id)
+    except KeyError:
+        return Response(status_code=404)
+    try:
+        result = await simulator_service.run(
+            executor, lambda simulator: simulator.advance(until, input_values=input_values)
+        )
+    except (queue.Full, TimeoutError) as e:
+        return overloaded_response(request, e)
     except ValueError as e:
         logger.exception(e)
-        return JSONResponse(status_code=500, content={"error": str(e)})
-    return JSONResponse(status_code=200, content=result)
+        return encoded_response(request, status_code=500, content={"error": str(e)})
+    return encoded_response(request, status_code=200, content=result)
+
+
+@router.post("/{id}/trajectory")
+async def simulate_trajectory(request: Request, id: str, data: TrajectoryModel):  # noqa: A002
+    try:
+        executor = simulator_service.get_executor(id)
+    except KeyError:
+        return Response(status_code=404)
+    try:
+        trajectory = await simulator_service.run(
+            executor, lambda simulator: simulator.simulate_trajectory(data.times, inputs=data.inputs)
+        )
+    except (queue.Full, TimeoutError) as e:
+        return overloaded_response(request, e)
+    except ValueError as e:
+        logger.exception(e)
+        return encoded_response(request, status_code=500, content={"error": str(e)})
+    return encoded_response(
+        request, status_code=200, content={name: values.tolist() for name, values in trajectory.items()}
+    )
 
 
 @router.put("/{id}/parameters")
-def change_parameters(id: str, parameters: dict[str, FMUInputType] = Body({})):  # noqa: A002, B008
+async def change_parameters(request: Request, id: str, parameters: dict[str, FMUInputType] = Body({})):  # noqa: A002, B008
     try:
-        simulator = simulator_service.get_simulator(id)
-        simulator.change_parameters(parameters)
+        executor = simulator_service.get_executor(id)
+    except KeyError:
+        return Response(status_code=404)
+    try:
+        await simulator_service.run(executor, lambda simulator: simulator.change_parameters(parameters))
+    except (queue.Full, TimeoutError) as e:
+        return overloaded_response(request, e)
     except ValueError as e:
         logger.exception(e)
-        return JSONResponse(status_code=500, content={"error": str(e)})
-    return JSONResponse(status_code=200, content={"message": "Success"})
+        return encoded_response(request, status_code=500, content={"error": str(e)})
+    return encoded_response(request, status_code=200, content={"message": "Success"})
 
 
 @router.post("/{id}/reset")
-def reset(id: str, data: SimulatorCreateModel):  # noqa: A002
+async def reset(request: Request, id: str, data: SimulatorCreateModel):  # noqa: A002
+    try:
+        executor = simulator_service.get_executor(id)
+    except KeyError:
+        return Response(status_code=404)
     try:
-        simulator = simulator_service.get_simulator(id)
-        simulator.reset(start_values=data.start_values, start_time=data.start_time, step_size=data.step_size)
+        await simulator_service.run(
+            executor,
+            lambda simulator: simulator.reset(
+                start_values=data.start_values, start_time=data.start_time, step_size=data.step_size
+            ),
+        )
+    except (queue.Full, TimeoutError) as e:
+        return overloaded_response(request, e)
     except Exception as e:
         logger.exception(e)
-        return JSONResponse(status_code=500, content={"error": str(e)})
-    return JSONResponse(status_code=200, content={"message": "Success"})
+        return encoded_response(request, status_code=500, content={"error": str(e)})
+    return encoded_response(request, status_code=200, content={"message": "Success"})
@@ -15,3 +15,20 @@ class SimulatorCreateModel(BaseModel):
     start_values: dict[str, FMUInputType]
     start_time: int
     step_size: int
+    outputs: list[str] | None = None
+
+
+class TrajectoryModel(BaseModel):
+    times: list[int | float]
+    inputs: dict[str, list[FMUInputType]] = {}
+
+
+class BatchStepModel(BaseModel):
+    id: str
+    input_values: dict[str, FMUInputType] = {}
+
+
+class BatchAdvanceModel(BaseModel):
+    id: str
+    until: int
+    input_values: dict[str, FMUInputType] = {}
@@ -0,0 +1,129 @@
+import asyncio
+import queue
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TypeVar
+
+from cosimtlk._fmu import FMUInstanceBase
+
+T = TypeVar("T")
+
+
+class SimulatorExecutor:
+    def __init__(self, simulator: FMUInstanceBase, *, max_queued: int = 16):
+        """Serialized executor of the calls on a simulator.
+
+        Calls run one after the other on a thread dedicated to the simulator, in the order they were
+        submitted. Calls on the same simulator never interleave, while calls on different simulators
+        run in parallel.
+
+        Args:
+            simulator: The simulator to call.
+            max_queued (optional): Maximum number of calls waiting or running. Defaults to 16.
+        """
+        if max_queued < 1:
+            msg = "The number of queued calls must be positive."
+            raise ValueError(msg)
+        self.simulator = simulator
+        self.max_queued = max_queued
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cosimtlk-simulator")
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(simulator={self.simulator}, pending={self._pending})"
+
+    @property
+    def pending(self) -> int:
+        """Return the number of calls waiting or running."""
+        return self._pending
+
+    def submit(self, func: Callable[[FMUInstanceBase], T]) -> Future[T]:
+        """Queue a call on the simulator.
+
+        Args:
+            func: Function to call with the simulator.
+
+        Returns:
+            The future result of the call.
+
+        Raises:
+            queue.Full: If `max_queued` calls are already waiting or running.
+        """
+        with self._lock:
+            if self._pending >= self.max_queued:
+                msg = f"The simulator already has {self._pending} calls queued."
+                raise queue.Full(msg)
+            self._pending += 1
+        try:
+            future = self._thread.submit(self._call, func)
+        except BaseException:
+            self._release()
+            raise
+        # Cancelled calls never run, so they release their slot here
+        future.add_done_callback(lambda future: future.cancelled() and self._release())
+        return future
+
+    def _call(self, func: Callable[[FMUInstanceBase], T]) -> T:
+        # The slot is released before the result is set, so callers may queue their next call right away
+        try:
+            return func(self.simulator)
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, func: Callable[[FMUInstanceBase], T], *, timeout: float | None = None) -> T:
+        """Run a call on the simulator and wait for its result.
+
+        Args:
+            func: Function to call with the simulator.
+            timeout (optional): Seconds to wait for the call to start. Defaults to None (no limit).
+
+        Returns:
+            The result of the call.
+
+        Raises:
+            queue.Full: If `max_queued` calls are already waiting or running.
+            TimeoutError: If the call did not start in time, in which case it is cancelled.
+        """
+        return await wait_for_result(self.submit(func), timeout=timeout)
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        """Close the simulator after the queued calls and stop the thread.
+
+        Args:
+            wait (optional): Wait for the simulator to be closed. Defaults to True.
+        """
+        self._thread.submit(self.simulator.close)
+        self._thread.shutdown(wait=wait)
+
+
+async def wait_for_result(future: Future[T], *, timeout: float | None = None) -> T:
+    """Wait for the result of a call queued on a simulator executor.
+
+    Calls that already started are awaited until they finish, whatever their duration.
+
+    Args:
+        future: The future result of the call.
+        timeout (optional): Seconds to wait for the call to start. Defaults to None (no limit).
+
+    Returns:
+        The result of the call.
+
+    Raises:
+        TimeoutError: If the call did not start in time, in which case it is cancelled.
+    """
+    result = asyncio.wrap_future(future)
+    try:
+        return await asyncio.wait_for(asyncio.shield(result), timeout)
+    # Not an alias of TimeoutError before Python 3.11
+    except asyncio.TimeoutError:  # noqa: UP041
+        # Only calls which are still waiting can be cancelled
+        if future.cancel():
+            msg = f"The call did not start within {timeout} seconds."
+            raise TimeoutError(msg) from None
+    return await result
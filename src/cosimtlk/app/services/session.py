@@ -0,0 +1,89 @@
+import asyncio
+import json
+import logging
+from typing import Any
+
+from fastapi import WebSocket
+
+from cosimtlk._encoding import pack, unpack
+from cosimtlk._fmu import FMUInstanceBase
+from cosimtlk.app.services.executor import SimulatorExecutor
+
+logger = logging.getLogger(__name__)
+
+# Frames received ahead of the frame being executed
+MAX_PIPELINED_FRAMES = 64
+
+
+def run_frame(simulator: FMUInstanceBase, frame: dict[str, Any]) -> Any:
+    """Execute the operation of a session frame on a simulator.
+
+    Args:
+        simulator: The simulator bound to the session.
+        frame: The operation, "step", "advance", "set_inputs" or "read_outputs", and its arguments.
+
+    Returns:
+        The content of the reply frame.
+    """
+    operation = frame.get("op")
+    input_values = frame.get("input_values") or {}
+    if operation == "step":
+        return simulator.step(input_values=input_values)
+    if operation == "advance":
+        return simulator.advance(frame["until"], input_values=input_values)
+    if operation == "set_inputs":
+        simulator.set_inputs(input_values)
+        return {"message": "Success"}
+    if operation == "read_outputs":
+        return simulator.read_outputs()
+    msg = f"Unknown operation: {operation}."
+    raise ValueError(msg)
+
+
+async def serve_session(websocket: WebSocket, executor: SimulatorExecutor, *, timeout: float | None = None) -> None:
+    """Serve the frames of a WebSocket session bound to a simulator.
+
+    Frames are read while earlier frames are executed, so clients can send the next frame
+    before reading the reply to the previous one. Replies are sent in the order of the frames,
+    encoded like their frame: binary frames as MessagePack and text frames as JSON. A reply
+    holds either the `result` of the operation or the `error` it raised.
+
+    Frames are executed on the executor of the simulator, in order with the calls of other requests.
+
+    Args:
+        websocket: The accepted WebSocket.
+        executor: Executor of the simulator bound to the session.
+        timeout (optional): Seconds a frame may wait for the simulator to start. Defaults to None (no limit).
+    """
+    frames: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue(maxsize=MAX_PIPELINED_FRAMES)
+
+    async def receive() -> None:
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                await frames.put(message)
+        finally:
+            await frames.put(None)
+
+    async def execute() -> None:
+        while (message := await frames.get()) is not None:
+            binary = message.get("bytes") is not None
+            try:
+                frame = unpack(message["bytes"]) if binary else json.loads(message["text"])
+                result = await executor.run(lambda simulator, frame=frame: run_frame(simulator, frame), timeout=timeout)
+                reply = {"result": result}
+            except Exception as e:
+                logger.exception(e)
+                reply = {"error": str(e)}
+            if binary:
+                await websocket.send_bytes(pack(reply))
+            else:
+                await websocket.send_text(json.dumps(reply))
+
+    receiver = asyncio.create_task(receive())
+    try:
+        await execute()
+    finally:
+        receiver.cancel()
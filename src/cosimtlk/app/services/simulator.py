@@ -1,23 +1,50 @@
+import asyncio
+import queue
+import threading
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
 from uuid import uuid4
 from zoneinfo import ZoneInfo
 
 from cosimtlk import FMU, FMUInstance
+from cosimtlk.app.config import settings
+from cosimtlk.app.services.executor import SimulatorExecutor, wait_for_result
 from cosimtlk.models import FMUInputType
 
 Record = dict[str, Any]
+T = TypeVar("T")
+
+
+class UnknownSimulatorError(LookupError):
+    """A call names simulators that do not exist."""
 
 
 class SimulatorService:
-    def __init__(self):
+    def __init__(self, *, max_queued_calls: int = 16, queue_timeout: float | None = None):
+        """Simulators of the server, each served by its own serialized executor.
+
+        Libraries may keep process-wide state, so every simulator loads a private copy of the library of
+        its FMU, and all simulators run in parallel.
+
+        Args:
+            max_queued_calls (optional): Calls waiting or running on a simulator before further calls
+                are rejected. Defaults to 16.
+            queue_timeout (optional): Seconds a call may wait for its simulator before it is rejected.
+                Defaults to None (no limit).
+        """
         self._db: dict[str, Record] = {}
+        self._fmus: dict[Path, FMU] = {}
+        self._fmus_lock = threading.Lock()
+        self.max_queued_calls = max_queued_calls
+        self.queue_timeout = queue_timeout
 
     def close(self) -> None:
         keys = list(self._db.keys())
         for key in keys:
-            del self._db[key]
+            self._db.pop(key)["executor"].shutdown(wait=True)
 
     def create(
         self,
@@ -26,14 +53,21 @@ class SimulatorService:
         start_values: dict[str, FMUInputType],
         start_time: int = 0,
         step_size: int = 1,
+        outputs: list[str] | None = None,
     ) -> Record:
         if not path.exists():
             raise FileNotFoundError(path)
 
-        fmu = FMU(path).instantiate(
+        # Reuse the FMU and its parsed model description, its simulators do not share a library
+        with self._fmus_lock:
+            if path not in self._fmus:
+                self._fmus[path] = FMU(path, share_library=False)
+
+        fmu = self._fmus[path].instantiate(
             start_values=start_values,
             start_time=start_time,
             step_size=step_size,
+            outputs=outputs,
         )
 
         _id = str(uuid4())
@@ -41,6 +75,7 @@ class SimulatorService:
             "id": _id,
             "fmu": path.stem,
             "simulator": fmu,
+            "executor": SimulatorExecutor(fmu, max_queued=self.max_queued_calls),
             "created_at": datetime.now(tz=ZoneInfo("UTC")).isoformat(),
         }
         return self.get(_id)
@@ -54,8 +89,74 @@ class SimulatorService:
     def get_simulator(self, id: str) -> FMUInstance:  # noqa: A002
         return self._db[id]["simulator"]
 
+    def get_executor(self, id: str) -> SimulatorExecutor:  # noqa: A002
+        return self._db[id]["executor"]
+
     def delete(self, id: str) -> None:  # noqa: A002
-        del self._db[id]
+        # Calls already queued on the simulator still run before it is closed
+        self._db.pop(id)["executor"].shutdown(wait=False)
+
+    async def run(self, executor: SimulatorExecutor, func: Callable[[FMUInstance], T]) -> T:
+        """Run a call on a simulator after the calls queued before it.
+
+        Args:
+            executor: Executor of the simulator.
+            func: Function to call with the simulator.
+
+        Returns:
+            The result of the call.
+
+        Raises:
+            queue.Full: If too many calls are queued on the simulator.
+            TimeoutError: If the call waited longer than `queue_timeout` to start.
+        """
+        return await executor.run(func, timeout=self.queue_timeout)
+
+    async def run_many(self, calls: Sequence[tuple[str, Callable[[FMUInstance], T]]]) -> Sequence[T]:
+        """Run calls on many simulators concurrently.
+
+        Calls on different simulators run in parallel, calls on the same simulator run one
+        after the other in the given order. If a call cannot be queued, the calls queued before
+        it are cancelled unless they already started.
+
+        Args:
+            calls: Id of the simulator and the function to call with it, for every call.
+
+        Returns:
+            The result of every call, in the order of the calls.
+
+        Raises:
+            UnknownSimulatorError: If a simulator does not exist, before any call is queued.
+            queue.Full: If too many calls are queued on a simulator.
+            TimeoutError: If a call waited longer than `queue_timeout` to start.
+        """
+        # Look up every executor first, a simulator deleted meanwhile cannot fail the calls with a KeyError
+        executors = {id_: self._db[id_]["executor"] for id_, _ in calls if id_ in self._db}
+        unknown = [id_ for id_, _ in calls if id_ not in executors]
+        if unknown:
+            msg = f"Unknown simulators: {', '.join(unknown)}."
+            raise UnknownSimulatorError(msg)
+
+        futures: list[Future[T]] = []
+        try:
+            for id_, func in calls:
+                futures.append(executors[id_].submit(func))
+        except queue.Full:
+            for future in futures:
+                future.cancel()
+            raise
+
+        results = await asyncio.gather(
+            *(wait_for_result(future, timeout=self.queue_timeout) for future in futures),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
 
 
-simulator_service = SimulatorService()
+simulator_service = SimulatorService(
+    max_queued_calls=settings.max_queued_calls,
+    queue_timeout=settings.queue_timeout,
+)
@@ -1,15 +1,69 @@
-from typing import Any
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import Sequence
+from contextlib import ExitStack
+from typing import TYPE_CHECKING, Any
 
 import requests
 
-from cosimtlk.app.schemas import SimulatorModel
+from cosimtlk._encoding import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, is_msgpack, msgpack_available, pack, unpack
 from cosimtlk.models import FMUInputType
 
+if TYPE_CHECKING:
+    from cosimtlk.app.schemas import SimulatorModel
+
+
+def _simulator_model(data: dict[str, Any]) -> SimulatorModel:
+    # The schemas pull in pydantic, which is only needed once a response is parsed
+    from cosimtlk.app.schemas import SimulatorModel  # noqa: PLC0415
+
+    return SimulatorModel(**data)
+
+
+def _encode_request(
+    body: dict | list | None,
+    headers: dict[str, str],
+    *,
+    accept_msgpack: bool,
+    msgpack_body: bool,
+) -> tuple[dict[str, str], bytes | None]:
+    """Return the headers and the encoded body of a request."""
+    if accept_msgpack:
+        headers = {"accept": f"{MSGPACK_MEDIA_TYPE}, {JSON_MEDIA_TYPE}", **headers}
+    if body is None:
+        return headers, None
+    if msgpack_body:
+        return {"Content-Type": MSGPACK_MEDIA_TYPE, **headers}, pack(body)
+    return SimulatorClient.default_headers(**headers), json.dumps(body).encode()
+
+
+def _decode_response(content: bytes, content_type: str | None) -> Any:
+    """Decode the body of a response."""
+    if not content:
+        return None
+    # Servers without MessagePack support answer with JSON
+    if is_msgpack(content_type):
+        return unpack(content)
+    return json.loads(content)
+
 
 class SimulatorClient:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, *, use_msgpack: bool | None = None):
+        """Client of the simulator server.
+
+        Args:
+            base_url: URL of the server.
+            use_msgpack (optional): Exchange the bodies of simulator requests as MessagePack instead of JSON.
+                Defaults to None, which asks for MessagePack responses if it is installed, and sends request
+                bodies as MessagePack only once the server answered with it, as older servers only accept JSON.
+                True sends MessagePack bodies from the first request.
+        """
         self.base_url = base_url
         self.session = requests.Session()
+        self.use_msgpack = msgpack_available() if use_msgpack is None else use_msgpack
+        self._msgpack_bodies = use_msgpack is True
 
     def __repr__(self):
         return f"<SimulatorClient: {self.base_url}>"
@@ -26,33 +80,36 @@ class SimulatorClient:
             **kwargs,
         }
 
-    def _get(self, path: str, **kwargs) -> dict:
-        response = self.session.get(self.base_url + path, **kwargs)
-        if not response.ok:
-            response.raise_for_status()
-        return response.json()
-
-    def _post(self, path: str, *, body: dict, **kwargs) -> dict:
-        response = self.session.post(
-            self.base_url + path,
-            headers=self.default_headers(**kwargs.pop("headers", {})),
-            json=body,
-            **kwargs,
+    def _request(self, method: str, path: str, *, body: dict | list | None = None, **kwargs) -> Any:
+        headers, content = _encode_request(
+            body,
+            kwargs.pop("headers", {}),
+            accept_msgpack=self.use_msgpack,
+            msgpack_body=self._msgpack_bodies,
         )
+        response = self.session.request(method, self.base_url + path, headers=headers, data=content, **kwargs)
         if not response.ok:
             response.raise_for_status()
-        return response.json()
+        content_type = response.headers.get("content-type")
+        # Servers answering with MessagePack accept it in request bodies as well
+        if self.use_msgpack and is_msgpack(content_type):
+            self._msgpack_bodies = True
+        return _decode_response(response.content, content_type)
 
-    def _put(self, path: str, *, body: dict, **kwargs) -> dict:
-        response = self.session.put(self.base_url + path, json=body, **kwargs)
-        if not response.ok:
-            response.raise_for_status()
-        return response.json()
+    def _get(self, path: str, **kwargs) -> Any:
+        return self._request("GET", path, **kwargs)
+
+    def _post(self, path: str, *, body: dict | list, **kwargs) -> Any:
+        return self._request("POST", path, body=body, **kwargs)
+
+    def _put(self, path: str, *, body: dict | list, **kwargs) -> Any:
+        return self._request("PUT", path, body=body, **kwargs)
 
     def _delete(self, path: str, **kwargs) -> None:
-        response = self.session.delete(self.base_url + path, **kwargs)
-        if not response.ok:
-            response.raise_for_status()
+        self._request("DELETE", path, **kwargs)
+
+    def open_session(self, id: str) -> SimulatorSession:  # noqa: A002
+        return SimulatorSession(self, id)
 
     def list_fmus(self) -> dict[str, Any]:
         return self._get("/fmus")
@@ -61,7 +118,7 @@ class SimulatorClient:
         return self._get(f"/fmus/{fmu}/info")
 
     def list_simulators(self) -> list[SimulatorModel]:
-        return [SimulatorModel(**simulator) for simulator in self._get("/simulators")]
+        return [_simulator_model(simulator) for simulator in self._get("/simulators")]
 
     def create_simulator(
         self,
@@ -70,19 +127,21 @@ class SimulatorClient:
         start_values: dict[str, FMUInputType] | None = None,
         start_time: int = 0,
         step_size: int = 1,
+        outputs: list[str] | None = None,
     ) -> SimulatorModel:
         params = {"fmu": path}
         body = {
             "start_values": start_values or {},
             "start_time": start_time,
             "step_size": step_size,
+            "outputs": list(outputs) if outputs is not None else None,
         }
         response = self._post("/simulators/", params=params, body=body)
-        return SimulatorModel(**response)
+        return _simulator_model(response)
 
     def get_simulator(self, id: str):  # noqa: A002
         response = self._get(f"/simulators/{id}")
-        return SimulatorModel(**response)
+        return _simulator_model(response)
 
     def delete_simulator(self, id: str) -> None:  # noqa: A002
         return self._delete(f"/simulators/{id}")
@@ -119,6 +178,51 @@ class SimulatorClient:
         body = input_values or {}
         return self._post(f"/simulators/{id}/advance", params=params, body=body)
 
+    def step_many(
+        self,
+        ids: Sequence[str],
+        *,
+        input_values: Sequence[dict[str, FMUInputType] | None] | None = None,
+    ) -> list[dict[str, FMUInputType]]:
+        if input_values is None:
+            input_values = [None] * len(ids)
+        elif len(input_values) != len(ids):
+            msg = "The number of input values must match the number of simulators."
+            raise ValueError(msg)
+        body = [{"id": id_, "input_values": inputs or {}} for id_, inputs in zip(ids, input_values, strict=True)]
+        return self._post("/simulators/batch/step", body=body)
+
+    def advance_many(
+        self,
+        ids: Sequence[str],
+        until: int,
+        *,
+        input_values: Sequence[dict[str, FMUInputType] | None] | None = None,
+    ) -> list[dict[str, FMUInputType]]:
+        if input_values is None:
+            input_values = [None] * len(ids)
+        elif len(input_values) != len(ids):
+            msg = "The number of input values must match the number of simulators."
+            raise ValueError(msg)
+        body = [
+            {"id": id_, "until": until, "input_values": inputs or {}}
+            for id_, inputs in zip(ids, input_values, strict=True)
+        ]
+        return self._post("/simulators/batch/advance", body=body)
+
+    def simulate_trajectory(
+        self,
+        id: str,  # noqa: A002
+        *,
+        times: list[int | float],
+        inputs: dict[str, list[FMUInputType]] | None = None,
+    ) -> dict[str, list[FMUInputType]]:
+        body = {
+            "times": times,
+            "inputs": inputs or {},
+        }
+        return self._post(f"/simulators/{id}/trajectory", body=body)
+
     def change_parameters(
         self,
         id: str,  # noqa: A002
@@ -142,3 +246,307 @@ class SimulatorClient:
             "step_size": step_size,
         }
         return self._post(f"/simulators/{id}/reset", body=body)
+
+
+class AsyncSimulatorClient:
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        max_connections: int = 100,
+        max_in_flight: int | None = None,
+        use_msgpack: bool | None = None,
+        timeout: float | None = None,
+    ):
+        """Asynchronous client of the simulator server.
+
+        Requests share a pool of keep-alive connections, so a single event loop can drive many
+        simulators at once. Requests above `max_in_flight` wait for earlier requests to finish.
+
+        Args:
+            base_url: URL of the server.
+            max_connections (optional): Size of the connection pool. Defaults to 100.
+            max_in_flight (optional): Maximum number of concurrent requests. Defaults to None (`max_connections`).
+            use_msgpack (optional): Exchange the bodies of simulator requests as MessagePack instead of JSON.
+                Defaults to None, which asks for MessagePack responses if it is installed, and sends request
+                bodies as MessagePack only once the server answered with it, as older servers only accept JSON.
+                True sends MessagePack bodies from the first request.
+            timeout (optional): Timeout of every request in seconds. Defaults to None (no timeout).
+        """
+        # httpx is only needed by the asynchronous client
+        import httpx  # noqa: PLC0415
+
+        if max_connections < 1 or (max_in_flight is not None and max_in_flight < 1):
+            msg = "The number of connections and requests in flight must be positive."
+            raise ValueError(msg)
+        self.base_url = base_url
+        self.use_msgpack = msgpack_available() if use_msgpack is None else use_msgpack
+        self._msgpack_bodies = use_msgpack is True
+        self.session = httpx.AsyncClient(
+            base_url=base_url,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+            follow_redirects=True,
+        )
+        self._in_flight = asyncio.Semaphore(max_in_flight or max_connections)
+
+    def __repr__(self):
+        return f"<AsyncSimulatorClient: {self.base_url}>"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    @classmethod
+    def from_parts(cls, host: str = "127.0.0.1", port: int = 8000, *, secure: bool = False, **kwargs):
+        return cls(f"http{'s' if secure else ''}://{host}:{port}", **kwargs)
+
+    async def aclose(self) -> None:
+        """Close the connections of the client."""
+        await self.session.aclose()
+
+    async def _request(self, method: str, path: str, *, body: dict | list | None = None, **kwargs) -> Any:
+        headers, content = _encode_request(
+            body,
+            kwargs.pop("headers", {}),
+            accept_msgpack=self.use_msgpack,
+            msgpack_body=self._msgpack_bodies,
+        )
+        async with self._in_flight:
+            response = await self.session.request(method, path, headers=headers, content=content, **kwargs)
+        response.raise_for_status()
+        content_type = response.headers.get("content-type")
+        # Servers answering with MessagePack accept it in request bodies as well
+        if self.use_msgpack and is_msgpack(content_type):
+            self._msgpack_bodies = True
+        return _decode_response(response.content, content_type)
+
+    async def list_fmus(self) -> dict[str, Any]:
+        return await self._request("GET", "/fmus/")
+
+    async def get_fmu_info(self, fmu: str) -> dict[str, Any]:
+        return await self._request("GET", f"/fmus/{fmu}/info")
+
+    async def list_simulators(self) -> list[SimulatorModel]:
+        return [_simulator_model(simulator) for simulator in await self._request("GET", "/simulators/")]
+
+    async def create_simulator(
+        self,
+        path: str,
+        *,
+        start_values: dict[str, FMUInputType] | None = None,
+        start_time: int = 0,
+        step_size: int = 1,
+        outputs: list[str] | None = None,
+    ) -> SimulatorModel:
+        params = {"fmu": path}
+        body = {
+            "start_values": start_values or {},
+            "start_time": start_time,
+            "step_size": step_size,
+            "outputs": list(outputs) if outputs is not None else None,
+        }
+        response = await self._request("POST", "/simulators/", params=params, body=body)
+        return _simulator_model(response)
+
+    async def get_simulator(self, id: str) -> SimulatorModel:  # noqa: A002
+        return _simulator_model(await self._request("GET", f"/simulators/{id}"))
+
+    async def delete_simulator(self, id: str) -> None:  # noqa: A002
+        await self._request("DELETE", f"/simulators/{id}")
+
+    async def set_inputs(
+        self,
+        id: str,  # noqa: A002
+        *,
+        input_values: dict[str, FMUInputType],
+    ) -> None:
+        await self._request("POST", f"/simulators/{id}/inputs", body=input_values)
+
+    async def get_outputs(self, id: str) -> dict[str, FMUInputType]:  # noqa: A002
+        return await self._request("GET", f"/simulators/{id}/outputs")
+
+    async def step(
+        self,
+        id: str,  # noqa: A002
+        *,
+        input_values: dict[str, FMUInputType] | None = None,
+    ) -> dict[str, FMUInputType]:
+        return await self._request("POST", f"/simulators/{id}/step", body=input_values or {})
+
+    async def advance(
+        self,
+        id: str,  # noqa: A002
+        until: int,
+        *,
+        input_values: dict[str, FMUInputType] | None = None,
+    ) -> dict[str, FMUInputType]:
+        params = {"until": until}
+        return await self._request("POST", f"/simulators/{id}/advance", params=params, body=input_values or {})
+
+    async def step_many(
+        self,
+        ids: Sequence[str],
+        *,
+        input_values: Sequence[dict[str, FMUInputType] | None] | None = None,
+    ) -> list[dict[str, FMUInputType]]:
+        if input_values is None:
+            input_values = [None] * len(ids)
+        elif len(input_values) != len(ids):
+            msg = "The number of input values must match the number of simulators."
+            raise ValueError(msg)
+        body = [{"id": id_, "input_values": inputs or {}} for id_, inputs in zip(ids, input_values, strict=True)]
+        return await self._request("POST", "/simulators/batch/step", body=body)
+
+    async def advance_many(
+        self,
+        ids: Sequence[str],
+        until: int,
+        *,
+        input_values: Sequence[dict[str, FMUInputType] | None] | None = None,
+    ) -> list[dict[str, FMUInputType]]:
+        if input_values is None:
+            input_values = [None] * len(ids)
+        elif len(input_values) != len(ids):
+            msg = "The number of input values must match the number of simulators."
+            raise ValueError(msg)
+        body = [
+            {"id": id_, "until": until, "input_values": inputs or {}}
+            for id_, inputs in zip(ids, input_values, strict=True)
+        ]
+        return await self._request("POST", "/simulators/batch/advance", body=body)
+
+    async def simulate_trajectory(
+        self,
+        id: str,  # noqa: A002
+        *,
+        times: list[int | float],
+        inputs: dict[str, list[FMUInputType]] | None = None,
+    ) -> dict[str, list[FMUInputType]]:
+        body = {
+            "times": times,
+            "inputs": inputs or {},
+        }
+        return await self._request("POST", f"/simulators/{id}/trajectory", body=body)
+
+    async def change_parameters(
+        self,
+        id: str,  # noqa: A002
+        *,
+        parameters: dict[str, FMUInputType],
+    ):
+        return await self._request("PUT", f"/simulators/{id}/parameters", body=parameters)
+
+    async def reset(
+        self,
+        id: str,  # noqa: A002
+        *,
+        start_values: dict[str, FMUInputType] | None = None,
+        start_time: int = 0,
+        step_size: int = 1,
+    ):
+        body = {
+            "start_values": start_values or {},
+            "start_time": start_time,
+            "step_size": step_size,
+        }
+        return await self._request("POST", f"/simulators/{id}/reset", body=body)
+
+
+class SimulatorSession:
+    def __init__(self, client: SimulatorClient, id: str):  # noqa: A002
+        """WebSocket session bound to a simulator on the server.
+
+        Operations can be pipelined: `send` returns without waiting for the reply, and `receive`
+        returns the replies in the order the operations were sent.
+
+        Args:
+            client: Client of the server running the simulator.
+            id: Id of the simulator.
+        """
+        # The WebSocket client is only needed once a session is opened
+        from websockets.sync.client import connect  # noqa: PLC0415
+
+        self.id = id
+        self._binary = client.use_msgpack
+        self._pending = 0
+        url = "ws" + client.base_url.removeprefix("http") + f"/simulators/{id}/session"
+        # The connection is entered as a context manager, as recent versions of websockets require
+        self._stack = ExitStack()
+        self._connection = self._stack.enter_context(connect(url, compression=None, max_size=None))
+
+    def __repr__(self):
+        return f"<SimulatorSession: {self.id}>"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        """Number of operations sent whose reply has not been received yet."""
+        return self._pending
+
+    def send(
+        self,
+        op: str,
+        *,
+        input_values: dict[str, FMUInputType] | None = None,
+        until: int | None = None,
+    ) -> None:
+        """Send an operation without waiting for its reply.
+
+        Args:
+            op: The operation, "step", "advance", "set_inputs" or "read_outputs".
+            input_values (optional): Input values of the operation. Defaults to None.
+            until (optional): Time to advance to, required by "advance". Defaults to None.
+        """
+        frame: dict[str, Any] = {"op": op}
+        if input_values:
+            frame["input_values"] = input_values
+        if until is not None:
+            frame["until"] = until
+        self._connection.send(pack(frame) if self._binary else json.dumps(frame))
+        self._pending += 1
+
+    def receive(self) -> Any:
+        """Receive the reply to the oldest pending operation.
+
+        Returns:
+            The result of the operation.
+        """
+        if not self._pending:
+            msg = "No operation is waiting for a reply."
+            raise RuntimeError(msg)
+        message = self._connection.recv()
+        self._pending -= 1
+        reply = unpack(message) if isinstance(message, bytes) else json.loads(message)
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply["result"]
+
+    def _call(self, op: str, **kwargs) -> Any:
+        if self._pending:
+            msg = "Receive the replies of the pending operations first."
+            raise RuntimeError(msg)
+        self.send(op, **kwargs)
+        return self.receive()
+
+    def step(self, *, input_values: dict[str, FMUInputType] | None = None) -> dict[str, FMUInputType]:
+        return self._call("step", input_values=input_values)
+
+    def advance(self, until: int, *, input_values: dict[str, FMUInputType] | None = None) -> dict[str, FMUInputType]:
+        return self._call("advance", until=until, input_values=input_values)
+
+    def set_inputs(self, input_values: dict[str, FMUInputType]) -> None:
+        self._call("set_inputs", input_values=input_values)
+
+    def read_outputs(self) -> dict[str, FMUInputType]:
+        return self._call("read_outputs")
+
+    def close(self) -> None:
+        self._stack.close()
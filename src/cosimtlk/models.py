@@ -1,10 +1,18 @@
 from datetime import datetime
 from enum import Enum
 
-from pandas import Timestamp
-
 FMUInputType = float | int | str | bool
-DateTimeLike = datetime | Timestamp
+
+
+def __getattr__(name: str):
+    # DateTimeLike includes pandas timestamps, so pandas is only imported when it is used
+    if name == "DateTimeLike":
+        from pandas import Timestamp  # noqa: PLC0415
+
+        value = globals()["DateTimeLike"] = datetime | Timestamp
+        return value
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
 
 
 class FMUCausaltyType(str, Enum):
@@ -1,4 +1,30 @@
-from cosimtlk.simulation.environment import Environment
-from cosimtlk.simulation.simulator import Simulator
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from cosimtlk.simulation.environment import Environment
+    from cosimtlk.simulation.simulator import Simulator
+
+# Module defining every public name, imported on first access
+_LAZY_IMPORTS = {
+    "Environment": "cosimtlk.simulation.environment",
+    "Simulator": "cosimtlk.simulation.simulator",
+}
 
 __all__ = ["Environment", "Simulator"]
+
+
+def __getattr__(name: str):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
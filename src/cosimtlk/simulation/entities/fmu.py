@@ -23,6 +23,7 @@ class FMUEntity(Entity):
         start_values: dict[str, FMUInputType],
         fmu_step_size: int,
         simulation_step_size: int,
+        outputs: list[str] | None = None,
     ):
         """An entity that simulates an FMU.
 
@@ -33,6 +34,7 @@ class FMUEntity(Entity):
             start_values: The initial values of the FMU.
             fmu_step_size: The step size of the FMU.
             simulation_step_size: The step size of the simulation.
+            outputs (optional): The outputs of the FMU to store in the simulation state. Defaults to None (all outputs).
         """
         super().__init__(name, priority)
         self.fmu = fmu
@@ -40,6 +42,7 @@ class FMUEntity(Entity):
         self.start_values = start_values
         self.fmu_step_size = fmu_step_size
         self.simulation_step_size = simulation_step_size
+        self.outputs = outputs
         self.input_namespace = namespaced(self.name, "inputs")
         self.output_namespace = namespaced(self.name, "outputs")
 
@@ -58,6 +61,7 @@ class FMUEntity(Entity):
             start_values=self.start_values,
             step_size=self.fmu_step_size,
             start_time=self.ctx.current_timestamp,
+            outputs=self.outputs,
         )
         return self
 
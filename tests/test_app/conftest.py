@@ -0,0 +1,56 @@
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+
+from cosimtlk import RemoteFMU, SimulatorClient
+from cosimtlk.app.config import settings
+from cosimtlk.app.main import app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(app):
+    """Run an app on a free port in a background thread and yield its URL."""
+    config = uvicorn.Config(app, host="127.0.0.1", port=_free_port(), log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{config.port}"
+    server.should_exit = True
+    thread.join()
+
+
+@pytest.fixture(scope="session")
+def server():
+    settings.fmu_dir = "tests/fixtures/fmus"
+    yield from serve(app)
+
+
+@pytest.fixture(scope="session")
+def client(server):
+    return SimulatorClient(server)
+
+
+@pytest.fixture(scope="session")
+def remote_fmu(client):
+    return RemoteFMU("ModSim.Examples.InputTest", client=client)
+
+
+@pytest.fixture(scope="function")
+def remote_fmu_instance(remote_fmu):
+    instance = remote_fmu.instantiate(
+        start_time=0,
+        step_size=1,
+        start_values={},
+    )
+    yield instance
+    instance.close()
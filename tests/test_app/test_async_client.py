@@ -0,0 +1,84 @@
+import asyncio
+
+import httpx
+import pytest
+
+from cosimtlk import AsyncRemoteFMUInstance, AsyncSimulatorClient
+
+FMU_PATH = "ModSim.Examples.InputTest"
+
+
+@pytest.mark.parametrize("use_msgpack", [True, False])
+def test_async_client(server, use_msgpack):
+    async def main():
+        async with AsyncSimulatorClient(server, use_msgpack=use_msgpack) as client:
+            assert FMU_PATH in str(await client.list_fmus())
+            simulator = await client.create_simulator(FMU_PATH, start_values={"integrator.k": 1.0})
+            try:
+                outputs = await client.step(simulator.id, input_values={"real_setpoint": 1.0, "int_setpoint": 2})
+                assert outputs == {"current_time": 1, "real_output": 1.0, "int_output": 2, "bool_output": False}
+                await client.set_inputs(simulator.id, input_values={"bool_setpoint": True})
+                assert (await client.get_outputs(simulator.id))["bool_output"] is True
+                assert (await client.advance(simulator.id, 4))["current_time"] == 4
+                await client.reset(simulator.id, start_time=10)
+                assert (await client.get_simulator(simulator.id)).fmu == FMU_PATH
+                assert (await client.step(simulator.id))["current_time"] == 11
+            finally:
+                await client.delete_simulator(simulator.id)
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.get_simulator(simulator.id)
+
+    asyncio.run(main())
+
+
+def test_many_concurrent_instances(server):
+    n = 20
+
+    async def run(client, k):
+        async with await AsyncRemoteFMUInstance.create(
+            client, FMU_PATH, start_time=0, step_size=1, start_values={"integrator.k": 1.0}
+        ) as instance:
+            for _ in range(5):
+                outputs = await instance.step(input_values={"int_setpoint": k})
+            assert instance.current_time == 5
+            return outputs["int_output"]
+
+    async def main():
+        async with AsyncSimulatorClient(server, max_connections=4, max_in_flight=8) as client:
+            results = await asyncio.gather(*(run(client, k) for k in range(n)))
+            assert not await client.list_simulators()
+        return results
+
+    assert asyncio.run(main()) == list(range(n))
+
+
+def test_async_instance_skips_unchanged_inputs(server, monkeypatch):
+    async def main():
+        async with AsyncSimulatorClient(server) as client:
+            instance = await AsyncRemoteFMUInstance.create(client, FMU_PATH, start_time=0, step_size=1)
+            sent = []
+            set_inputs = client.set_inputs
+
+            async def record(id, *, input_values):  # noqa: A002
+                sent.append(input_values)
+                await set_inputs(id, input_values=input_values)
+
+            monkeypatch.setattr(client, "set_inputs", record)
+            await instance.set_inputs({"real_setpoint": 1.0, "int_setpoint": 2})
+            await instance.set_inputs({"real_setpoint": 1.0, "int_setpoint": 3})
+            await instance.set_inputs({"real_setpoint": 1.0})
+            assert sent == [{"real_setpoint": 1.0, "int_setpoint": 2}, {"int_setpoint": 3}]
+            assert (await instance.advance(3))["int_output"] == 3
+            await instance.close()
+            assert not instance.is_initialized
+
+    asyncio.run(main())
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError, match="positive"):
+        AsyncSimulatorClient("http://127.0.0.1:8000", max_in_flight=0)
+
+
+if __name__ == "__main__":
+    pytest.main()
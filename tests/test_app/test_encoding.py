@@ -0,0 +1,90 @@
+import pytest
+import requests
+from fastapi import Body, FastAPI
+
+from cosimtlk import SimulatorClient
+from cosimtlk._encoding import MSGPACK_MEDIA_TYPE, is_msgpack, pack, unpack
+from tests.test_app.conftest import serve
+
+
+@pytest.fixture(scope="module")
+def json_only_server():
+    """Server of a version without MessagePack support."""
+    app = FastAPI()
+
+    @app.post("/simulators/{id}/step")
+    def step(id: str, input_values: dict = Body({})):  # noqa: A002, ARG001, B008
+        return {"current_time": 1, **input_values}
+
+    yield from serve(app)
+
+
+@pytest.fixture
+def simulator(client):
+    simulator = client.create_simulator("ModSim.Examples.InputTest", start_values={"integrator.k": 1.0})
+    yield simulator
+    client.delete_simulator(simulator.id)
+
+
+def test_is_msgpack():
+    assert is_msgpack("application/msgpack")
+    assert is_msgpack("application/json;q=0.9, application/x-msgpack")
+    assert not is_msgpack("application/json")
+    assert not is_msgpack(None)
+
+
+def test_json_is_the_default(server, simulator):
+    response = requests.post(f"{server}/simulators/{simulator.id}/step", json={"int_setpoint": 2}, timeout=5)
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["int_output"] == 2
+
+
+def test_msgpack_is_negotiated(server, simulator):
+    response = requests.post(
+        f"{server}/simulators/{simulator.id}/step",
+        data=pack({"int_setpoint": 2, "real_setpoint": 1.5}),
+        headers={"Content-Type": MSGPACK_MEDIA_TYPE, "accept": MSGPACK_MEDIA_TYPE},
+        timeout=5,
+    )
+    assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    outputs = unpack(response.content)
+    assert outputs["current_time"] == 1
+    assert outputs["int_output"] == 2
+    assert outputs["real_output"] == 1.5
+
+
+@pytest.mark.parametrize("use_msgpack", [True, False])
+def test_client_wire_formats(server, use_msgpack):
+    client = SimulatorClient(server, use_msgpack=use_msgpack)
+    simulator = client.create_simulator("ModSim.Examples.InputTest", start_values={"integrator.k": 1.0})
+    try:
+        assert client.step(simulator.id, input_values={"real_setpoint": 1.0})["real_output"] == 1.0
+        assert client.advance(simulator.id, 3)["current_time"] == 3
+        client.change_parameters(simulator.id, parameters={"integrator.k": 2.0})
+        trajectory = client.simulate_trajectory(simulator.id, times=[4, 5], inputs={"int_setpoint": [1, 2]})
+        assert trajectory["int_output"] == [1, 2]
+        assert client.get_outputs(simulator.id)["current_time"] == 5
+    finally:
+        client.delete_simulator(simulator.id)
+
+
+def test_client_sends_json_to_json_only_servers(json_only_server):
+    client = SimulatorClient(json_only_server)
+    assert client.step("id", input_values={"int_setpoint": 2}) == {"current_time": 1, "int_setpoint": 2}
+    assert client.step("id", input_values={"int_setpoint": 3}) == {"current_time": 1, "int_setpoint": 3}
+
+
+def test_client_switches_to_msgpack_bodies(server):
+    client = SimulatorClient(server)
+    simulator = client.create_simulator("ModSim.Examples.InputTest", start_values={"integrator.k": 1.0})
+    try:
+        assert client._msgpack_bodies is False
+        assert client.step(simulator.id, input_values={"int_setpoint": 2})["int_output"] == 2
+        assert client._msgpack_bodies is True
+        assert client.step(simulator.id, input_values={"int_setpoint": 3})["int_output"] == 3
+    finally:
+        client.delete_simulator(simulator.id)
+
+
+if __name__ == "__main__":
+    pytest.main()
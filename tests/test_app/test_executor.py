@@ -0,0 +1,130 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from cosimtlk.app.services.executor import SimulatorExecutor, wait_for_result
+from cosimtlk.app.services.simulator import simulator_service
+
+
+class FakeSimulator:
+    def __init__(self):
+        self.calls = []
+        self.running = 0
+        self.overlapped = False
+        self.closed = False
+
+    def call(self, value):
+        self.running += 1
+        self.overlapped |= self.running > 1
+        time.sleep(0.001)
+        self.calls.append(value)
+        self.running -= 1
+        return value
+
+    def close(self):
+        self.closed = True
+
+
+def test_calls_are_serialized_in_order():
+    simulator = FakeSimulator()
+    executor = SimulatorExecutor(simulator, max_queued=100)
+    futures = [executor.submit(lambda simulator, k=k: simulator.call(k)) for k in range(50)]
+    assert [future.result() for future in futures] == list(range(50))
+    assert simulator.calls == list(range(50))
+    assert not simulator.overlapped
+    assert executor.pending == 0
+    executor.shutdown()
+    assert simulator.closed
+
+
+def test_full_queue_rejects_calls():
+    release = threading.Event()
+    executor = SimulatorExecutor(FakeSimulator(), max_queued=2)
+    futures = [executor.submit(lambda _simulator: release.wait()) for _ in range(2)]
+    with pytest.raises(queue.Full):
+        executor.submit(lambda simulator: simulator.call(0))
+    release.set()
+    for future in futures:
+        future.result()
+    assert executor.submit(lambda simulator: simulator.call(1)).result() == 1
+    executor.shutdown()
+
+
+def test_waiting_calls_time_out():
+    release = threading.Event()
+    simulator = FakeSimulator()
+    executor = SimulatorExecutor(simulator)
+
+    def block(_simulator):
+        release.wait()
+        return "done"
+
+    async def main():
+        running = executor.submit(block)
+        with pytest.raises(TimeoutError):
+            await executor.run(lambda simulator: simulator.call(0), timeout=0.05)
+        # Calls that already started are awaited past the timeout
+        asyncio.get_running_loop().call_later(0.1, release.set)
+        assert await wait_for_result(running, timeout=0.01) == "done"
+
+    asyncio.run(main())
+    executor.shutdown()
+    assert simulator.calls == []
+
+
+def test_concurrent_requests_on_one_simulator(client):
+    simulator = client.create_simulator("ModSim.Examples.InputTest", start_values={})
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: client.step(simulator.id), range(40)))
+        assert sorted(outputs["current_time"] for outputs in results) == list(range(1, 41))
+    finally:
+        client.delete_simulator(simulator.id)
+
+
+def test_simulators_of_one_fmu_run_in_parallel(client, monkeypatch):
+    monkeypatch.setattr(simulator_service, "queue_timeout", 1)
+    first = client.create_simulator("ModSim.Examples.InputTest", start_values={})
+    second = client.create_simulator("ModSim.Examples.InputTest", start_values={})
+    release = threading.Event()
+    try:
+        blocking = simulator_service.get_executor(first.id).submit(lambda _simulator: release.wait())
+        assert client.step(second.id)["current_time"] == 1
+        assert client.step_many([second.id])[0]["current_time"] == 2
+        release.set()
+        blocking.result()
+    finally:
+        release.set()
+        client.delete_simulator(first.id)
+        client.delete_simulator(second.id)
+
+
+@pytest.mark.parametrize(("max_queued_calls", "status_code"), [(1, 429), (2, 503)])
+def test_overloaded_simulator(client, monkeypatch, max_queued_calls, status_code):
+    monkeypatch.setattr(simulator_service, "max_queued_calls", max_queued_calls)
+    monkeypatch.setattr(simulator_service, "queue_timeout", 0.05)
+    simulator = client.create_simulator("ModSim.Examples.InputTest", start_values={})
+    release = threading.Event()
+    try:
+        blocking = simulator_service.get_executor(simulator.id).submit(lambda _simulator: release.wait())
+        with pytest.raises(requests.HTTPError) as e:
+            client.step(simulator.id)
+        assert e.value.response.status_code == status_code
+        with pytest.raises(requests.HTTPError) as e:
+            client.step_many([simulator.id])
+        assert e.value.response.status_code == status_code
+        release.set()
+        blocking.result()
+        assert client.step(simulator.id)["current_time"] == 1
+    finally:
+        release.set()
+        client.delete_simulator(simulator.id)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,111 @@
+import pytest
+import requests
+
+from cosimtlk import RemoteFMUInstance
+
+
+def test_step(remote_fmu_instance):
+    outputs = remote_fmu_instance.step(input_values={"real_setpoint": 2.0, "int_setpoint": 3})
+    assert outputs["current_time"] == 1
+    assert outputs["int_output"] == 3
+    assert remote_fmu_instance.current_time == 1
+
+
+def test_advance(remote_fmu):
+    with remote_fmu.instantiate(
+        start_time=0,
+        step_size=1,
+        start_values={"integrator.k": 1.0, "integrator.y_start": 1.05},
+    ) as fmu:
+        outputs = fmu.advance(10, input_values={"real_setpoint": 1.0, "int_setpoint": 3, "bool_setpoint": True})
+        assert outputs["current_time"] == 10
+        assert outputs["real_output"] == pytest.approx(11.05)
+
+
+def test_simulate_trajectory(remote_fmu):
+    with remote_fmu.instantiate(start_time=0, step_size=1, start_values={"integrator.k": 1.0}) as fmu:
+        trajectory = fmu.simulate_trajectory([1, 2, 4], inputs={"real_setpoint": [1.0, 2.0, 1.0]})
+        assert trajectory["current_time"].tolist() == [1, 2, 4]
+        assert trajectory["real_output"].tolist() == [1.0, 3.0, 5.0]
+        assert fmu.current_time == 4
+
+
+def test_output_subset(remote_fmu):
+    with remote_fmu.instantiate(start_time=0, step_size=1, start_values={}, outputs=["int_output"]) as fmu:
+        assert fmu.step(input_values={"int_setpoint": 3}) == {"current_time": 1, "int_output": 3}
+
+
+def test_unknown_output_raises(remote_fmu):
+    with pytest.raises(requests.HTTPError):
+        remote_fmu.instantiate(start_time=0, step_size=1, start_values={}, outputs=["unknown"])
+
+
+def test_only_changed_inputs_are_sent(remote_fmu, monkeypatch):
+    with remote_fmu.instantiate(start_time=0, step_size=1, start_values={"integrator.k": 1.0}) as fmu:
+        sent = []
+        step = fmu._client.step
+
+        def record(id, *, input_values):  # noqa: A002
+            sent.append(input_values)
+            return step(id, input_values=input_values)
+
+        monkeypatch.setattr(fmu._client, "step", record)
+        fmu.step(input_values={"real_setpoint": 1.0, "int_setpoint": 2})
+        outputs = fmu.step(input_values={"real_setpoint": 1.0, "int_setpoint": 3})
+        assert sent == [{"real_setpoint": 1.0, "int_setpoint": 2}, {"int_setpoint": 3}]
+        assert outputs["real_output"] == 2.0
+        assert outputs["int_output"] == 3
+
+
+def test_set_inputs(remote_fmu_instance):
+    remote_fmu_instance.set_inputs({"int_setpoint": 5})
+    assert remote_fmu_instance.read_outputs()["int_output"] == 5
+
+
+def test_stats(remote_fmu):
+    with remote_fmu.instantiate(start_time=0, step_size=1, start_values={}, stats=True) as fmu:
+        fmu.step()
+        fmu.advance(3)
+        stats = fmu.stats()
+        assert stats["instantiate"]["count"] == 1
+        assert stats["step"]["count"] == 1
+        assert stats["advance"]["count"] == 1
+
+
+def test_advance_many(remote_fmu):
+    instances = [
+        remote_fmu.instantiate(start_time=0, step_size=1, start_values={"integrator.k": float(k)}) for k in range(1, 4)
+    ]
+    try:
+        results = RemoteFMUInstance.advance_many(instances, 5, input_values=[{"real_setpoint": 1.0}] * 3)
+        assert [outputs["current_time"] for outputs in results] == [5, 5, 5]
+        assert [outputs["real_output"] for outputs in results] == [5.0, 10.0, 15.0]
+        assert all(instance.current_time == 5 for instance in instances)
+
+        results = RemoteFMUInstance.step_many(instances)
+        assert [outputs["real_output"] for outputs in results] == [6.0, 12.0, 18.0]
+    finally:
+        for instance in instances:
+            instance.close()
+
+
+def test_batch_keeps_order_per_simulator(remote_fmu_instance, client):
+    results = client.step_many([remote_fmu_instance.id] * 3, input_values=[{"int_setpoint": k} for k in range(3)])
+    assert [(outputs["current_time"], outputs["int_output"]) for outputs in results] == [(1, 0), (2, 1), (3, 2)]
+
+
+def test_batch_with_unknown_simulator(remote_fmu_instance, client):
+    with pytest.raises(requests.HTTPError) as excinfo:
+        client.advance_many([remote_fmu_instance.id, "unknown"], 2)
+    assert excinfo.value.response.status_code == 404
+    assert remote_fmu_instance.read_outputs()["current_time"] == 0
+
+
+def test_batch_with_unknown_input(remote_fmu_instance, client):
+    with pytest.raises(requests.HTTPError) as excinfo:
+        client.step_many([remote_fmu_instance.id], input_values=[{"unknown": 1.0}])
+    assert excinfo.value.response.status_code == 500
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from cosimtlk import SimulatorClient
+
+
+def test_remote_instance_over_websocket(remote_fmu):
+    with remote_fmu.instantiate(
+        start_time=0, step_size=1, start_values={"integrator.k": 1.0}, websocket=True
+    ) as instance:
+        assert instance.session is not None
+        outputs = instance.step(input_values={"real_setpoint": 1.0, "int_setpoint": 2})
+        assert outputs == {"current_time": 1, "real_output": 1.0, "int_output": 2, "bool_output": False}
+        assert instance.advance(5)["real_output"] == 5.0
+        instance.set_inputs({"bool_setpoint": True})
+        assert instance.read_outputs()["bool_output"] is True
+        assert instance.current_time == 5
+
+
+@pytest.mark.parametrize("use_msgpack", [True, False])
+def test_pipelined_steps(server, use_msgpack):
+    client = SimulatorClient(server, use_msgpack=use_msgpack)
+    simulator = client.create_simulator("ModSim.Examples.InputTest", start_values={"integrator.k": 1.0})
+    try:
+        with client.open_session(simulator.id) as session:
+            for k in range(10):
+                session.send("step", input_values={"int_setpoint": k})
+            assert session.pending == 10
+            results = [session.receive() for _ in range(10)]
+            assert [(outputs["current_time"], outputs["int_output"]) for outputs in results] == [
+                (k + 1, k) for k in range(10)
+            ]
+            with pytest.raises(RuntimeError, match="No operation"):
+                session.receive()
+    finally:
+        client.delete_simulator(simulator.id)
+
+
+def test_errors_are_replied(remote_fmu):
+    with remote_fmu.instantiate(start_time=0, step_size=1, start_values={}, websocket=True) as instance:
+        instance.advance(3)
+        with pytest.raises(RuntimeError, match="past"):
+            instance.advance(1)
+        with pytest.raises(RuntimeError, match="Unknown operation"):
+            instance.session._call("rewind")
+        # The session stays usable after an error
+        assert instance.step()["current_time"] == 4
+
+
+def test_session_latency(remote_fmu):
+    with remote_fmu.instantiate(start_time=0, step_size=1, start_values={}, websocket=True) as instance:
+        instance.step()
+        start = time.perf_counter()
+        for _ in range(200):
+            instance.step()
+        # Generous bound, guards against delays such as Nagle's algorithm on small frames
+        assert (time.perf_counter() - start) / 200 < 0.005
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,119 @@
+import shutil
+import sys
+import threading
+import time
+
+import fmpy.util
+import pytest
+
+from cosimtlk import FMU, BinaryCache
+from cosimtlk._cache import binary_cache
+
+FMU_PATH = "tests/fixtures/fmus/ModSim.Examples.InputTest.fmu"
+
+
+@pytest.fixture
+def compilations(monkeypatch):
+    calls = []
+
+    def compile_platform_binary(filename, output_filename=None, compiler_options=None, **_kwargs):
+        calls.append((filename, compiler_options))
+        time.sleep(0.05)
+        shutil.copyfile(filename, output_filename)
+
+    monkeypatch.setattr(fmpy.util, "compile_platform_binary", compile_platform_binary, raising=False)
+    return calls
+
+
+def test_binary_is_compiled_once(tmp_path, compilations):
+    cache = BinaryCache(cache_dir=tmp_path)
+    assert cache.lookup(FMU_PATH) is None
+
+    path = cache.get(FMU_PATH)
+    assert path.parent == tmp_path
+    assert path.read_bytes() == open(FMU_PATH, "rb").read()
+    assert cache.get(FMU_PATH) == path
+    assert BinaryCache(cache_dir=tmp_path).get(FMU_PATH) == path
+    assert cache.lookup(FMU_PATH) == path
+    assert len(compilations) == 1
+
+
+def test_compiler_options_are_part_of_the_key(tmp_path, compilations):
+    cache = BinaryCache(cache_dir=tmp_path)
+    assert cache.get(FMU_PATH) != cache.get(FMU_PATH, compiler_options="-O3")
+    assert [options for _, options in compilations] == [None, "-O3"]
+
+
+def test_concurrent_requests_compile_once(tmp_path, compilations):
+    caches = [BinaryCache(cache_dir=tmp_path) for _ in range(4)]
+    paths = []
+    threads = [threading.Thread(target=lambda cache=cache: paths.append(cache.get(FMU_PATH))) for cache in caches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(paths)) == 1
+    assert len(compilations) == 1
+    assert [path.name for path in tmp_path.glob("*.fmu")] == [paths[0].name]
+
+
+def test_failed_compilation_leaves_no_entry(tmp_path, monkeypatch):
+    def compile_platform_binary(*_args, **_kwargs):
+        msg = "compilation failed"
+        raise RuntimeError(msg)
+
+    monkeypatch.setattr(fmpy.util, "compile_platform_binary", compile_platform_binary, raising=False)
+    cache = BinaryCache(cache_dir=tmp_path)
+    with pytest.raises(RuntimeError, match="compilation failed"):
+        cache.get(FMU_PATH)
+    assert not list(tmp_path.glob("*.fmu"))
+
+
+def test_recompile_uses_cached_binary(tmp_path, compilations, monkeypatch):
+    monkeypatch.setattr(binary_cache, "_cache_dir", tmp_path)
+    fmu = FMU(FMU_PATH)
+    original = open(FMU_PATH, "rb").read()
+    fmu.recompile()
+    FMU(FMU_PATH).recompile()
+
+    assert len(compilations) == 1
+    assert open(FMU_PATH, "rb").read() == original
+    instance = fmu.instantiate(start_time=0, step_size=1, start_values={})
+    assert instance.step(input_values={"real_setpoint": 1.0})["real_output"] == 1.0
+    instance.close()
+    fmu.close()
+
+
+def test_temporary_directory_without_cache_dir(compilations):
+    cache = BinaryCache()
+    assert cache.cache_dir is None
+    path = cache.get(FMU_PATH)
+    assert path.parent.name.startswith("cosimtlk-binaries-")
+    assert cache.get(FMU_PATH) == path
+    assert len(compilations) == 1
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+def test_binary_writable_by_others_is_compiled_again(tmp_path, compilations):
+    path = BinaryCache(cache_dir=tmp_path).get(FMU_PATH)
+    path.chmod(0o666)
+    assert BinaryCache(cache_dir=tmp_path).lookup(FMU_PATH) is None
+    assert BinaryCache(cache_dir=tmp_path).get(FMU_PATH) == path
+    assert len(compilations) == 2
+
+
+def test_missing_compiler_raises(tmp_path, monkeypatch):
+    monkeypatch.delattr(fmpy.util, "compile_platform_binary", raising=False)
+    fmu = FMU(FMU_PATH)
+    monkeypatch.setattr(binary_cache, "_cache_dir", tmp_path)
+    with pytest.raises(RuntimeError, match=r"0\.3\.25"):
+        fmu.recompile()
+    # The FMU stays usable
+    with fmu.instantiate(start_time=0, step_size=1, start_values={}) as instance:
+        assert instance.step()["current_time"] == 1
+    fmu.close()
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,67 @@
+import os
+import shutil
+
+import pytest
+
+from cosimtlk import FMU, ExtractionCache
+
+FMU_PATH = "tests/fixtures/fmus/ModSim.Examples.InputTest.fmu"
+
+
+def test_instances_share_extraction(tmp_path):
+    # Use a private copy so that no other FMU object holds on to the extraction
+    fmu_path = shutil.copy(FMU_PATH, tmp_path)
+    fmu = FMU(fmu_path)
+    first = fmu.instantiate(start_time=0, step_size=1, start_values={})
+    second = FMU(fmu_path).instantiate(start_time=0, step_size=1, start_values={})
+    unzipdir = first._unzipdir
+    assert second._unzipdir == unzipdir
+
+    first.close()
+    fmu.close()
+    assert os.path.isdir(unzipdir)
+
+    second.close()
+    second._fmu.close()
+    assert not os.path.exists(unzipdir)
+
+
+def test_temporary_extraction_is_reference_counted():
+    cache = ExtractionCache()
+    first = cache.acquire(FMU_PATH)
+    second = cache.acquire(FMU_PATH)
+    assert first == second
+
+    cache.release(first)
+    assert os.path.isdir(first)
+
+    cache.release(second)
+    assert not os.path.exists(first)
+
+
+def test_persistent_extraction_is_kept(tmp_path):
+    cache = ExtractionCache(cache_dir=tmp_path)
+    unzipdir = cache.acquire(FMU_PATH)
+    assert os.path.dirname(unzipdir) == str(tmp_path)
+
+    cache.release(unzipdir)
+    assert os.path.isdir(unzipdir)
+
+    assert cache.acquire(FMU_PATH) == unzipdir
+
+
+def test_persistent_extraction_is_evicted(tmp_path):
+    cache = ExtractionCache(cache_dir=tmp_path, max_size=0)
+    unzipdir = cache.acquire(FMU_PATH)
+
+    cache.release(unzipdir)
+    assert not os.path.exists(unzipdir)
+
+
+def test_negative_max_size_raises():
+    with pytest.raises(ValueError):
+        ExtractionCache(max_size=-1)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -1,3 +1,6 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import pytest
 from fmpy.model_description import ModelDescription
 
@@ -36,5 +39,67 @@ def test_instantiate(local_fmu):
     assert isinstance(fmu, FMUInstance)
 
 
+def test_instances_share_library(local_fmu):
+    first = local_fmu.instantiate(start_time=0, step_size=1, start_values={})
+    second = local_fmu.instantiate(start_time=0, step_size=1, start_values={})
+    assert first._instance.dll is second._instance.dll
+    assert first._instance.component != second._instance.component
+
+    first.close()
+    outputs = second.step(input_values={"real_setpoint": 1.0})
+    assert outputs["current_time"] == 1
+    second.close()
+
+
+def test_close_keeps_library_until_instances_are_closed():
+    fmu = FMU("tests/fixtures/fmus/ModSim.Examples.InputTest.fmu")
+    instance = fmu.instantiate(start_time=0, step_size=1, start_values={})
+    fmu.close()
+
+    outputs = instance.step(input_values={"real_setpoint": 1.0})
+    assert outputs["current_time"] == 1
+    instance.close()
+
+    with fmu.instantiate(start_time=0, step_size=1, start_values={}) as instance:
+        assert instance.step()["current_time"] == 1
+
+
+def test_libraries_of_one_extraction_share_a_lock(local_fmu):
+    fmu = FMU("tests/fixtures/fmus/ModSim.Examples.InputTest.fmu")
+    lock = local_fmu._shared_library().lock
+    assert fmu._shared_library().lock is lock
+    assert fmu._shared_library("ModelExchange").lock is lock
+    fmu.close()
+
+
+def test_instances_of_a_shared_library_run_concurrently(local_fmu):
+    # The model keeps process-wide state, concurrent FMI calls on its instances crash without the library lock
+    def simulate(k):
+        outputs = []
+        for _ in range(5):
+            instance = local_fmu.instantiate(start_time=0, step_size=1, start_values={"integrator.k": float(k)})
+            outputs.append(instance.advance(50, input_values={"real_setpoint": 1.0})["real_output"])
+            instance.reset(start_time=0, step_size=1, start_values={})
+            instance.close()
+        return outputs
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(simulate, range(8)))
+    assert results == [[50.0 * k] * 5 for k in range(8)]
+
+
+def test_private_libraries():
+    fmu = FMU("tests/fixtures/fmus/ModSim.Examples.InputTest.fmu", share_library=False)
+    first = fmu.instantiate(start_time=0, step_size=1, start_values={})
+    second = fmu.instantiate(start_time=0, step_size=1, start_values={})
+    assert first._library is None
+    assert first._instance.dll is not second._instance.dll
+    # Only the files needed to run the model are extracted
+    assert not (Path(first._unzipdir) / "sources").exists()
+    assert first.step(input_values={"real_setpoint": 1.0})["real_output"] == 1.0
+    first.close()
+    second.close()
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -1,5 +1,12 @@
+import math
+
+import numpy as np
+import pandas as pd
 import pytest
 
+from cosimtlk import FMU
+from cosimtlk._variables import VariableBatch
+
 
 def test_initialize(local_fmu_instance):
     assert local_fmu_instance.step_size == 1
@@ -267,5 +274,250 @@ def test_change_parameters(local_fmu):
         assert outputs == expected_output
 
 
+@pytest.mark.parametrize("advance_step_size", [math.inf, 4])
+def test_advance_with_variable_communication_step(local_fmu, advance_step_size):
+    with local_fmu.instantiate(
+        start_values={
+            "integrator.k": 2.0,
+            "integrator.y_start": 1.05,
+        },
+        step_size=1,
+        start_time=0,
+        advance_step_size=advance_step_size,
+    ) as fmu:
+        step_sizes = []
+        do_step = fmu._instance.doStep
+
+        def record_step(**kwargs):
+            step_sizes.append(kwargs["communicationStepSize"])
+            do_step(**kwargs)
+
+        fmu._instance.doStep = record_step
+        outputs = fmu.advance(10, input_values={"real_setpoint": 1.0})
+        assert outputs["current_time"] == 10
+        assert outputs["real_output"] == 21.05
+        assert sum(step_sizes) == 10
+        assert max(step_sizes) == min(advance_step_size, 10)
+
+
+def test_advance_step_size_ignored_without_support(monkeypatch):
+    fmu = FMU("tests/fixtures/fmus/ModSim.Examples.InputTest.fmu")
+    monkeypatch.setattr(fmu.model_description.coSimulation, "canHandleVariableCommunicationStepSize", False)
+
+    with fmu.instantiate(start_time=0, step_size=1, start_values={}, advance_step_size=math.inf) as instance:
+        assert instance.advance_step_size is None
+
+
+def test_change_tunable_parameters(monkeypatch):
+    fmu = FMU("tests/fixtures/fmus/ModSim.Examples.InputTest.fmu")
+    monkeypatch.setattr(fmu.variables["integrator.k"], "variability", "tunable")
+
+    with fmu.instantiate(start_time=0, step_size=1, start_values={"integrator.k": 1.0}) as instance:
+        outputs = instance.step(input_values={"real_setpoint": 1.0})
+        assert outputs["real_output"] == 1.0
+
+        # Tunable parameters are changed without re-initializing the model
+        instance.change_parameters({"integrator.k": 3.0})
+        assert instance.read_outputs()["real_output"] == 1.0
+
+        outputs = instance.step()
+        assert outputs["current_time"] == 2
+        assert outputs["real_output"] == 4.0
+
+
+def test_read_outputs_array(local_fmu):
+    with local_fmu.instantiate(
+        start_time=0,
+        step_size=1,
+        start_values={
+            "integrator.y_start": 1.05,
+            "int_setpoint": 3,
+            "bool_setpoint": True,
+        },
+    ) as fmu:
+        columns = fmu.output_columns
+        assert set(columns) == {"real_output", "int_output", "bool_output"}
+
+        out = np.zeros(len(columns))
+        outputs = fmu.read_outputs_array(out)
+        assert outputs is out
+        assert outputs[columns["real_output"]] == 1.05
+        assert outputs[columns["int_output"]] == 3
+        assert outputs[columns["bool_output"]] == 1
+        # The model has no string outputs
+        assert fmu.read_string_outputs() == ()
+
+
+def test_step_and_advance_array(local_fmu):
+    with local_fmu.instantiate(
+        start_time=0,
+        step_size=1,
+        start_values={"integrator.k": 2.0, "integrator.y_start": 1.0},
+    ) as fmu:
+        columns = fmu.output_columns
+        outputs = fmu.step_array(input_values={"real_setpoint": 2.0, "int_setpoint": 3})
+        assert fmu.current_time == 1
+        assert outputs[columns["real_output"]] == 5.0
+        assert outputs[columns["int_output"]] == 3
+
+        outputs = fmu.advance_array(3, input_values={"real_setpoint": 1.0})
+        assert fmu.current_time == 3
+        assert outputs[columns["real_output"]] == 9.0
+
+
+def test_simulate_trajectory(local_fmu):
+    with local_fmu.instantiate(start_time=0, step_size=1, start_values={"integrator.k": 1.0}) as fmu:
+        trajectory = fmu.simulate_trajectory(
+            np.array([1, 2, 4]),
+            inputs={"real_setpoint": np.array([1.0, 2.0, 1.0]), "int_setpoint": np.array([1, 2, 3])},
+        )
+        assert fmu.current_time == 4
+        assert trajectory["current_time"].tolist() == [1, 2, 4]
+        assert trajectory["real_output"].tolist() == [1.0, 3.0, 5.0]
+        assert trajectory["int_output"].tolist() == [1, 2, 3]
+
+
+def test_simulate_trajectory_matches_advance(local_fmu):
+    times = [2, 4, 6]
+    inputs = pd.DataFrame({"real_setpoint": [1.0, 0.5, 2.0], "bool_setpoint": [False, False, True]})
+
+    with local_fmu.instantiate(start_time=0, step_size=1, start_values={"integrator.k": 2.0}) as fmu:
+        trajectory = fmu.simulate_trajectory(times, inputs=inputs)
+
+    with local_fmu.instantiate(start_time=0, step_size=1, start_values={"integrator.k": 2.0}) as fmu:
+        for k, until in enumerate(times):
+            outputs = fmu.advance(until, input_values=inputs.iloc[k].to_dict())
+            for name, value in outputs.items():
+                assert trajectory[name][k] == value
+
+
+def test_simulate_trajectory_input_length_mismatch_raises(local_fmu_instance):
+    with pytest.raises(ValueError):
+        local_fmu_instance.simulate_trajectory([1, 2], inputs={"real_setpoint": [1.0]})
+
+
+def test_set_inputs_reuses_write_plan(local_fmu_instance):
+    local_fmu_instance.set_inputs({"real_setpoint": 1.0, "int_setpoint": 2})
+    batch = local_fmu_instance._input_batches[("real_setpoint", "int_setpoint")]
+
+    local_fmu_instance.set_inputs({"real_setpoint": 2.0, "int_setpoint": 3})
+    assert local_fmu_instance._input_batches[("real_setpoint", "int_setpoint")] is batch
+
+    local_fmu_instance.set_inputs({"int_setpoint": 4, "real_setpoint": 3.0})
+    assert len(local_fmu_instance._input_batches) == 2
+
+
+def test_set_inputs_reuses_write_plan_for_changed_subsets(local_fmu_instance):
+    local_fmu_instance.set_inputs({"real_setpoint": 1.0, "int_setpoint": 2, "bool_setpoint": False})
+    for k in range(20):
+        local_fmu_instance.set_inputs(
+            {"real_setpoint": float(k % 3), "int_setpoint": k % 2, "bool_setpoint": k % 5 == 0}
+        )
+        outputs = local_fmu_instance.read_outputs()
+        assert (outputs["int_output"], outputs["bool_output"]) == (k % 2, k % 5 == 0)
+    assert list(local_fmu_instance._input_batches) == [("real_setpoint", "int_setpoint", "bool_setpoint")]
+
+
+def test_batch_writes_only_changed_values(local_fmu):
+    variables = {variable.name: variable for variable in local_fmu.model_description.modelVariables}
+    batch = VariableBatch([variables[name] for name in ("real_setpoint", "integrator.k", "int_setpoint")])
+    calls = []
+
+    class Recorder:
+        component = None
+
+        def fmi2SetReal(self, _component, refs, size, values):  # noqa: N802
+            calls.append(("Real", refs[:size], values[:size]))
+
+        def fmi2SetInteger(self, _component, refs, size, values):  # noqa: N802
+            calls.append(("Integer", refs[:size], values[:size]))
+
+    batch.write(Recorder(), [1.0, 2.0, 3], changed=[False, True, False])
+    assert calls == [("Real", [variables["integrator.k"].valueReference], [2.0])]
+
+
+def test_set_inputs_skips_unchanged_values(local_fmu_instance, monkeypatch):
+    written = []
+    write = VariableBatch.write
+
+    def record(self, instance, values, changed=None):
+        if changed is None:
+            changed = [True] * len(values)
+        written.append({name: value for name, value, c in zip(self.names, values, changed, strict=True) if c})
+        write(self, instance, values, changed)
+
+    monkeypatch.setattr(VariableBatch, "write", record)
+    local_fmu_instance.step(input_values={"real_setpoint": 1.0, "int_setpoint": 2})
+    local_fmu_instance.step(input_values={"real_setpoint": 1.0, "int_setpoint": 2})
+    local_fmu_instance.step(input_values={"real_setpoint": 1.0, "int_setpoint": 3})
+    assert written == [{"real_setpoint": 1.0, "int_setpoint": 2}, {"int_setpoint": 3}]
+
+    local_fmu_instance.reset(start_time=0, step_size=1, start_values={})
+    local_fmu_instance.step(input_values={"real_setpoint": 1.0})
+    assert written[-1] == {"real_setpoint": 1.0}
+    assert local_fmu_instance.read_outputs()["int_output"] == 0
+
+    local_fmu_instance.bind(["real_setpoint"]).set([2.0])
+    local_fmu_instance.set_inputs({"real_setpoint": 1.0})
+    assert written[-1] == {"real_setpoint": 1.0}
+
+
+def test_set_inputs_unknown_input_raises(local_fmu_instance):
+    with pytest.raises(KeyError):
+        local_fmu_instance.set_inputs({"unknown": 1.0})
+
+
+def test_bind_get_and_set(local_fmu):
+    with local_fmu.instantiate(start_time=0, step_size=1, start_values={"integrator.k": 2.0}) as fmu:
+        monitor = fmu.bind(["integrator.y", "integrator.k", "int_setpoint", "bool_setpoint"])
+        assert monitor.names == ("integrator.y", "integrator.k", "int_setpoint", "bool_setpoint")
+
+        fmu.step(input_values={"real_setpoint": 1.0})
+        np.testing.assert_array_equal(monitor.get(), [2.0, 2.0, 0.0, 0.0])
+
+        inputs = fmu.bind(["int_setpoint", "bool_setpoint"])
+        inputs.set(np.array([5.0, 1.0]))
+        out = np.empty(len(monitor))
+        assert monitor.get(out=out) is out
+        np.testing.assert_array_equal(out[1:], [2.0, 5.0, 1.0])
+        assert fmu.read_outputs()["int_output"] == 5
+
+        inputs.set({"bool_setpoint": False, "int_setpoint": 1})
+        assert inputs.as_dict() == {"int_setpoint": 1, "bool_setpoint": False}
+
+
+def test_bind_unknown_variable_raises(local_fmu_instance):
+    with pytest.raises(KeyError):
+        local_fmu_instance.bind(["real_setpoint", "unknown"])
+
+
+def test_bind_set_wrong_length_raises(local_fmu_instance):
+    group = local_fmu_instance.bind(["real_setpoint", "int_setpoint"])
+    with pytest.raises(ValueError):
+        group.set([1.0])
+
+
+def test_bind_closed_instance_raises(local_fmu):
+    fmu = local_fmu.instantiate(start_time=0, step_size=1, start_values={})
+    group = fmu.bind(["real_setpoint"])
+    fmu.close()
+    with pytest.raises(RuntimeError):
+        group.get()
+
+
+def test_output_subset(local_fmu):
+    with local_fmu.instantiate(start_time=0, step_size=1, start_values={}, outputs=["int_output"]) as fmu:
+        assert fmu.output_names == ("int_output",)
+        assert fmu.step(input_values={"int_setpoint": 2}) == {"current_time": 1, "int_output": 2}
+        assert fmu.output_columns == {"int_output": 0}
+        assert fmu.read_outputs_array().tolist() == [2.0]
+        assert set(fmu.simulate_trajectory([2, 3])) == {"current_time", "int_output"}
+
+
+def test_unknown_output_raises(local_fmu):
+    with pytest.raises(KeyError):
+        local_fmu.instantiate(start_time=0, step_size=1, start_values={}, outputs=["real_setpoint"])
+
+
 if __name__ == "__main__":
     pytest.main()
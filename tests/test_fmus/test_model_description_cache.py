@@ -0,0 +1,93 @@
+import sys
+
+import fmpy
+import pytest
+
+from cosimtlk import FMU, ModelDescriptionCache
+from cosimtlk._cache import _environment_cache_dir, default_cache_dir
+
+FMU_PATH = "tests/fixtures/fmus/ModSim.Examples.InputTest.fmu"
+
+
+def test_model_description_is_shared_in_memory():
+    cache = ModelDescriptionCache()
+    first = cache.get(FMU_PATH)
+    assert cache.get(FMU_PATH) is first
+    assert [variable.name for variable in first.inputs] == ["real_setpoint", "int_setpoint", "bool_setpoint"]
+    assert [variable.name for variable in first.outputs] == ["real_output", "int_output", "bool_output"]
+    assert {variable.name for variable in first.parameters} == {"integrator.k", "integrator.y_start"}
+
+
+def test_model_description_is_loaded_from_disk(tmp_path, monkeypatch):
+    parsed = ModelDescriptionCache(cache_dir=tmp_path).get(FMU_PATH)
+    assert len(list(tmp_path.glob("*.pickle"))) == 1
+
+    parsed_paths = []
+    monkeypatch.setattr(fmpy, "read_model_description", parsed_paths.append)
+    loaded = ModelDescriptionCache(cache_dir=tmp_path).get(FMU_PATH)
+    assert not parsed_paths
+    assert loaded.model_description.guid == parsed.model_description.guid
+    assert [variable.name for variable in loaded.inputs] == [variable.name for variable in parsed.inputs]
+    # Derived lists refer to the variables of the model description
+    assert loaded.inputs[0] in loaded.model_description.modelVariables
+
+
+def test_corrupt_entry_is_parsed_again(tmp_path):
+    ModelDescriptionCache(cache_dir=tmp_path).get(FMU_PATH)
+    (path,) = tmp_path.glob("*.pickle")
+    path.write_bytes(b"corrupt")
+
+    parsed = ModelDescriptionCache(cache_dir=tmp_path).get(FMU_PATH)
+    assert parsed.model_description.modelName == "ModSim.Examples.InputTest"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+def test_entry_writable_by_others_is_ignored(tmp_path, monkeypatch):
+    ModelDescriptionCache(cache_dir=tmp_path).get(FMU_PATH)
+    (path,) = tmp_path.glob("*.pickle")
+    path.chmod(0o666)
+
+    parsed_paths = []
+    read_model_description = fmpy.read_model_description
+    monkeypatch.setattr(
+        fmpy, "read_model_description", lambda path: parsed_paths.append(path) or read_model_description(path)
+    )
+    ModelDescriptionCache(cache_dir=tmp_path).get(FMU_PATH)
+    assert parsed_paths
+
+
+def test_clear(tmp_path):
+    cache = ModelDescriptionCache(cache_dir=tmp_path)
+    cache.get(FMU_PATH)
+    cache.clear()
+    assert not list(tmp_path.glob("*.pickle"))
+
+
+def test_fmu_uses_cached_model_description():
+    first, second = FMU(FMU_PATH).model_description, FMU(FMU_PATH).model_description
+    assert first.modelVariables is second.modelVariables
+    # Every FMU owns its capabilities, so changing them does not affect other FMUs
+    first.coSimulation.canGetAndSetFMUstate = True
+    assert not second.coSimulation.canGetAndSetFMUstate
+    assert not ModelDescriptionCache().get(FMU_PATH).model_description.coSimulation.canGetAndSetFMUstate
+
+
+def test_default_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("COSIMTLK_CACHE_DIR", str(tmp_path))
+    assert default_cache_dir() == tmp_path
+
+    monkeypatch.delenv("COSIMTLK_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert default_cache_dir() == tmp_path / "cosimtlk"
+
+
+def test_disk_caches_are_opt_in(tmp_path, monkeypatch):
+    monkeypatch.delenv("COSIMTLK_CACHE_DIR", raising=False)
+    assert _environment_cache_dir("model_descriptions") is None
+
+    monkeypatch.setenv("COSIMTLK_CACHE_DIR", str(tmp_path))
+    assert _environment_cache_dir("model_descriptions") == tmp_path / "model_descriptions"
+
+
+if __name__ == "__main__":
+    pytest.main()
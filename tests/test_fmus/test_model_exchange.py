@@ -0,0 +1,177 @@
+import copy
+import math
+
+import numpy as np
+import pytest
+
+from cosimtlk import EulerSolver, FMUInstance, ModelExchangeFMUInstance, RK45Solver
+from cosimtlk._solvers import get_solver
+
+
+@pytest.fixture
+def model_exchange_instance(local_fmu):
+    instance = local_fmu.instantiate(start_time=0, step_size=1, start_values={}, interface="ModelExchange")
+    yield instance
+    instance.close()
+
+
+def test_instantiate_selects_interface(local_fmu, model_exchange_instance):
+    assert isinstance(model_exchange_instance, ModelExchangeFMUInstance)
+    assert isinstance(model_exchange_instance.solver, RK45Solver)
+    instance = local_fmu.instantiate(start_time=0, step_size=1, start_values={})
+    assert type(instance) is FMUInstance
+    instance.close()
+
+    with pytest.raises(ValueError, match="Unknown interface"):
+        local_fmu.instantiate(start_time=0, step_size=1, start_values={}, interface="Scheduled")
+    with pytest.raises(ValueError, match="Unknown solver"):
+        local_fmu.instantiate(start_time=0, step_size=1, start_values={}, interface="ModelExchange", solver="bdf")
+
+
+@pytest.mark.parametrize("solver", ["rk45", "euler"])
+def test_matches_co_simulation(local_fmu, local_fmu_instance, solver):
+    instance = local_fmu.instantiate(
+        start_time=0, step_size=1, start_values={}, interface="ModelExchange", solver=solver
+    )
+    for k in range(6):
+        input_values = {"real_setpoint": float(k), "int_setpoint": k, "bool_setpoint": k % 2 == 1}
+        expected = local_fmu_instance.step(input_values=input_values)
+        outputs = instance.step(input_values=input_values)
+        assert outputs["current_time"] == expected["current_time"]
+        assert outputs["real_output"] == pytest.approx(expected["real_output"])
+        assert outputs["int_output"] == expected["int_output"]
+        assert outputs["bool_output"] == expected["bool_output"]
+    instance.close()
+
+
+def test_simulate_trajectory_matches_co_simulation(local_fmu_instance, model_exchange_instance):
+    times = [1, 2, 3, 4]
+    inputs = {
+        "real_setpoint": [1.0, 2.0, 3.0, 4.0],
+        "int_setpoint": [1, 2, 3, 4],
+        "bool_setpoint": [True, False, True, False],
+    }
+    expected = local_fmu_instance.simulate_trajectory(times, inputs)
+    trajectory = model_exchange_instance.simulate_trajectory(times, inputs)
+    assert trajectory["current_time"].tolist() == expected["current_time"].tolist()
+    np.testing.assert_allclose(trajectory["real_output"], expected["real_output"])
+    assert trajectory["int_output"].tolist() == expected["int_output"].tolist()
+    assert trajectory["bool_output"].tolist() == expected["bool_output"].tolist()
+
+
+def test_bound_discrete_variables_are_written_in_event_mode(model_exchange_instance):
+    group = model_exchange_instance.bind(["int_setpoint", "bool_setpoint"])
+    group.set([3, True])
+    outputs = model_exchange_instance.step()
+    assert outputs["int_output"] == 3
+    assert outputs["bool_output"] is True
+
+
+def test_advance_integrates_in_few_steps(local_fmu):
+    instance = local_fmu.instantiate(
+        start_time=0,
+        step_size=1,
+        start_values={"integrator.k": 2.0},
+        interface="ModelExchange",
+        advance_step_size=math.inf,
+        stats=True,
+    )
+    instance.set_inputs({"real_setpoint": 1.0})
+    outputs = instance.advance(1000)
+    assert outputs["current_time"] == 1000
+    assert outputs["real_output"] == pytest.approx(2000.0)
+    assert instance.stats()["do_step"]["count"] == 1
+    instance.close()
+
+
+def test_reset(model_exchange_instance):
+    model_exchange_instance.advance(5, input_values={"real_setpoint": 1.0})
+    model_exchange_instance.reset(start_time=0, step_size=1, start_values={})
+    assert model_exchange_instance.current_time == 0
+    assert model_exchange_instance.read_outputs()["real_output"] == 0.0
+    assert model_exchange_instance.step(input_values={"real_setpoint": 1.0})["real_output"] == pytest.approx(1.0)
+
+
+def test_tunable_parameters_change_in_event_mode(local_fmu, model_exchange_instance, monkeypatch):
+    # The model has no tunable parameters, so the gain is declared tunable on a copy of its variable
+    gain = copy.copy(local_fmu.variables["integrator.k"])
+    gain.variability = "tunable"
+    monkeypatch.setitem(local_fmu.variables, "integrator.k", gain)
+    calls = []
+    fmi = model_exchange_instance._instance
+    for name in ("enterEventMode", "enterContinuousTimeMode", "reset"):
+        method = getattr(fmi, name)
+        monkeypatch.setattr(fmi, name, lambda *args, name=name, method=method: calls.append(name) or method(*args))
+
+    model_exchange_instance.step(input_values={"real_setpoint": 1.0})
+    calls.clear()
+    model_exchange_instance.change_parameters({"integrator.k": 3.0})
+    assert calls == ["enterEventMode", "enterContinuousTimeMode"]
+    assert model_exchange_instance.current_time == 1
+    assert model_exchange_instance.step()["real_output"] == pytest.approx(4.0)
+
+
+def test_restore_queries_the_next_event_time(model_exchange_instance, monkeypatch):
+    # The model cannot get and set its state as Model Exchange FMU, so only the solver side is restored
+    monkeypatch.setattr(FMUInstance, "restore", lambda self, _snapshot: self)
+    model_exchange_instance._next_event_time = 0.5
+    model_exchange_instance.restore(None)
+    assert model_exchange_instance._next_event_time is None
+    assert model_exchange_instance.step(input_values={"real_setpoint": 1.0})["real_output"] == pytest.approx(1.0)
+
+
+def test_crossing_at_the_start_of_a_step_is_located(model_exchange_instance, monkeypatch):
+    # An event indicator which is zero at the start of the step and positive after it
+    indicators = iter([np.zeros(1), *(np.ones(1) for _ in range(1000))])
+    monkeypatch.setattr(model_exchange_instance, "_nz", 1)
+    monkeypatch.setattr(model_exchange_instance, "_event_indicators", lambda: next(indicators))
+    events = []
+    handle_event = model_exchange_instance._handle_event
+    monkeypatch.setattr(model_exchange_instance, "_handle_event", lambda: events.append("event") or handle_event())
+    times = []
+    integrate = model_exchange_instance._integrate
+    monkeypatch.setattr(
+        model_exchange_instance,
+        "_integrate",
+        lambda t, x, h, t_end: times.append(t_end) or integrate(t, x, h, t_end),
+    )
+
+    model_exchange_instance.step(input_values={"real_setpoint": 1.0})
+    # The full step is discarded for the smallest step past the crossing, where the event is handled
+    assert times[:2] == [1.0, math.nextafter(0.0, 1.0)]
+    assert len(events) == 1
+    assert model_exchange_instance.current_time == 1
+
+
+def test_rk45_solves_exponential_decay():
+    solver = RK45Solver(rtol=1e-8, atol=1e-10)
+    t, x, h = 0.0, np.array([1.0, 2.0]), None
+    steps = 0
+    while t < 5.0:
+        t, x, h = solver.step(lambda _, x: -x, t, x, h, 5.0)
+        steps += 1
+    assert t == 5.0
+    np.testing.assert_allclose(x, np.array([1.0, 2.0]) * math.exp(-5.0), rtol=1e-6)
+    assert steps < 100
+
+
+def test_euler_takes_fixed_steps():
+    solver = EulerSolver(step_size=0.5)
+    t, x, _ = solver.step(lambda _, x: np.ones_like(x), 0.0, np.zeros(1), None, 2.0)
+    assert t == 0.5
+    np.testing.assert_allclose(x, [0.5])
+    t, x, _ = solver.step(lambda _, x: np.ones_like(x), 1.8, np.zeros(1), None, 2.0)
+    assert t == 2.0
+    np.testing.assert_allclose(x, [0.2])
+
+
+def test_get_solver():
+    solver = EulerSolver()
+    assert get_solver(solver) is solver
+    assert isinstance(get_solver("euler"), EulerSolver)
+    with pytest.raises(ValueError, match="Unknown solver"):
+        get_solver("bdf")
+
+
+if __name__ == "__main__":
+    pytest.main()
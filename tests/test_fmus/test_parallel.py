@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from cosimtlk import FMU, ParallelStepper
+
+FMU_PATH = "tests/fixtures/fmus/ModSim.Examples.InputTest.fmu"
+
+
+@pytest.fixture(scope="function")
+def instances():
+    fmu = FMU(FMU_PATH, share_library=False)
+    instances = [
+        fmu.instantiate(start_time=0, step_size=1, start_values={"integrator.k": float(k)}) for k in range(1, 9)
+    ]
+    yield instances
+    for instance in instances:
+        instance.close()
+
+
+def test_advance_many(instances):
+    with ParallelStepper(max_workers=4) as stepper:
+        outputs = stepper.advance_many(instances, 5, input_values=[{"real_setpoint": 1.0}] * len(instances))
+    assert [output["real_output"] for output in outputs] == [5.0 * k for k in range(1, 9)]
+    assert all(instance.current_time == 5 for instance in instances)
+
+
+def test_step_many(instances):
+    with ParallelStepper(max_workers=3) as stepper:
+        outputs = stepper.step_many(instances, input_values=[{"real_setpoint": float(i)} for i in range(8)])
+    expected = [float(i * k) for i, k in zip(range(8), range(1, 9), strict=True)]
+    assert [output["real_output"] for output in outputs] == expected
+
+
+def test_instances_are_pinned_to_a_thread(instances, monkeypatch):
+    threads = {}
+    step = type(instances[0]).step
+
+    def record(self, *, input_values=None):
+        threads.setdefault(id(self), set()).add(threading.get_ident())
+        return step(self, input_values=input_values)
+
+    monkeypatch.setattr(type(instances[0]), "step", record)
+    with ParallelStepper(max_workers=4) as stepper:
+        for _ in range(5):
+            stepper.step_many(instances)
+    assert all(len(idents) == 1 for idents in threads.values())
+    assert len(set.union(*threads.values())) == 4
+
+
+def test_instances_of_a_shared_library_share_a_worker():
+    fmu = FMU(FMU_PATH)
+    with ParallelStepper(max_workers=4) as stepper:
+        instances = [fmu.instantiate(start_time=0, step_size=1, start_values={}) for _ in range(3)]
+        stepper.step_many(instances)
+        assert len({stepper._worker_of(instance) for instance in instances}) == 1
+        for instance in instances:
+            instance.close()
+
+
+def test_single_instance_models_are_spread(monkeypatch):
+    # Models that can only be instantiated once per process load a private copy of their library
+    fmu = FMU(FMU_PATH)
+    monkeypatch.setattr(fmu.model_description.coSimulation, "canBeInstantiatedOnlyOncePerProcess", True)
+    with ParallelStepper(max_workers=4) as stepper:
+        first = fmu.instantiate(start_time=0, step_size=1, start_values={})
+        second = fmu.instantiate(start_time=0, step_size=1, start_values={})
+        stepper.step_many([first, second])
+        assert stepper._worker_of(first) != stepper._worker_of(second)
+        first.close()
+        second.close()
+
+
+def test_errors_are_raised(instances):
+    with ParallelStepper(max_workers=2) as stepper:
+        with pytest.raises(KeyError):
+            stepper.step_many(instances, input_values=[{"unknown": 1.0}] * len(instances))
+
+
+def test_closed_stepper_raises(instances):
+    stepper = ParallelStepper(max_workers=2)
+    stepper.close()
+    with pytest.raises(RuntimeError):
+        stepper.step_many(instances)
+
+
+@pytest.mark.parametrize("max_workers", [0, -1])
+def test_invalid_number_of_workers_raises(max_workers):
+    with pytest.raises(ValueError, match="positive"):
+        ParallelStepper(max_workers=max_workers)
+
+
+if __name__ == "__main__":
+    pytest.main()
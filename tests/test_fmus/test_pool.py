@@ -0,0 +1,120 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cosimtlk import FMU, FMUInstancePool
+
+
+def test_prewarm(local_fmu):
+    with FMUInstancePool(local_fmu, min_size=2) as pool:
+        assert pool.size == 2
+        assert pool.idle == 2
+
+
+def test_acquire_resets_instance(local_fmu):
+    with FMUInstancePool(local_fmu, min_size=1) as pool:
+        instance = pool.acquire(start_time=5, step_size=2, start_values={"integrator.y_start": 1.5})
+        assert instance.current_time == 5
+        assert instance.step_size == 2
+        assert instance.read_outputs()["real_output"] == 1.5
+        assert pool.idle == 0
+        pool.release(instance)
+        assert pool.idle == 1
+
+
+def test_instances_are_recycled(local_fmu):
+    with FMUInstancePool(local_fmu, max_size=1) as pool:
+        with pool.borrow(start_time=0, step_size=1, start_values={"integrator.k": 2.0}) as instance:
+            outputs = instance.advance(3, input_values={"real_setpoint": 1.0})
+            assert outputs["real_output"] == 6.0
+
+        with pool.borrow(start_time=0, step_size=1, start_values={}) as recycled:
+            assert recycled is instance
+            assert recycled.current_time == 0
+            assert recycled.read_outputs()["real_output"] == 0.0
+
+
+def test_acquire_times_out_at_max_size(local_fmu):
+    with FMUInstancePool(local_fmu, max_size=1) as pool:
+        instance = pool.acquire(start_time=0, step_size=1)
+        with pytest.raises(TimeoutError):
+            pool.acquire(start_time=0, step_size=1, timeout=0.01)
+        pool.release(instance)
+
+
+def test_acquire_waits_for_release(local_fmu):
+    with FMUInstancePool(local_fmu, max_size=1) as pool:
+        instance = pool.acquire(start_time=0, step_size=1)
+        timer = threading.Timer(0.05, pool.release, args=(instance,))
+        timer.start()
+        assert pool.acquire(start_time=0, step_size=1, timeout=5) is instance
+        timer.join()
+        pool.release(instance)
+
+
+def test_idle_instances_expire(local_fmu):
+    with FMUInstancePool(local_fmu, idle_timeout=0.01) as pool:
+        with pool.borrow(start_time=0, step_size=1) as instance:
+            pass
+        time.sleep(0.02)
+        with pool.borrow(start_time=0, step_size=1) as new_instance:
+            assert new_instance is not instance
+        assert not instance.is_initialized
+
+
+def test_idle_instances_expire_without_calls(local_fmu):
+    with FMUInstancePool(local_fmu, min_size=1, idle_timeout=0.01) as pool:
+        instances = [pool.acquire(start_time=0, step_size=1) for _ in range(3)]
+        for instance in instances:
+            pool.release(instance)
+        assert pool.size == 3
+        deadline = time.monotonic() + 5
+        while pool.size > 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pool.size == 1
+        assert sum(instance.is_initialized for instance in instances) == 1
+
+
+def test_release_drops_snapshots(monkeypatch):
+    fmu = FMU("tests/fixtures/fmus/ModSim.Examples.InputTest.fmu")
+    monkeypatch.setattr(fmu.model_description.coSimulation, "canGetAndSetFMUstate", True)
+    with FMUInstancePool(fmu, max_size=1) as pool:
+        with pool.borrow(start_time=0, step_size=1) as instance:
+            snapshot = instance.snapshot()
+        assert snapshot._state is None
+        with pool.borrow(start_time=0, step_size=1) as recycled, pytest.raises(ValueError, match="released"):
+            recycled.restore(snapshot)
+
+
+def test_concurrent_borrowing(local_fmu):
+    def simulate(k):
+        outputs = []
+        for _ in range(20):
+            with pool.borrow(start_time=0, step_size=1, start_values={"integrator.k": float(k)}) as instance:
+                outputs.append(instance.advance(50, input_values={"real_setpoint": 1.0})["real_output"])
+        return outputs
+
+    with FMUInstancePool(local_fmu, max_size=8) as pool, ThreadPoolExecutor(max_workers=8) as threads:
+        results = list(threads.map(simulate, range(8)))
+    assert results == [[50.0 * k] * 20 for k in range(8)]
+
+
+def test_release_foreign_instance_raises(local_fmu, local_fmu_instance):
+    with FMUInstancePool(local_fmu) as pool, pytest.raises(ValueError):
+        pool.release(local_fmu_instance)
+
+
+def test_close(local_fmu):
+    pool = FMUInstancePool(local_fmu)
+    instance = pool.acquire(start_time=0, step_size=1)
+    pool.close()
+    pool.release(instance)
+    assert not instance.is_initialized
+    with pytest.raises(RuntimeError):
+        pool.acquire(start_time=0, step_size=1)
+
+
+if __name__ == "__main__":
+    pytest.main()
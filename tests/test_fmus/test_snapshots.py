@@ -0,0 +1,109 @@
+import pickle
+
+import pytest
+
+from cosimtlk import FMU, FMUSnapshot
+
+
+@pytest.fixture(scope="function")
+def stateful_fmu(monkeypatch):
+    # The fixture FMU implements the state functions without declaring them in its model description
+    fmu = FMU("tests/fixtures/fmus/ModSim.Examples.InputTest.fmu")
+    monkeypatch.setattr(fmu.model_description.coSimulation, "canGetAndSetFMUstate", True)
+    monkeypatch.setattr(fmu.model_description.coSimulation, "canSerializeFMUstate", True)
+    return fmu
+
+
+def test_snapshot_unsupported_raises(local_fmu_instance):
+    with pytest.raises(RuntimeError):
+        local_fmu_instance.snapshot()
+
+
+def test_snapshot_and_restore(stateful_fmu):
+    with stateful_fmu.instantiate(start_time=0, step_size=1, start_values={"integrator.k": 1.0}) as fmu:
+        fmu.step(input_values={"real_setpoint": 1.0})
+        snapshot = fmu.snapshot()
+        assert snapshot.current_time == 1
+
+        first = fmu.advance(5)
+        fmu.restore(snapshot)
+        assert fmu.current_time == 1
+        assert fmu.read_outputs()["real_output"] == 1.0
+
+        second = fmu.advance(5)
+        assert second == first
+
+
+def test_restore_released_snapshot_raises(stateful_fmu):
+    with stateful_fmu.instantiate(start_time=0, step_size=1, start_values={}) as fmu:
+        snapshot = fmu.snapshot()
+        fmu.release(snapshot)
+        with pytest.raises(ValueError):
+            fmu.restore(snapshot)
+
+
+def test_release_snapshots(stateful_fmu):
+    with stateful_fmu.instantiate(start_time=0, step_size=1, start_values={}) as fmu:
+        first = fmu.snapshot()
+        fmu.advance(2)
+        snapshots = [first, fmu.snapshot()]
+        fmu.release_snapshots()
+        assert all(snapshot._state is None for snapshot in snapshots)
+        with pytest.raises(ValueError, match="released"):
+            fmu.restore(snapshots[0])
+
+
+def test_snapshot_to_bytes(stateful_fmu):
+    with stateful_fmu.instantiate(start_time=0, step_size=1, start_values={"integrator.k": 1.0}) as fmu:
+        fmu.advance(3, input_values={"real_setpoint": 2.0})
+        data = fmu.snapshot().to_bytes()
+        expected = fmu.advance(6)
+
+    with stateful_fmu.instantiate(start_time=0, step_size=1, start_values={}) as fmu:
+        fmu.restore(FMUSnapshot.from_bytes(data))
+        assert fmu.current_time == 3
+        assert fmu.advance(6) == expected
+
+    snapshot = pickle.loads(pickle.dumps(FMUSnapshot.from_bytes(data)))  # noqa: S301
+    assert snapshot.current_time == 3
+
+
+SNAPSHOT_BYTES = FMUSnapshot(guid="guid", current_time=3, step_size=0.5, data=b"state").to_bytes()
+
+
+def test_snapshot_bytes_keep_time_types():
+    snapshot = FMUSnapshot.from_bytes(SNAPSHOT_BYTES)
+    assert (snapshot.guid, snapshot.current_time, snapshot.step_size) == ("guid", 3, 0.5)
+    assert isinstance(snapshot.current_time, int)
+    assert snapshot.to_bytes() == SNAPSHOT_BYTES
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        pickle.dumps(("guid", 0, 1, b"state")),
+        SNAPSHOT_BYTES[:-1],
+        SNAPSHOT_BYTES + b"x",
+        b"CSTKSNAP\x02" + SNAPSHOT_BYTES[9:],
+    ],
+)
+def test_invalid_snapshot_bytes_raise(data):
+    with pytest.raises(ValueError, match="Invalid snapshot data"):
+        FMUSnapshot.from_bytes(data)
+
+
+def test_fork(stateful_fmu):
+    with stateful_fmu.instantiate(start_time=0, step_size=1, start_values={"integrator.k": 1.0}) as fmu:
+        fmu.advance(3, input_values={"real_setpoint": 2.0})
+        with fmu.fork() as fork:
+            assert fork.current_time == 3
+            assert fork.read_outputs() == fmu.read_outputs()
+
+            fork.step(input_values={"real_setpoint": 0.0})
+            assert fork.read_outputs()["real_output"] == 6.0
+            assert fmu.step()["real_output"] == 8.0
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,69 @@
+import pytest
+
+from cosimtlk._stats import CallStats
+
+
+def test_stats_disabled_by_default(local_fmu_instance):
+    local_fmu_instance.step()
+    assert not local_fmu_instance.stats_enabled
+    assert local_fmu_instance.stats() == {}
+
+
+def test_stats(local_fmu):
+    with local_fmu.instantiate(start_time=0, step_size=1, start_values={}, stats=True) as fmu:
+        for _ in range(3):
+            fmu.step(input_values={"real_setpoint": 1.0})
+        fmu.advance(5)
+
+        stats = fmu.stats()
+        assert stats["instantiate"]["count"] == 1
+        assert stats["initialize"]["count"] == 1
+        assert stats["step"]["count"] == 3
+        assert stats["advance"]["count"] == 1
+        assert stats["do_step"]["count"] == 5
+        assert stats["set_inputs"]["count"] == 4
+        assert stats["read_outputs"]["count"] == 4
+        assert sum(stats["do_step"]["histogram"].values()) == 5
+        assert 0 < stats["do_step"]["min"] <= stats["do_step"]["mean"] <= stats["do_step"]["max"]
+        assert stats["step"]["total"] >= stats["do_step"]["min"] * 3
+
+        fmu.reset_stats()
+        assert fmu.stats() == {}
+        fmu.reset(start_time=0, step_size=1, start_values={})
+        assert set(fmu.stats()) == {"reset", "initialize"}
+
+        fmu.disable_stats()
+        fmu.step()
+        assert fmu.stats() == {}
+
+
+def test_enable_stats_later(local_fmu_instance):
+    local_fmu_instance.step()
+    local_fmu_instance.enable_stats()
+    local_fmu_instance.step()
+    assert local_fmu_instance.stats()["step"]["count"] == 1
+
+
+def test_stats_are_recorded_on_errors(local_fmu):
+    with local_fmu.instantiate(start_time=0, step_size=1, start_values={}, stats=True) as fmu:
+        with pytest.raises(KeyError):
+            fmu.set_inputs({"unknown": 1.0})
+        assert fmu.stats()["set_inputs"]["count"] == 1
+
+
+def test_call_stats_histogram():
+    calls = CallStats()
+    for elapsed in (5e-7, 5e-6, 2e-3, 20.0):
+        calls.record(elapsed)
+    stats = calls.as_dict()
+    assert stats["count"] == 4
+    assert stats["min"] == 5e-7
+    assert stats["max"] == 20.0
+    assert stats["histogram"]["<=1us"] == 1
+    assert stats["histogram"]["<=10us"] == 1
+    assert stats["histogram"]["<=10ms"] == 1
+    assert stats["histogram"][">10s"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main()
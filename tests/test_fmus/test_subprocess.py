@@ -0,0 +1,93 @@
+import os
+import signal
+
+import numpy as np
+import pytest
+
+from cosimtlk import FMU, SubprocessFMUInstance
+
+FMU_PATH = "tests/fixtures/fmus/ModSim.Examples.InputTest.fmu"
+
+
+@pytest.fixture(scope="module")
+def fmu():
+    return FMU(FMU_PATH)
+
+
+@pytest.fixture(scope="function")
+def subprocess_instance(fmu):
+    instance = SubprocessFMUInstance(fmu, start_time=0, step_size=1, start_values={"integrator.k": 2.0})
+    yield instance
+    instance.close()
+
+
+def test_outputs_match_local_instance(fmu, subprocess_instance):
+    input_values = {"real_setpoint": 1.5, "int_setpoint": 3, "bool_setpoint": True}
+    with fmu.instantiate(start_time=0, step_size=1, start_values={"integrator.k": 2.0}) as local:
+        assert subprocess_instance.step(input_values=input_values) == local.step(input_values=input_values)
+        assert subprocess_instance.advance(5) == local.advance(5)
+        assert subprocess_instance.read_outputs() == local.read_outputs()
+    assert subprocess_instance.current_time == 5
+
+
+def test_reset_and_change_parameters(subprocess_instance):
+    subprocess_instance.advance(3, input_values={"real_setpoint": 1.0})
+    subprocess_instance.reset(start_time=10, step_size=2, start_values={"integrator.k": 1.0})
+    assert subprocess_instance.current_time == 10
+    assert subprocess_instance.step_size == 2
+
+    subprocess_instance.change_parameters({"integrator.k": 3.0})
+    outputs = subprocess_instance.step(input_values={"real_setpoint": 1.0})
+    assert outputs["current_time"] == 12
+    assert outputs["real_output"] == 6.0
+
+
+def test_simulate_trajectory(subprocess_instance):
+    trajectory = subprocess_instance.simulate_trajectory([1, 2, 3], inputs={"real_setpoint": [1.0, 1.0, 0.0]})
+    np.testing.assert_array_equal(trajectory["current_time"], [1, 2, 3])
+    np.testing.assert_array_equal(trajectory["real_output"], [2.0, 4.0, 4.0])
+    assert subprocess_instance.current_time == 3
+
+
+def test_errors_are_raised(subprocess_instance):
+    with pytest.raises(KeyError):
+        subprocess_instance.step(input_values={"unknown": 1.0})
+    subprocess_instance.advance(2)
+    with pytest.raises(ValueError):
+        subprocess_instance.advance(1)
+    assert subprocess_instance.step()["current_time"] == 3
+
+
+def test_crashed_worker_raises(subprocess_instance):
+    os.kill(subprocess_instance.pid, signal.SIGKILL)
+    with pytest.raises(RuntimeError):
+        subprocess_instance.step()
+    assert not subprocess_instance.is_initialized
+
+
+def test_close_stops_worker(fmu):
+    instance = SubprocessFMUInstance(fmu, start_time=0, step_size=1)
+    process = instance._process
+    instance.close()
+    assert not process.is_alive()
+    assert process.exitcode == 0
+
+
+def test_single_instance_models_can_be_instantiated_many_times(fmu, monkeypatch):
+    monkeypatch.setattr(fmu.model_description.coSimulation, "canBeInstantiatedOnlyOncePerProcess", True)
+    with (
+        SubprocessFMUInstance(fmu, start_time=0, step_size=1, start_values={"integrator.k": 1.0}) as first,
+        SubprocessFMUInstance(fmu, start_time=0, step_size=1, start_values={"integrator.k": 2.0}) as second,
+    ):
+        assert first.step(input_values={"real_setpoint": 1.0})["real_output"] == 1.0
+        assert second.step(input_values={"real_setpoint": 1.0})["real_output"] == 2.0
+
+
+def test_output_subset(fmu):
+    with SubprocessFMUInstance(fmu, start_time=0, step_size=1, outputs=["bool_output", "real_output"]) as instance:
+        outputs = instance.step(input_values={"real_setpoint": 1.0, "bool_setpoint": True})
+        assert outputs == {"current_time": 1, "bool_output": True, "real_output": 1.0}
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from cosimtlk import grid, latin_hypercube, random_design, sweep
+
+FMU_PATH = "tests/fixtures/fmus/ModSim.Examples.InputTest.fmu"
+
+
+def test_grid():
+    designs = list(grid({"a": [1, 2], "b": [0.5, 1.5, 2.5]}))
+    assert len(designs) == 6
+    assert designs[0] == {"a": 1, "b": 0.5}
+    assert designs[-1] == {"a": 2, "b": 2.5}
+
+
+def test_random_design():
+    designs = list(random_design({"a": (1.0, 2.0), "b": (-1.0, 0.0)}, 20, seed=1))
+    assert len(designs) == 20
+    assert all(1.0 <= design["a"] <= 2.0 and -1.0 <= design["b"] <= 0.0 for design in designs)
+    assert designs == list(random_design({"a": (1.0, 2.0), "b": (-1.0, 0.0)}, 20, seed=1))
+
+
+def test_latin_hypercube_samples_every_stratum():
+    n = 10
+    designs = list(latin_hypercube({"a": (0.0, 10.0), "b": (0.0, 1.0)}, n, seed=1))
+    assert len(designs) == n
+    strata_a = sorted(int(design["a"] // 1.0) for design in designs)
+    strata_b = sorted(int(design["b"] // 0.1) for design in designs)
+    assert strata_a == list(range(n))
+    assert strata_b == list(range(n))
+
+
+def test_sweep():
+    parameters = list(grid({"integrator.k": [1.0, 2.0, 3.0], "integrator.y_start": [0.0, 1.0]}))
+    results = list(
+        sweep(
+            FMU_PATH,
+            parameters,
+            start_time=0,
+            stop_time=5,
+            step_size=1,
+            inputs={"real_setpoint": np.ones(5)},
+            chunk_size=2,
+            max_workers=2,
+        )
+    )
+    assert sorted(result.index for result in results) == list(range(len(parameters)))
+    for result in results:
+        assert result.parameters == parameters[result.index]
+        assert result.outputs["current_time"].tolist() == [1, 2, 3, 4, 5]
+        k, y_start = result.parameters["integrator.k"], result.parameters["integrator.y_start"]
+        np.testing.assert_allclose(result.outputs["real_output"], y_start + k * np.arange(1, 6))
+
+
+def test_sweep_invalid_chunk_size_raises():
+    with pytest.raises(ValueError):
+        next(sweep(FMU_PATH, [{}], start_time=0, stop_time=1, step_size=1, chunk_size=0))
+
+
+def test_sweep_invalid_number_of_workers_raises():
+    with pytest.raises(ValueError, match="positive"):
+        next(sweep(FMU_PATH, [{}], start_time=0, stop_time=1, step_size=1, max_workers=0))
+
+
+if __name__ == "__main__":
+    pytest.main()
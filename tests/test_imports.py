@@ -0,0 +1,38 @@
+import subprocess
+import sys
+
+import pytest
+
+import cosimtlk
+
+
+def imported_modules(statement: str) -> set[str]:
+    code = f"import sys\n{statement}\nprint('\\n'.join(sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)  # noqa: S603
+    return set(result.stdout.split())
+
+
+def test_local_import_does_not_load_client_dependencies():
+    modules = imported_modules("from cosimtlk import FMU")
+    assert "cosimtlk._fmu" in modules
+    assert not {"requests", "pydantic", "pandas", "cosimtlk.client"} & modules
+
+
+def test_import_simulation_is_lazy():
+    modules = imported_modules("import cosimtlk.simulation")
+    assert not {"pandas", "simpy", "tqdm"} & modules
+
+
+def test_public_names_are_available():
+    for name in cosimtlk.__all__:
+        assert getattr(cosimtlk, name) is not None
+    assert set(cosimtlk.__all__) <= set(dir(cosimtlk))
+
+
+def test_unknown_name_raises():
+    with pytest.raises(AttributeError):
+        cosimtlk.Unknown  # noqa: B018
+
+
+if __name__ == "__main__":
+    pytest.main()